@@ -0,0 +1,214 @@
+"""
+Headless benchmark: builds parameterized scenes, replays recorded input and reports per-stage throughput against a stored baseline
+
+usage:
+    python benchmark.py                      run all scenarios, compare with benchmark_baseline.json
+    python benchmark.py --save-baseline      run and store the results as new baseline
+    python benchmark.py --scenario physics --frames 300 --replay input.json
+
+Frame times depend on the machine, so no baseline is committed: record one with --save-baseline
+before comparing. A baseline is only compared against runs on the machine that recorded it,
+with the same frames, seed and input recording.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+import pygame
+from engine import Engine
+from engine_types import Vector3, MeshType
+from input_handler import InputHandler
+from profiler import profiler
+import renderer
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
+
+# objects per MeshType, whether they are rigid bodies, render backend
+SCENARIOS = {
+    "small": {"objects": 20, "bodies": False, "backend": "pygame"},
+    "large": {"objects": 400, "bodies": False, "backend": "pygame"},
+    "physics": {"objects": 100, "bodies": True, "backend": "pygame"},
+    "raster": {"objects": 10, "bodies": False, "backend": "raster"},
+}
+
+# reported stages: profiler stages summed into them, counters used for the throughput (the first one present)
+STAGES = {
+    "transform": (("transform",), ("objects_drawn",)),
+    "cull": (("cull",), ("objects_drawn",)),
+    "project": (("project",), ("faces_drawn",)),
+    "collide": (("broad_phase", "narrow_phase"), ("pairs_tested",)),
+    "draw": (("draw", "rasterize"), ("pixels_written", "faces_drawn")),
+}
+
+def default_recording(frames: int) -> list[list[int]]:
+    """ Deterministic input stream: the player walks a square while the camera backs off and turns back """
+    pattern = [[pygame.K_d], [pygame.K_w], [pygame.K_a], [pygame.K_s], [pygame.K_DOWN, pygame.K_x], [pygame.K_UP, pygame.K_y], []]
+    return [pattern[(frame // 20) % len(pattern)] for frame in range(frames)]
+
+def build_engine(objects: int, bodies: bool, seed: int = 0) -> Engine:
+    """ Headless engine with objects random GameObjects of every MeshType (placed like the random block in main.py) and a player """
+    engine = Engine(SCREEN_WIDTH, SCREEN_HEIGHT, headless=True, target_fps=0)
+    rng = random.Random(seed)
+    scales = [-4, -3, -2, -1, 1, 2, 3, 4] # no zero, degenerate objects would skew culling
+    for mesh_type in MeshType:
+        for _ in range(objects):
+            position = Vector3(x=rng.randint(-10, 10), y=rng.randint(-10, 10), z=rng.randint(20, 40))
+            rotation = Vector3(x=rng.randint(-6, 6), y=rng.randint(-6, 6), z=rng.randint(-6, 6))
+            scale = Vector3(x=rng.choice(scales), y=rng.choice(scales), z=rng.choice(scales))
+            game_object = engine.scene.spawn("GO", mesh_type, position, rotation, scale)
+            if bodies:
+                engine.physics.add_body(game_object)
+
+    player = engine.scene.spawn("player", MeshType.PYRAMID, Vector3(1, 2, 20), Vector3(0, 0, 0), Vector3(1, 1, 1))
+    ground = engine.scene.spawn("ground", MeshType.CUBE, Vector3(0, -12, 30), Vector3(0, 0, 0), Vector3(30, 0.5, 30))
+    engine.physics.add_body(player)
+    engine.physics.add_body(ground, static=True)
+    engine.bind_default_controls(player)
+    return engine
+
+def run_scenario(name: str, frames: int = 120, recording: list[list[int]] | None = None, seed: int = 0) -> dict:
+    """
+    Run one scenario for frames fixed steps and return its report:
+    {"frame_ms": {...}, "stages": {stage: {"ms": mean, "p50": median ms per frame, "per_second": units per second, "unit": counter}}}
+    """
+    config = SCENARIOS[name]
+    engine = build_engine(config["objects"], config["bodies"], seed)
+    engine.input_handler.replay(recording if recording is not None else default_recording(frames))
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)) # offscreen, no display needed
+
+    was_enabled = profiler.enabled
+    profiler.enabled = True
+    profiler.reset()
+    try:
+        for _ in range(frames):
+            profiler.begin_frame()
+            engine.input_handler.poll()
+            engine.advance(engine.timestep) # exactly one physics step per frame, independent of the machine
+            if config["backend"] == "raster":
+                engine.render(engine.alpha)
+            else:
+                commands, _ = renderer.build_commands(engine.scene, SCREEN_WIDTH, SCREEN_HEIGHT, 1, None, engine.camera, clear_color="black", lod=engine.lod)
+                commands.submit(surface)
+            profiler.end_frame()
+        summary = profiler.summary()
+    finally:
+        profiler.enabled = was_enabled
+
+    report = {"frames": frames, "frame_ms": summary["stages"]["frame"], "stages": {}}
+    empty = {"mean": 0.0, "p50": 0.0}
+    for stage, (parts, counters) in STAGES.items():
+        ms = sum(summary["stages"].get(part, empty)["mean"] for part in parts)
+        p50 = sum(summary["stages"].get(part, empty)["p50"] for part in parts)
+        counter = next((name for name in counters if name in summary["counters"]), counters[0])
+        units = summary["counters"].get(counter, empty)["mean"]
+        report["stages"][stage] = {"ms": ms, "p50": p50, "per_second": units / (ms / 1000) if ms > 0 else 0.0, "unit": counter}
+    return report
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25, noise_ms: float = 0.25) -> list[str]:
+    """
+    Return a message for every stage whose median frame time got slower than baseline by more than tolerance
+    and noise_ms. Medians are compared since single slow frames (GC, scheduler) move the mean a lot
+    """
+    regressions = []
+    for scenario, report in results.items():
+        if scenario not in baseline:
+            continue
+        for stage, values in report["stages"].items():
+            before = baseline[scenario]["stages"].get(stage)
+            if before is None:
+                continue
+            now, then = values["p50"], before["p50"]
+            if now > then * (1 + tolerance) and now - then > noise_ms:
+                regressions.append(f"{scenario}/{stage}: median {now:.3f} ms per frame, baseline {then:.3f} ms ({now / then - 1:+.0%})")
+    return regressions
+
+def run_parameters(frames: int, seed: int, recording: list[list[int]]) -> dict:
+    """ Parameters a baseline is only valid for, the recording by its digest """
+    digest = hashlib.sha1(json.dumps(recording).encode()).hexdigest()[:16]
+    return {"frames": frames, "seed": seed, "recording": digest}
+
+def parameter_mismatch(parameters: dict, baseline_parameters: dict | None) -> list[str]:
+    """ Return a message per run parameter that differs from the baseline's (all of them for baselines without parameters) """
+    baseline_parameters = baseline_parameters or {}
+    return [f"{key} is {value}, baseline was recorded with {baseline_parameters.get(key)}"
+            for key, value in parameters.items() if baseline_parameters.get(key) != value]
+
+def _format(results: dict, baseline: dict) -> str:
+    lines = []
+    for scenario, report in results.items():
+        frame = report["frame_ms"]
+        lines.append(f"{scenario}: frame mean {frame['mean']:.2f} ms, p50 {frame['p50']:.2f}, p90 {frame['p90']:.2f}, p99 {frame['p99']:.2f}")
+        for stage, values in report["stages"].items():
+            before = baseline.get(scenario, {}).get("stages", {}).get(stage)
+            change = f" ({values['p50'] / before['p50'] - 1:+.0%})" if before and before["p50"] > 0 else ""
+            lines.append(f"    {stage:<10} mean {values['ms']:8.3f} ms  p50 {values['p50']:8.3f} ms{change:>8}   {values['per_second']:14,.0f} {values['unit']}/s")
+    return "\n".join(lines)
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append", help="scenario to run, repeatable (default: all)")
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="input recording (JSON, see InputHandler.save_recording) instead of the built-in stream")
+    parser.add_argument("--record", help="write the input stream of the run to this path, for --replay")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown per stage before it counts as regression")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    recording = InputHandler.load_recording(args.replay) if args.replay else default_recording(args.frames)
+    if args.record:
+        InputHandler.save_recording(args.record, recording)
+
+    parameters = run_parameters(args.frames, args.seed, recording)
+    results = {name: run_scenario(name, args.frames, recording, args.seed) for name in (args.scenario or SCENARIOS)}
+    baseline, mismatches = {}, []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as file:
+            stored = json.load(file)
+        mismatches = parameter_mismatch(parameters, stored.get("parameters"))
+        if stored.get("machine") != platform.platform():
+            mismatches.append(f"machine is {platform.platform()}, baseline was recorded on {stored.get('machine')}")
+        baseline = {} if mismatches else stored["scenarios"]
+    elif not args.save_baseline:
+        print(f"no baseline at {args.baseline}, record one with --save-baseline")
+    print(_format(results, baseline))
+
+    document = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": platform.platform(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "parameters": parameters,
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(document, file, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if mismatches:
+        for message in mismatches:
+            print("BASELINE MISMATCH", message)
+        print("not comparing, rerun with the baseline's parameters or record a new one with --save-baseline")
+        return 2
+
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print("REGRESSION", message)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
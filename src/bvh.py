@@ -0,0 +1,319 @@
+"""
+Dynamic bounding volume hierarchy (AABB tree) for spatial queries on moving objects
+"""
+
+import math
+
+NULL_NODE = -1
+
+def _union(min1: list[float], max1: list[float], min2: list[float], max2: list[float]) -> tuple[list[float], list[float]]:
+    return [min(a, b) for a, b in zip(min1, min2)], [max(a, b) for a, b in zip(max1, max2)]
+
+def _area(box_min: list[float], box_max: list[float]) -> float:
+    """ surface area of box, used as insertion cost """
+    dx, dy, dz = box_max[0] - box_min[0], box_max[1] - box_min[1], box_max[2] - box_min[2]
+    return 2.0 * (dx * dy + dy * dz + dz * dx)
+
+def _contains(outer_min: list[float], outer_max: list[float], inner_min: list[float], inner_max: list[float]) -> bool:
+    return all(o <= i for o, i in zip(outer_min, inner_min)) and all(i <= o for o, i in zip(outer_max, inner_max))
+
+def _overlaps(min1: list[float], max1: list[float], min2: list[float], max2: list[float]) -> bool:
+    return all(a <= d for a, d in zip(min1, max2)) and all(c <= b for b, c in zip(max1, min2))
+
+class DynamicBVH:
+    """
+    Binary AABB tree over items (usually object ids)
+
+    Leaves store enlarged ("fat") boxes, so small movements only update the
+    leaf's tight box instead of restructuring the tree. Subtrees are kept
+    balanced with rotations on insert and remove.
+
+    Attributes:
+        margin
+    """
+    def __init__(self, margin: float = 0.1) -> None:
+        self.margin = margin
+        self._root = NULL_NODE
+        # node data, one entry per node. Leaves have item != NULL_NODE
+        self._min: list[list[float]] = []
+        self._max: list[list[float]] = []
+        self._parent: list[int] = []
+        self._left: list[int] = []
+        self._right: list[int] = []
+        self._height: list[int] = []
+        self._item: list[int] = []
+        self._free: list[int] = []
+        self._leaf_of: dict[int, int] = {} # item -> leaf node
+        self._tight: dict[int, tuple[list[float], list[float]]] = {} # item -> exact box
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    def insert(self, item: int, box_min, box_max) -> None:
+        """ Add item with bounds box_min/box_max (sequences of 3 floats) """
+        if item in self._leaf_of:
+            raise KeyError(f"item {item} is already in the tree")
+        box_min, box_max = [float(v) for v in box_min], [float(v) for v in box_max]
+        leaf = self._allocate()
+        self._min[leaf] = [v - self.margin for v in box_min]
+        self._max[leaf] = [v + self.margin for v in box_max]
+        self._item[leaf] = item
+        self._leaf_of[item] = leaf
+        self._tight[item] = (box_min, box_max)
+        self._insert_leaf(leaf)
+
+    def remove(self, item: int) -> None:
+        """ Remove item from the tree """
+        leaf = self._leaf_of.pop(item)
+        del self._tight[item]
+        self._remove_leaf(leaf)
+        self._release(leaf)
+
+    def update(self, item: int, box_min, box_max) -> bool:
+        """
+        Set new bounds of item (inserting it if unknown). Returns True if the tree had to be
+        restructured, False if the new box still fits into the leaf's enlarged box.
+        """
+        if item not in self._leaf_of:
+            self.insert(item, box_min, box_max)
+            return True
+        box_min, box_max = [float(v) for v in box_min], [float(v) for v in box_max]
+        self._tight[item] = (box_min, box_max)
+        leaf = self._leaf_of[item]
+        if _contains(self._min[leaf], self._max[leaf], box_min, box_max):
+            return False
+        self._remove_leaf(leaf)
+        self._min[leaf] = [v - self.margin for v in box_min]
+        self._max[leaf] = [v + self.margin for v in box_max]
+        self._insert_leaf(leaf)
+        return True
+
+    def refit(self, item: int, box_min, box_max) -> None:
+        """
+        Set new bounds of item and resize all ancestors to fit, without moving nodes.
+        Cheaper than update() but the tree quality degrades if items travel far.
+        """
+        box_min, box_max = [float(v) for v in box_min], [float(v) for v in box_max]
+        self._tight[item] = (box_min, box_max)
+        leaf = self._leaf_of[item]
+        self._min[leaf] = [v - self.margin for v in box_min]
+        self._max[leaf] = [v + self.margin for v in box_max]
+        self._refit_ancestors(self._parent[leaf])
+
+    def query(self, box_min, box_max) -> list[int]:
+        """ Return all items whose bounds overlap the box """
+        box_min, box_max = [float(v) for v in box_min], [float(v) for v in box_max]
+        hits = []
+        stack = [self._root] if self._root != NULL_NODE else []
+        while stack:
+            node = stack.pop()
+            if not _overlaps(self._min[node], self._max[node], box_min, box_max):
+                continue
+            item = self._item[node]
+            if item != NULL_NODE:
+                tight_min, tight_max = self._tight[item]
+                if _overlaps(tight_min, tight_max, box_min, box_max):
+                    hits.append(item)
+            else:
+                stack.append(self._left[node])
+                stack.append(self._right[node])
+        return hits
+
+    def ray_cast(self, origin, direction, max_distance: float = math.inf) -> list[tuple[float, int]]:
+        """
+        Return (distance, item) of all items whose bounds are hit by the ray, nearest first.
+        distance is measured in units of direction (0 if the origin is inside the box).
+        """
+        origin = [float(v) for v in origin]
+        inv_dir = [1.0 / d if d != 0 else math.inf for d in (float(v) for v in direction)]
+        hits = []
+        stack = [self._root] if self._root != NULL_NODE else []
+        while stack:
+            node = stack.pop()
+            if self._ray_hits(self._min[node], self._max[node], origin, inv_dir, max_distance) is None:
+                continue
+            item = self._item[node]
+            if item != NULL_NODE:
+                tight_min, tight_max = self._tight[item]
+                distance = self._ray_hits(tight_min, tight_max, origin, inv_dir, max_distance)
+                if distance is not None:
+                    hits.append((distance, item))
+            else:
+                stack.append(self._left[node])
+                stack.append(self._right[node])
+        hits.sort()
+        return hits
+
+    def bounds(self, item: int) -> tuple[list[float], list[float]]:
+        """ Return the exact (not enlarged) bounds of item """
+        return self._tight[item]
+
+    @property
+    def height(self) -> int:
+        return self._height[self._root] if self._root != NULL_NODE else 0
+
+    def __contains__(self, item: int) -> bool:
+        return item in self._leaf_of
+
+    def __len__(self) -> int:
+        return len(self._leaf_of)
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    @staticmethod
+    def _ray_hits(box_min: list[float], box_max: list[float], origin: list[float], inv_dir: list[float], max_distance: float) -> float | None:
+        """ slab test, returns entry distance or None """
+        t_min, t_max = 0.0, max_distance
+        for o, inv, lo, hi in zip(origin, inv_dir, box_min, box_max):
+            if math.isinf(inv):
+                if o < lo or o > hi:
+                    return None # parallel to this slab and outside of it
+                continue
+            t1, t2 = (lo - o) * inv, (hi - o) * inv
+            if t1 > t2:
+                t1, t2 = t2, t1
+            t_min, t_max = max(t_min, t1), min(t_max, t2)
+            if t_min > t_max:
+                return None
+        return t_min
+
+    def _allocate(self) -> int:
+        if self._free:
+            node = self._free.pop()
+        else:
+            node = len(self._min)
+            self._min.append([])
+            self._max.append([])
+            self._parent.append(NULL_NODE)
+            self._left.append(NULL_NODE)
+            self._right.append(NULL_NODE)
+            self._height.append(0)
+            self._item.append(NULL_NODE)
+        self._parent[node] = self._left[node] = self._right[node] = NULL_NODE
+        self._height[node] = 0
+        self._item[node] = NULL_NODE
+        return node
+
+    def _release(self, node: int) -> None:
+        self._free.append(node)
+
+    def _insert_leaf(self, leaf: int) -> None:
+        if self._root == NULL_NODE:
+            self._root = leaf
+            self._parent[leaf] = NULL_NODE
+            return
+
+        # find best sibling by surface area heuristic
+        leaf_min, leaf_max = self._min[leaf], self._max[leaf]
+        index = self._root
+        while self._item[index] == NULL_NODE:
+            area = _area(self._min[index], self._max[index])
+            combined_area = _area(*_union(self._min[index], self._max[index], leaf_min, leaf_max))
+            cost = 2.0 * combined_area # cost of pairing leaf with this node
+            inheritance_cost = 2.0 * (combined_area - area) # cost of pushing leaf further down
+
+            child_costs = []
+            for child in (self._left[index], self._right[index]):
+                enlarged = _area(*_union(self._min[child], self._max[child], leaf_min, leaf_max))
+                if self._item[child] == NULL_NODE:
+                    enlarged -= _area(self._min[child], self._max[child])
+                child_costs.append(enlarged + inheritance_cost)
+
+            if cost < child_costs[0] and cost < child_costs[1]:
+                break
+            index = self._left[index] if child_costs[0] < child_costs[1] else self._right[index]
+
+        sibling = index
+        old_parent = self._parent[sibling]
+        new_parent = self._allocate()
+        self._parent[new_parent] = old_parent
+        self._min[new_parent], self._max[new_parent] = _union(leaf_min, leaf_max, self._min[sibling], self._max[sibling])
+        self._height[new_parent] = self._height[sibling] + 1
+        self._left[new_parent], self._right[new_parent] = sibling, leaf
+        self._parent[sibling] = self._parent[leaf] = new_parent
+
+        if old_parent == NULL_NODE:
+            self._root = new_parent
+        elif self._left[old_parent] == sibling:
+            self._left[old_parent] = new_parent
+        else:
+            self._right[old_parent] = new_parent
+
+        self._refit_ancestors(self._parent[leaf], rebalance=True)
+
+    def _remove_leaf(self, leaf: int) -> None:
+        if leaf == self._root:
+            self._root = NULL_NODE
+            return
+
+        parent = self._parent[leaf]
+        grand_parent = self._parent[parent]
+        sibling = self._right[parent] if self._left[parent] == leaf else self._left[parent]
+
+        if grand_parent == NULL_NODE:
+            self._root = sibling
+            self._parent[sibling] = NULL_NODE
+            self._release(parent)
+            return
+
+        # replace parent by sibling
+        if self._left[grand_parent] == parent:
+            self._left[grand_parent] = sibling
+        else:
+            self._right[grand_parent] = sibling
+        self._parent[sibling] = grand_parent
+        self._release(parent)
+        self._refit_ancestors(grand_parent, rebalance=True)
+
+    def _refit_ancestors(self, index: int, rebalance: bool = False) -> None:
+        """ walk up from index, recomputing boxes and heights (and rotating if rebalance) """
+        while index != NULL_NODE:
+            if rebalance:
+                index = self._balance(index)
+            left, right = self._left[index], self._right[index]
+            self._height[index] = 1 + max(self._height[left], self._height[right])
+            self._min[index], self._max[index] = _union(self._min[left], self._max[left], self._min[right], self._max[right])
+            index = self._parent[index]
+
+    def _balance(self, a: int) -> int:
+        """ rotate the higher child of a up if subtree heights differ by more than 1, return new subtree root """
+        if self._item[a] != NULL_NODE or self._height[a] < 2:
+            return a
+
+        b, c = self._left[a], self._right[a]
+        balance = self._height[c] - self._height[b]
+        if -1 <= balance <= 1:
+            return a
+
+        # the higher child becomes the new subtree root, its lower grandchild moves to a
+        up = c if balance > 1 else b
+        stay = b if balance > 1 else c
+        f, g = self._left[up], self._right[up]
+
+        self._left[up] = a
+        self._parent[up] = self._parent[a]
+        self._parent[a] = up
+        parent = self._parent[up]
+        if parent == NULL_NODE:
+            self._root = up
+        elif self._left[parent] == a:
+            self._left[parent] = up
+        else:
+            self._right[parent] = up
+
+        keep, move = (f, g) if self._height[f] > self._height[g] else (g, f)
+        self._right[up] = keep
+        if balance > 1:
+            self._right[a] = move # a keeps b on the left
+        else:
+            self._left[a] = move # a keeps c on the right
+        self._parent[move] = a
+
+        self._min[a], self._max[a] = _union(self._min[stay], self._max[stay], self._min[move], self._max[move])
+        self._height[a] = 1 + max(self._height[stay], self._height[move])
+        self._min[up], self._max[up] = _union(self._min[a], self._max[a], self._min[keep], self._max[keep])
+        self._height[up] = 1 + max(self._height[a], self._height[keep])
+        return up
@@ -1,5 +1,167 @@
-from engine_types import Coordinate3
+"""
+Perspective camera owning the view and projection of the scene
+"""
+
+import math
+import numpy as np
+from engine_types import Coordinate3, Vector3
+from transform import rotation_matrices_xyz
 
 class Camera:
-    def __init__(self, position: Coordinate3) -> None:
-        self.camera_pos = position
\ No newline at end of file
+    """
+    Camera looking down its local +z axis, rotated by euler angles like a Transform
+
+    The view-projection matrix is cached and only rebuilt after position, rotation,
+    fov, aspect, near or far changed. version counts these changes, so callers can
+    cache work that depends on the camera.
+    The defaults (fov 90 degrees, aspect 1) reproduce the plain x / z, y / z projection.
+
+    Attributes:
+        position
+        rotation
+        fov
+        aspect
+        near
+        far
+        version
+    """
+    def __init__(self, position: Coordinate3 = Coordinate3(0, 0, 0), rotation: Vector3 = Vector3(0, 0, 0),
+                 fov: float = 90.0, aspect: float = 1.0, near: float = 0.01, far: float = 1000.0) -> None:
+        self._position = position
+        self._rotation = rotation
+        self._fov = fov # vertical field of view in degrees
+        self._aspect = aspect # horizontal / vertical extent of the view
+        self._near = near
+        self._far = far
+        self.version = 0
+        self._view: np.ndarray | None = None
+        self._projection: np.ndarray | None = None
+        self._view_projection: np.ndarray | None = None
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    @property
+    def position(self) -> Coordinate3:
+        return self._position
+
+    @position.setter
+    def position(self, value: Coordinate3) -> None:
+        self._position = value
+        self._invalidate(view=True)
+
+    @property
+    def rotation(self) -> Vector3:
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value: Vector3) -> None:
+        self._rotation = value
+        self._invalidate(view=True)
+
+    @property
+    def fov(self) -> float:
+        return self._fov
+
+    @fov.setter
+    def fov(self, value: float) -> None:
+        self._fov = value
+        self._invalidate(projection=True)
+
+    @property
+    def aspect(self) -> float:
+        return self._aspect
+
+    @aspect.setter
+    def aspect(self, value: float) -> None:
+        self._aspect = value
+        self._invalidate(projection=True)
+
+    @property
+    def near(self) -> float:
+        return self._near
+
+    @near.setter
+    def near(self, value: float) -> None:
+        self._near = value
+        self._invalidate(projection=True)
+
+    @property
+    def far(self) -> float:
+        return self._far
+
+    @far.setter
+    def far(self, value: float) -> None:
+        self._far = value
+        self._invalidate(projection=True)
+
+    def translate_by(self, delta: Vector3) -> None:
+        """ Move camera by delta given in its local axes (x right, y up, z forward) """
+        x, y, z = self._rotation_matrix() @ np.array((delta.x, delta.y, delta.z))
+        self.position = Coordinate3(self._position.x + x, self._position.y + y, self._position.z + z)
+
+    def rotate_by(self, delta: Vector3) -> None:
+        self.rotation = Vector3(self._rotation.x + delta.x, self._rotation.y + delta.y, self._rotation.z + delta.z)
+
+    def view_matrix(self) -> np.ndarray:
+        """ 4x4 world -> view matrix (inverse of the camera's own transform) """
+        if self._view is None:
+            rotation_t = self._rotation_matrix().T
+            view = np.eye(4)
+            view[:3, :3] = rotation_t
+            view[:3, 3] = -rotation_t @ np.array((self._position.x, self._position.y, self._position.z))
+            view.flags.writeable = False
+            self._view = view
+        return self._view
+
+    def projection_matrix(self) -> np.ndarray:
+        """
+        4x4 view -> clip matrix. w of a clip space point is its view space depth z,
+        the view volume is -w <= x, y <= w and near <= w <= far
+        """
+        if self._projection is None:
+            f = 1.0 / math.tan(math.radians(self._fov) / 2)
+            near, far = self._near, self._far
+            projection = np.zeros((4, 4))
+            projection[0, 0] = f / self._aspect
+            projection[1, 1] = f
+            projection[2, 2] = (far + near) / (far - near)
+            projection[2, 3] = -2.0 * far * near / (far - near)
+            projection[3, 2] = 1.0
+            projection.flags.writeable = False
+            self._projection = projection
+        return self._projection
+
+    def view_projection(self) -> np.ndarray:
+        """ 4x4 world -> clip matrix, rebuilt only after the camera changed """
+        if self._view_projection is None:
+            view_projection = self.projection_matrix() @ self.view_matrix()
+            view_projection.flags.writeable = False
+            self._view_projection = view_projection
+        return self._view_projection
+
+    def model_view_projections(self, model_matrices: np.ndarray) -> np.ndarray:
+        """ Combine (I, 4, 4) model matrices with the view-projection into model -> clip matrices """
+        return self.view_projection() @ model_matrices
+
+    def frustum_planes(self) -> np.ndarray:
+        """ World space planes (6, 4) of the view volume as (nx, ny, nz, d), n . p + d >= 0 inside (not normalized) """
+        m = self.view_projection()
+        return np.stack((m[3] + m[0], m[3] - m[0], m[3] + m[1], m[3] - m[1], m[3] + m[2], m[3] - m[2]))
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    def _rotation_matrix(self) -> np.ndarray:
+        r = self._rotation
+        return rotation_matrices_xyz(np.array(((r.x, r.y, r.z),)))[0]
+
+    def _invalidate(self, view: bool = False, projection: bool = False) -> None:
+        if view:
+            self._view = None
+        if projection:
+            self._projection = None
+        self._view_projection = None
+        self.version += 1
@@ -0,0 +1,63 @@
+"""
+Files of named, aligned binary columns that are mapped into memory instead of being parsed
+
+File layout: 8 byte magic, 8 byte little endian header length, JSON header, then the raw
+columns, each aligned to ALIGNMENT bytes at the offset given in header["columns"]. The
+mesh cache (obj_loader) and scene snapshots (snapshot) are stored this way.
+"""
+
+import json
+import os
+import struct
+import numpy as np
+
+ALIGNMENT = 64
+
+def write_columns(path: str, magic: bytes, header: dict, columns: dict[str, np.ndarray]) -> dict:
+    """
+    Write header (plus the layout of columns, as header["columns"]) and columns to path.
+    The file is written next to path and replaces it when complete. Returns the written header
+    """
+    layout, offset = {}, 0
+    for key, column in columns.items():
+        layout[key] = {"dtype": column.dtype.str, "shape": list(column.shape), "offset": offset}
+        offset = _align(offset + column.nbytes)
+    header = dict(header, columns=layout)
+    encoded = json.dumps(header).encode()
+    data_start = _align(len(magic) + 8 + len(encoded))
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(magic + struct.pack("<Q", len(encoded)) + encoded)
+        for key, column in columns.items():
+            file.seek(data_start + layout[key]["offset"])
+            file.write(np.ascontiguousarray(column).tobytes())
+        file.truncate(data_start + offset)
+    os.replace(temporary, path) # readers never see a half written file
+    return header
+
+def read_header(path: str, magic: bytes) -> tuple[dict, int]:
+    """ Return the JSON header of a column file and the offset its columns start at, ValueError if magic does not match """
+    with open(path, "rb") as file:
+        if file.read(len(magic)) != magic:
+            raise ValueError(f"{path} does not start with {magic!r}")
+        (header_size,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(header_size))
+    return header, _align(len(magic) + 8 + header_size)
+
+def map_columns(path: str, header: dict, data_start: int, mode: str = "r") -> tuple[np.memmap, dict[str, np.ndarray]]:
+    """
+    Map the columns listed in header into memory, returns the mapping and the columns as views into it.
+    mode is the np.memmap mode: "r" for read-only views, "r+" to write through to the file
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode=mode)
+    columns = {}
+    for key, layout in header["columns"].items():
+        dtype = np.dtype(layout["dtype"])
+        start = data_start + layout["offset"]
+        count = int(np.prod(layout["shape"]))
+        columns[key] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(layout["shape"])
+    return buffer, columns
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,179 @@
+"""
+Engine owning the scene and running the gameloop
+"""
+
+import numpy as np
+import pygame
+from scene import Scene
+from game_object import GameObject
+from engine_types import Vector3
+from physics import PhysicsEngine
+from input_handler import InputHandler
+from camera import Camera
+from lod import LodSelector
+from retained import RetainedRenderer
+from render_commands import RenderThread
+import renderer
+from rasterizer import Framebuffer, rasterize_scene
+from profiler import profiler
+
+class Engine:
+    """
+    Runs input and physics on a fixed timestep and renders as often as the target frame rate allows
+
+    Every frame the elapsed time is added to an accumulator, which is drained in steps of
+    1 / physics_rate. Rendering interpolates positions between the last two physics states
+    by the remaining fraction of a step, so motion stays smooth if both rates differ.
+
+    Attributes:
+        scene
+        physics
+        input_handler
+        camera
+        lod
+        physics_rate
+        target_fps
+        max_frame_time
+        running
+        headless
+        framebuffer
+        retained_renderer
+        render_thread
+        profiler
+    """
+    def __init__(self, screen_width: int = 800, screen_height: int = 600, physics_rate: float = 60.0, target_fps: int = 60, max_frame_time: float = 0.25, headless: bool = False, retained: bool = True, threaded: bool = False, profile: bool = False) -> None:
+        self.screen_width, self.screen_height = screen_width, screen_height
+        self.scene = Scene()
+        self.physics = PhysicsEngine()
+        self.input_handler = InputHandler()
+        self.camera = Camera()
+        self.lod = LodSelector() # picks simplified meshes (Mesh.lods) for small objects
+        self.physics_rate = physics_rate # simulation steps per second
+        self.target_fps = target_fps # frame rate cap, 0 renders as fast as possible
+        self.max_frame_time = max_frame_time # seconds, longer frames are clamped so a stall cannot trigger a spiral of catch-up steps
+        self.running = False
+        self.headless = headless # render into framebuffer instead of a window, works without a display
+        self.screen: pygame.Surface | None = None
+        self.framebuffer = Framebuffer(screen_width, screen_height) if headless else None
+        self.threaded = threaded and not headless # draw on a worker thread while the next frame is prepared
+        self.retained_renderer = RetainedRenderer() if retained and not headless and not self.threaded else None # redraws only what changed
+        self.render_thread: RenderThread | None = None
+        self.profiler = profiler # module wide instance, also fed by physics and renderer
+        self.profiler.enabled = profile # the last constructed engine decides, it is one switch for the process
+        self.clock = pygame.time.Clock()
+        self._accumulator = 0.0
+        self._previous_positions = np.zeros((0, 3)) # positions before the last physics step
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    @property
+    def timestep(self) -> float:
+        return 1.0 / self.physics_rate
+
+    def start(self, max_frames: int | None = None) -> None:
+        """ Open the window (unless headless) and run the gameloop until it is closed or max_frames were rendered """
+        if not self.headless:
+            self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+            if self.threaded:
+                self.render_thread = RenderThread(self.screen.get_size())
+        self.running = True
+        self.clock.tick()
+        frames = 0
+        while self.running and (max_frames is None or frames < max_frames):
+            frame_time = self.clock.tick(self.target_fps) / 1000 # waits only as long as needed to hold target_fps
+            self.profiler.end_frame() # a frame ends when the next one starts, so waiting for target_fps is not counted
+            self.profiler.begin_frame()
+            with self.profiler.stage("input"):
+                self.running = self.input_handler.poll()
+            with self.profiler.stage("physics"):
+                self.advance(frame_time)
+            with self.profiler.stage("render"):
+                self.render(self.alpha)
+            frames += 1
+        if self.render_thread is not None:
+            self.render_thread.stop()
+            self.render_thread = None
+        self.profiler.end_frame()
+        pygame.quit()
+
+    def bind_default_controls(self, player: GameObject, move_weight: float = 0.1, rotation_weight: float = 0.01) -> None:
+        """ W/A/S/D/Q/E move player, X/Y/Z rotate it and the arrow keys move the camera, once per physics step """
+        bind = self.input_handler.bind
+        # position
+        bind(pygame.K_a, lambda: player.move_left(move_weight))
+        bind(pygame.K_d, lambda: player.move_right(move_weight))
+        bind(pygame.K_w, lambda: player.move_front(move_weight))
+        bind(pygame.K_s, lambda: player.move_back(move_weight))
+        bind(pygame.K_q, lambda: player.move_up(move_weight))
+        bind(pygame.K_e, lambda: player.move_down(move_weight))
+
+        # rotation
+        bind(pygame.K_x, lambda: player.rotate_x(rotation_weight))
+        bind(pygame.K_y, lambda: player.rotate_y(rotation_weight))
+        bind(pygame.K_z, lambda: player.rotate_z(rotation_weight))
+
+        # camera
+        bind(pygame.K_LEFT, lambda: self.camera.translate_by(Vector3(-move_weight, 0, 0)))
+        bind(pygame.K_RIGHT, lambda: self.camera.translate_by(Vector3(move_weight, 0, 0)))
+        bind(pygame.K_UP, lambda: self.camera.translate_by(Vector3(0, 0, move_weight)))
+        bind(pygame.K_DOWN, lambda: self.camera.translate_by(Vector3(0, 0, -move_weight)))
+
+    def stop(self) -> None:
+        self.running = False
+
+    def advance(self, frame_time: float) -> int:
+        """ Add frame_time seconds to the accumulator and run all physics steps that are due, return their count """
+        self._accumulator += min(frame_time, self.max_frame_time)
+        steps = 0
+        while self._accumulator >= self.timestep:
+            self.fixed_update(self.timestep)
+            self._accumulator -= self.timestep
+            steps += 1
+        return steps
+
+    def fixed_update(self, dt: float) -> None:
+        """ One simulation step: held keys, then physics """
+        self._previous_positions = self.scene.positions.copy()
+        self.input_handler.dispatch_keys()
+        self.physics.step(self.scene, dt)
+
+    @property
+    def alpha(self) -> float:
+        """ Share of a physics step that has passed since the last one, in [0, 1) """
+        return self._accumulator / self.timestep
+
+    def interpolated_model_matrices(self, alpha: float) -> np.ndarray | None:
+        """
+        Model matrices with translations between the previous and the current physics state,
+        None if no object moved in the last step (the scene's own matrices apply)
+        """
+        self.scene.update_model_matrices()
+        current = self.scene.positions
+        if len(self._previous_positions) != len(current):
+            return None # store grew since the last step, nothing to interpolate from
+        delta = current - self._previous_positions
+        if alpha == 1.0 or not delta.any():
+            return None
+        matrices = self.scene.model_matrices.copy()
+        matrices[:, :3, 3] += (alpha - 1.0) * delta
+        return matrices
+
+    def render(self, alpha: float = 1.0) -> None:
+        if self.headless:
+            self.framebuffer.clear()
+            rasterize_scene(self.framebuffer, self.scene, self.camera, model_matrices=self.interpolated_model_matrices(alpha), lod=self.lod)
+            return
+        if self.render_thread is not None:
+            commands, _ = renderer.build_commands(self.scene, self.screen_width, self.screen_height, 1, self.interpolated_model_matrices(alpha), self.camera, clear_color="black", lod=self.lod)
+            self.render_thread.submit(commands) # drawn while the next frame is simulated
+            self.render_thread.present(self.screen) # newest finished frame, display calls stay on this thread
+            return
+        if self.retained_renderer is not None:
+            self.retained_renderer.render(self.screen, self.scene, self.camera, self.interpolated_model_matrices(alpha), lod=self.lod)
+            return
+        self.screen.fill("black")
+        renderer.render_instanced(self.screen, self.scene, "green", 1, self.interpolated_model_matrices(alpha), self.camera, lod=self.lod)
+        with self.profiler.stage("flip"):
+            pygame.display.flip()
@@ -2,10 +2,12 @@
 User defined datastructures and types used across the engine
 """
 
-from typing import Sequence, TypeAlias, Self, Iterator
-from dataclasses import dataclass, fields
+import math
+from typing import Sequence, TypeAlias, Self, Iterator, Iterable
+from dataclasses import dataclass
 from enum import Enum
 from abc import ABC
+import numpy as np
 
 @dataclass(frozen=True, slots=True)
 class _VecBase(ABC):
@@ -19,16 +21,19 @@ class _VecBase(ABC):
         __sub__
         __mul__
         __imul__
+
+    The generic versions read the components through __slots__ (the field names).
+    _Vec2Base and _Vec3Base override all of them with versions that access x, y (, z)
+    directly, since these operations run in every scalar code path.
     """
     def _values(self) -> tuple[float, ...]:
-        return tuple(getattr(self, f.name) for f in fields(self))
+        return tuple(getattr(self, name) for name in self.__slots__)
     
     def __iter__(self) -> Iterator[float]:
-        for f in fields(self):
-            yield getattr(self, f.name)
+        return iter(self._values())
 
     def __len__(self) -> int:
-        return len(tuple(self))
+        return len(self.__slots__)
 
     def __add__(self, other: Self) -> Self:
         if type(self) is not type(other):
@@ -49,31 +54,239 @@ class _VecBase(ABC):
         return self * scalar
 
 @dataclass(frozen=True, slots=True)
-class Vector3(_VecBase):
+class _Vec2Base(_VecBase):
+    """ Fast paths of _VecBase for 2 components """
+    def _values(self) -> tuple[float, float]:
+        return (self.x, self.y)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter((self.x, self.y))
+
+    def __len__(self) -> int:
+        return 2
+
+    def __add__(self, other: Self) -> Self:
+        cls = self.__class__
+        if other.__class__ is not cls:
+            return NotImplemented
+        return cls(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other: Self) -> Self:
+        cls = self.__class__
+        if other.__class__ is not cls:
+            return NotImplemented
+        return cls(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, scalar: float) -> Self:
+        if not isinstance(scalar, (int, float)):
+            return NotImplemented
+        return self.__class__(self.x * scalar, self.y * scalar)
+
+    __rmul__ = __mul__
+
+@dataclass(frozen=True, slots=True)
+class _Vec3Base(_VecBase):
+    """ Fast paths of _VecBase for 3 components """
+    def _values(self) -> tuple[float, float, float]:
+        return (self.x, self.y, self.z)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter((self.x, self.y, self.z))
+
+    def __len__(self) -> int:
+        return 3
+
+    def __add__(self, other: Self) -> Self:
+        cls = self.__class__
+        if other.__class__ is not cls:
+            return NotImplemented
+        return cls(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other: Self) -> Self:
+        cls = self.__class__
+        if other.__class__ is not cls:
+            return NotImplemented
+        return cls(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, scalar: float) -> Self:
+        if not isinstance(scalar, (int, float)):
+            return NotImplemented
+        return self.__class__(self.x * scalar, self.y * scalar, self.z * scalar)
+
+    __rmul__ = __mul__
+
+@dataclass(frozen=True, slots=True)
+class Vector3(_Vec3Base):
     """ Represents vectorial 3D data """
     x: float
     y: float
     z: float
 
+    def dot(self, other: "Vector3") -> float:
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other: "Vector3") -> "Vector3":
+        return Vector3(
+            self.y * other.z - self.z * other.y,
+            self.z * other.x - self.x * other.z,
+            self.x * other.y - self.y * other.x
+        )
+
+    def length(self) -> float:
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normalized(self) -> "Vector3":
+        """ Unit vector in the same direction, the zero vector stays zero """
+        mag = self.length()
+        if mag == 0.0:
+            return Vector3(0, 0, 0)
+        inv_mag = 1.0 / mag
+        return Vector3(self.x * inv_mag, self.y * inv_mag, self.z * inv_mag)
+
 @dataclass(frozen=True, slots=True)
-class Vector2(_VecBase):
+class Vector2(_Vec2Base):
     """ Represents vectorial 2D data """
     x: float
     y: float
 
 @dataclass(frozen=True, slots=True)
-class Coordinate3(_VecBase):
+class Coordinate3(_Vec3Base):
     """ Represents scalar 3D data """
     x: float
     y: float
     z: float
 
 @dataclass(frozen=True, slots=True)
-class Coordinate2(_VecBase):
+class Coordinate2(_Vec2Base):
     """ Represents scalar 2D data """
     x: float
     y: float
 
+class Vec3Array:
+    """
+    Batch of 3D vectors backed by a float64 array of shape (..., 3)
+
+    Supports the arithmetic of Vector3 elementwise: + and - with another Vec3Array, a
+    Vector3 / Coordinate3 or an array that broadcasts, * and / with scalars or arrays of
+    shape (...,) (one factor per vector). Indexing with an int returns a Vector3,
+    anything else a Vec3Array view.
+
+    Attributes:
+        data
+    """
+    __slots__ = ("data",)
+    __array_ufunc__ = None # ndarray <op> Vec3Array uses the reflected methods below instead of broadcasting over the object
+
+    def __init__(self, data: "np.ndarray | Sequence[Sequence[float]]") -> None:
+        self.data = np.asarray(data, dtype=np.float64)
+        if self.data.shape[-1:] != (3,):
+            raise ValueError(f"Vec3Array needs shape (..., 3), got {self.data.shape}")
+
+    @classmethod
+    def zeros(cls, count: int) -> "Vec3Array":
+        return cls(np.zeros((count, 3)))
+
+    @classmethod
+    def from_vectors(cls, vectors: "Iterable[Vector3 | Coordinate3]") -> "Vec3Array":
+        return cls([(v.x, v.y, v.z) for v in vectors])
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data[..., 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data[..., 1]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self.data[..., 2]
+
+    def dot(self, other: "Vec3Array | Vector3 | np.ndarray") -> np.ndarray:
+        """ Dot products (...,) """
+        other = _operand(other)
+        return np.einsum("...i,...i->...", self.data, other) if other.ndim > 1 else self.data @ other
+
+    def cross(self, other: "Vec3Array | Vector3 | np.ndarray") -> "Vec3Array":
+        return Vec3Array(np.cross(self.data, _operand(other)))
+
+    def lengths(self) -> np.ndarray:
+        return np.sqrt(np.einsum("...i,...i->...", self.data, self.data))
+
+    def normalized(self) -> "Vec3Array":
+        """ Unit vectors, zero vectors stay zero """
+        lengths = self.lengths()[..., np.newaxis]
+        return Vec3Array(np.divide(self.data, lengths, out=np.zeros_like(self.data), where=lengths > 0))
+
+    def sum(self) -> Vector3:
+        x, y, z = self.data.reshape(-1, 3).sum(axis=0).tolist()
+        return Vector3(x, y, z)
+
+    def mean(self) -> Vector3:
+        x, y, z = self.data.reshape(-1, 3).mean(axis=0).tolist()
+        return Vector3(x, y, z)
+
+    def to_vectors(self) -> list[Vector3]:
+        return [Vector3(x, y, z) for x, y, z in self.data.reshape(-1, 3).tolist()]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[Vector3]:
+        return iter(self.to_vectors())
+
+    def __getitem__(self, index) -> "Vector3 | Vec3Array":
+        if isinstance(index, (int, np.integer)) and self.data.ndim == 2:
+            x, y, z = self.data[index].tolist()
+            return Vector3(x, y, z)
+        return Vec3Array(self.data[index])
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __add__(self, other: "Vec3Array | Vector3 | Coordinate3 | np.ndarray") -> "Vec3Array":
+        return Vec3Array(self.data + _operand(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other: "Vec3Array | Vector3 | Coordinate3 | np.ndarray") -> "Vec3Array":
+        return Vec3Array(self.data - _operand(other))
+
+    def __rsub__(self, other: "Vector3 | Coordinate3 | np.ndarray") -> "Vec3Array":
+        return Vec3Array(_operand(other) - self.data)
+
+    def __mul__(self, factor: "float | np.ndarray") -> "Vec3Array":
+        return Vec3Array(self.data * _factor(factor))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor: "float | np.ndarray") -> "Vec3Array":
+        return Vec3Array(self.data / _factor(divisor))
+
+    def __neg__(self) -> "Vec3Array":
+        return Vec3Array(-self.data)
+
+    def __repr__(self) -> str:
+        return f"Vec3Array({self.data!r})"
+
+def _operand(other: "Vec3Array | _Vec3Base | np.ndarray | Sequence[float]") -> np.ndarray:
+    """ array of a vector operand for Vec3Array arithmetic """
+    if isinstance(other, Vec3Array):
+        return other.data
+    if isinstance(other, _Vec3Base):
+        return np.array((other.x, other.y, other.z))
+    return np.asarray(other, dtype=np.float64)
+
+def _factor(factor: "float | np.ndarray") -> "float | np.ndarray":
+    """ scalars scale all vectors, arrays of shape (...,) one factor per vector """
+    if isinstance(factor, (int, float)):
+        return factor
+    return np.asarray(factor, dtype=np.float64)[..., np.newaxis]
+
 @dataclass(frozen=True, slots=True)
 class Color:
     """ Represents RGBA color """
@@ -1,25 +1,51 @@
+import numpy as np
 from engine_types import Coordinate3, Vector3, MeshType, Face3, Edge3
 from physics import PhysicsEngine
-from transform import Transform
-from mesh import Mesh
+from transform import Transform, world_aabbs
+from mesh import get_mesh
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scene import Scene
 
 class GameObject:
-    def __init__(self, name: str, type: MeshType, position: Vector3, rotation: Vector3, scale: Vector3):
+    def __init__(self, name: str, type: MeshType | str, position: Vector3, rotation: Vector3, scale: Vector3, scene: "Scene | None" = None):
         """
         Instantiates 3D Cube object
 
+        If a scene is given, the object's Transform is stored in the scene's
+        arrays and the object becomes a handle addressed by its id.
+        type is a MeshType or the name of a registered mesh (eg. one loaded by obj_loader.load_obj).
+
         Attributes:
             name
             transform
             type
             mesh
-            physics_engine
+            scene
+            id
         """
         self.name = name
-        self.transform = Transform(position, rotation, scale)
+        self.transform = Transform(position, rotation, scale, store=scene.transforms if scene is not None else None)
         self.type = type
-        self.mesh = Mesh(type)
+        self.mesh = get_mesh(type) # shared between all objects of this type
+        self.scene = scene
+        self.id = self.transform.index # row of this object in the scene arrays
+        if scene is not None:
+            scene.add(self)
     
+    @classmethod
+    def attach(cls, name: str, type: MeshType | str, transform: Transform, scene: "Scene") -> "GameObject":
+        """ Handle for a Transform slot the scene allocated already, without registering it (see Scene.spawn_many) """
+        game_object = cls.__new__(cls)
+        game_object.name = name
+        game_object.transform = transform
+        game_object.type = type
+        game_object.mesh = get_mesh(type)
+        game_object.scene = scene
+        game_object.id = transform.index
+        return game_object
+
     ##################################################################################
     ################################ public interface ################################
     ##################################################################################
@@ -43,13 +69,22 @@ class GameObject:
             transformed_vertices.append(self.transform_vertex(v))
         return tuple(transformed_vertices)
 
+    def transform_vertices(self) -> np.ndarray:
+        """ Compute and return all world-coordinates of a GameObject as (N, 3) array """
+        if self.scene is not None:
+            return self.scene.world_vertices(self.mesh, [self.id])[0] # cached until the transform changes
+        return self.transform.apply_to_vertices(self.mesh.vertex_array)
+
     def transform_game_object(self) -> list[Coordinate3]:
         """ Compute and return all world-coordinates of a GameObject """
-        transformed_vertices = []
-        for v in self.mesh.vertices:
-            # Loop over all vertices and perform transform
-            transformed_vertices.append(self.transform_vertex(v))
-        return transformed_vertices
+        return [Coordinate3(x, y, z) for x, y, z in self.transform_vertices().tolist()]
+
+    def world_aabb(self) -> tuple[np.ndarray, np.ndarray]:
+        """ Return world-space axis aligned bounding box (min, max) of GameObject """
+        if self.scene is not None:
+            return self.scene.world_aabb(self.id) # cached until the transform changes
+        box_min, box_max = world_aabbs(self.mesh.bounds_min, self.mesh.bounds_max, self.transform.model_matrix()[np.newaxis])
+        return box_min[0], box_max[0]
 
     def move_right(self, distance: float) -> None:
         """ Translate GameObject's transform on positive x axis """
@@ -2,16 +2,122 @@
 Detects and processes user-input over keyboard and terminal
 """
 
+import json
+from typing import Callable, Iterable, Sequence
 import pygame
 
+class PressedKeys(frozenset):
+    """ Set of held key codes, indexable like pygame.key.get_pressed() """
+    def __getitem__(self, key: int) -> bool:
+        return key in self
+
 class InputHandler:
-    def __init__(self):
-        raise NotImplementedError
+    """
+    Polls pygame events once per frame and runs the actions bound to held keys
+
+    poll() only reads the keyboard, dispatch_keys() runs the bound actions and is
+    meant to be called once per simulation step, so movement does not depend on
+    the frame rate.
+
+    The bound keys held in every poll can be recorded, and a recording can be replayed
+    instead of reading the keyboard (also without a window), which makes input driven
+    runs reproducible.
+
+    Attributes:
+        bindings
+        key_state
+        quit_requested
+        recording
+    """
+    def __init__(self) -> None:
+        self.bindings: dict[int, list[Callable[[], None]]] = {} # pygame key code -> actions
+        self.key_state: Sequence[bool] = ()
+        self.quit_requested = False
+        self.recording: list[list[int]] | None = None # held bound keys per poll while recording
+        self._replay: list[list[int]] | None = None
+        self._replay_frame = 0
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    def bind(self, key: int, action: Callable[[], None]) -> None:
+        """ Run action on every dispatch while key is held """
+        self.bindings.setdefault(key, []).append(action)
+
+    def unbind(self, key: int) -> None:
+        """ Remove all actions of key """
+        self.bindings.pop(key, None)
+
+    def poll(self) -> bool:
+        """ Process pending window events and read the keyboard (or the replay). Returns False once the window was closed """
+        if self._replay is not None:
+            self._poll_replay()
+        elif pygame.display.get_init() and pygame.display.get_surface() is not None:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.quit_requested = True
+            self.key_state = self.get_key_state()
+        # without a window key_state is left as it is
+
+        if self.recording is not None:
+            self.recording.append(self.pressed_keys())
+        return not self.quit_requested
 
-    def get_key_state() -> list:
+    def get_key_state(self) -> Sequence[bool]:
         return pygame.key.get_pressed()
-    
-    def disptach_keys() -> None:
-        pass
 
+    def is_pressed(self, key: int) -> bool:
+        return bool(self.key_state) and bool(self.key_state[key])
+
+    def pressed_keys(self) -> list[int]:
+        """ Bound keys that are held right now """
+        return sorted(key for key in self.bindings if self.is_pressed(key))
+
+    def dispatch_keys(self) -> None:
+        """ Run the actions of all held keys """
+        if not self.key_state:
+            return
+        for key, actions in self.bindings.items():
+            if self.key_state[key]:
+                for action in actions:
+                    action()
+
+    def start_recording(self) -> None:
+        self.recording = []
+
+    def stop_recording(self) -> list[list[int]]:
+        """ End recording and return the held keys of every poll """
+        recording, self.recording = self.recording or [], None
+        return recording
+
+    def replay(self, frames: Iterable[Iterable[int]]) -> None:
+        """ Take the held keys of the next polls from frames instead of the keyboard, no keys are held afterwards """
+        self._replay = [sorted(keys) for keys in frames]
+        self._replay_frame = 0
+
+    @property
+    def replaying(self) -> bool:
+        return self._replay is not None
+
+    @staticmethod
+    def save_recording(path: str, frames: list[list[int]]) -> None:
+        with open(path, "w") as file:
+            json.dump({"frames": frames}, file)
+
+    @staticmethod
+    def load_recording(path: str) -> list[list[int]]:
+        with open(path) as file:
+            return json.load(file)["frames"]
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
 
+    def _poll_replay(self) -> None:
+        if self._replay_frame < len(self._replay):
+            self.key_state = PressedKeys(self._replay[self._replay_frame])
+            self._replay_frame += 1
+        else:
+            self.key_state = PressedKeys()
+            self._replay = None
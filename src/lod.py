@@ -0,0 +1,92 @@
+"""
+Level-of-detail selection: picks one of a mesh's simplified versions per object and frame
+"""
+
+import math
+from typing import Iterator
+import numpy as np
+from mesh import Mesh
+from camera import Camera
+
+class LodSelector:
+    """
+    Chooses a level per object from its projected size or its distance to the camera
+
+    mode "screen": thresholds are projected bounding radii as share of half the screen
+    height, an object uses level k once it got smaller than thresholds[k - 1].
+    mode "distance": thresholds are distances, level k is used beyond thresholds[k - 1].
+
+    The last level of every object is kept. An object only switches once it passed a
+    threshold by the share hysteresis (in either direction), so objects sitting on a
+    threshold do not pop between two levels every frame. Level 0 is the full mesh,
+    level k is mesh.lods[k - 1]; meshes without lods always use level 0.
+
+    Attributes:
+        thresholds
+        mode
+        hysteresis
+        levels
+    """
+    def __init__(self, thresholds: tuple[float, ...] = (0.3, 0.12, 0.05), mode: str = "screen", hysteresis: float = 0.2) -> None:
+        if mode not in ("screen", "distance"):
+            raise ValueError(f"unknown lod mode '{mode}'")
+        self.thresholds = thresholds
+        self.mode = mode
+        self.hysteresis = hysteresis
+        self.levels = np.full(0, -1, dtype=np.int64) # last level per object id, -1 before the first selection
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    def select(self, mesh: Mesh, ids: np.ndarray, model_matrices: np.ndarray, camera: Camera) -> np.ndarray:
+        """ Return the level (I,) of objects ids, which all use mesh and are drawn with model_matrices (indexed by id) """
+        ids = np.asarray(ids, dtype=np.intp)
+        if not mesh.lods or not len(ids):
+            return np.zeros(len(ids), dtype=np.int64)
+        self._ensure_capacity(int(ids.max()) + 1)
+
+        # compare detail values against limits, both grow with the detail an object needs
+        detail = self._detail(mesh, model_matrices[ids], camera)
+        limits = np.asarray(self.thresholds, dtype=np.float64)
+        if self.mode == "distance":
+            limits = 1.0 / limits
+        coarse = (detail[:, np.newaxis] < limits * (1 - self.hysteresis)).sum(axis=1) # surely at least this coarse
+        fine = (detail[:, np.newaxis] < limits * (1 + self.hysteresis)).sum(axis=1) # at most this coarse
+        exact = (detail[:, np.newaxis] < limits).sum(axis=1)
+
+        previous = self.levels[ids]
+        levels = np.where(previous < 0, exact, np.clip(previous, coarse, fine))
+        levels = np.minimum(levels, len(mesh.lods))
+        self.levels[ids] = levels
+        return levels
+
+    def split(self, mesh: Mesh, ids: np.ndarray, model_matrices: np.ndarray, camera: Camera) -> Iterator[tuple[Mesh, np.ndarray]]:
+        """ Yield (level mesh, ids) for every level used by objects ids """
+        levels = self.select(mesh, ids, model_matrices, camera)
+        for level in np.unique(levels).tolist():
+            yield (mesh if level == 0 else mesh.lods[level - 1]), ids[levels == level]
+
+    def reset(self) -> None:
+        """ Forget the last levels, e.g. after the camera jumped """
+        self.levels[:] = -1
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    def _detail(self, mesh: Mesh, matrices: np.ndarray, camera: Camera) -> np.ndarray:
+        """ projected radius (screen) or inverse distance (distance) per object, inf if the camera is inside the bounds """
+        view_matrix = camera.view_matrix()
+        view = matrices[:, :3, 3] @ view_matrix[:3, :3].T + view_matrix[:3, 3] # object origins in view space
+        radii = mesh.bounding_radius * np.linalg.norm(matrices[:, :3, :3], axis=1).max(axis=1) # largest axis scale
+        if self.mode == "distance":
+            distance = np.linalg.norm(view, axis=1)
+            return np.divide(1.0, distance, out=np.full(len(distance), np.inf), where=distance > radii)
+        depth = view[:, 2] # clip w, the projection divides by it
+        half_height = depth * math.tan(math.radians(camera.fov) / 2)
+        return np.divide(radii, half_height, out=np.full(len(depth), np.inf), where=depth > radii)
+
+    def _ensure_capacity(self, count: int) -> None:
+        if count > len(self.levels):
+            self.levels = np.concatenate((self.levels, np.full(count - len(self.levels), -1, dtype=np.int64)))
@@ -1,3 +1,5 @@
+from functools import cached_property
+import numpy as np
 from engine_types import MeshType, Coordinate3
 
 """
@@ -81,18 +83,244 @@ mesh_table = {
     }
 }
 
+MAX_COLLIDER_EDGES = 64 # edge directions above which a mesh collides as its bounding box, SAT tests Ea * Eb edge axes per pair
+
+def edges_from_faces(face_array: np.ndarray, face_sizes: np.ndarray) -> np.ndarray:
+    """ Return (E, 2) array of the unique undirected edges along the vertex loops of padded faces """
+    sides = np.arange(face_array.shape[1])
+    valid = sides < face_sizes[:, np.newaxis] # (F, K)
+    following = face_array[np.arange(len(face_array))[:, np.newaxis], (sides + 1) % face_sizes[:, np.newaxis]]
+    a, b = face_array[valid], following[valid]
+    pairs = np.stack((np.minimum(a, b), np.maximum(a, b)), axis=1)
+    return np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+
+def triangulate_faces(face_array: np.ndarray, face_sizes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split padded faces (F, K) into triangle fans around their first vertex
+
+    returns:
+        triangles: (T, 3) vertex indices
+        face_ids: (T,) face each triangle belongs to
+    """
+    corners = np.arange(1, face_array.shape[1] - 1) # second vertex of every fan triangle
+    valid = corners < face_sizes[:, np.newaxis] - 1 # (F, K - 2)
+    face_ids, fan = np.nonzero(valid)
+    triangles = np.stack((face_array[face_ids, 0], face_array[face_ids, corners[fan]], face_array[face_ids, corners[fan] + 1]), axis=1)
+    return triangles, face_ids
+
+def _face_edge_pairs(edge_array: np.ndarray, face_array: np.ndarray, face_sizes: np.ndarray) -> np.ndarray:
+    """
+    (face, edge) per face side that has a matching edge, face major. An edge belongs to a face if its two
+    vertices are neighbours in the face's vertex loop, sides without an edge are skipped
+    """
+    if not len(edge_array):
+        return np.zeros((0, 2), dtype=np.intp)
+    sides = np.arange(face_array.shape[1])
+    valid = sides < face_sizes[:, np.newaxis]
+    following = face_array[np.arange(len(face_array))[:, np.newaxis], (sides + 1) % face_sizes[:, np.newaxis]]
+    stride = int(max(face_array.max(initial=0), edge_array.max(initial=0))) + 1
+    # undirected vertex pair -> single sortable key
+    edge_keys = np.minimum(edge_array[:, 0], edge_array[:, 1]) * stride + np.maximum(edge_array[:, 0], edge_array[:, 1])
+    side_keys = np.minimum(face_array, following) * stride + np.maximum(face_array, following)
+    order = np.argsort(edge_keys, kind="stable")
+    sorted_keys = edge_keys[order]
+    slots = np.maximum(np.searchsorted(sorted_keys, side_keys, side="right") - 1, 0) # duplicate edges resolve to the last one
+    found = valid & (sorted_keys[slots] == side_keys)
+    faces, sides_found = np.nonzero(found)
+    return np.stack((faces, order[slots[faces, sides_found]]), axis=1).astype(np.intp)
+
+def _unique_directions(vectors: np.ndarray, decimals: int = 9) -> np.ndarray:
+    """ Return sorted indices of vectors (N, 3) that are not parallel (or anti-parallel) to an earlier one """
+    mag = np.linalg.norm(vectors, axis=1, keepdims=True)
+    directions = np.divide(vectors, mag, out=np.zeros_like(vectors), where=mag != 0.0)
+    directions = np.round(directions, decimals) + 0.0 # + 0.0 turns -0.0 into 0.0
+    # flip every direction so its first non-zero component is positive, anti-parallel ones become equal
+    first = np.argmax(directions != 0.0, axis=1)
+    directions *= np.where(directions[np.arange(len(directions)), first] < 0, -1.0, 1.0)[:, np.newaxis]
+    candidates = np.flatnonzero(mag[:, 0] != 0.0)
+    _, unique = np.unique(directions[candidates], axis=0, return_index=True)
+    return np.sort(candidates[unique]).astype(np.intp)
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """ mark array as immutable, since mesh buffers are shared between all instances """
+    array.setflags(write=False)
+    return array
+
 class Mesh:
     """
-    Stores mesh data of GameObject
+    Stores immutable, array-backed mesh data shared by all GameObjects of one mesh type
+
+    Meshes are built once per type through get_mesh() (flyweight), so all derived
+    data below is computed once and instances do not copy any buffers. Meshes can
+    also be built straight from index arrays (from_arrays), then the tuple views
+    vertices, edges, faces, face_edges and edge_faces are only built on first access.
 
     Attributes:
+        name
         vertices
+        vertex_array
         edges
+        edge_array
         faces
+        face_array
+        face_sizes
+        face_normals
+        face_edges
+        edge_faces
+        face_edge_pairs
+        bounds_min
+        bounds_max
+        bounding_radius
+        axis_faces
+        axis_edges
+        collider
+        lods
+        lod_of
     """
-    def __init__(self, mesh_type: MeshType) -> None:
-        # choose right mesh for corresponding MeshType
-        data = mesh_table[mesh_type.value]
-        self.vertices = data["vertices"]
-        self.edges = data["edges"]
-        self.faces = data["faces"]
\ No newline at end of file
+    DERIVED = ("face_normals", "bounds_min", "bounds_max", "bounding_radius", "face_edge_pairs", "axis_faces", "axis_edges")
+
+    def __init__(self, vertices: tuple[Coordinate3, ...], edges: tuple, faces: tuple, name: str) -> None:
+        vertices = tuple(vertices)
+        edges = tuple(tuple(e) for e in edges)
+        faces = tuple(tuple(f) for f in faces)
+
+        # (N, 3) float array of vertices, used for batched transforms
+        vertex_array = np.array([(v.x, v.y, v.z) for v in vertices], dtype=np.float64).reshape(-1, 3)
+        edge_array = np.array(edges, dtype=np.intp).reshape(-1, 2)
+        # faces as (F, K) index array, K = largest face. Shorter faces are padded with their
+        # first index, face_sizes holds the real vertex count per face
+        face_sizes = np.array([len(f) for f in faces], dtype=np.intp)
+        face_array = np.array([f + (f[0],) * (face_sizes.max() - len(f)) for f in faces], dtype=np.intp)
+        self._init_arrays(name, vertex_array, edge_array, face_array, face_sizes)
+        self.vertices, self.edges, self.faces = vertices, edges, faces
+
+    @classmethod
+    def from_arrays(cls, vertex_array: np.ndarray, edge_array: np.ndarray, face_array: np.ndarray, face_sizes: np.ndarray,
+                    name: str, derived: dict[str, np.ndarray] | None = None) -> "Mesh":
+        """
+        Build a mesh from (N, 3) vertices, (E, 2) edges and (F, K) padded faces with their sizes (F,).
+        derived may hold precomputed arrays for the names in Mesh.DERIVED (eg. from a mesh cache), they are used as they are
+        """
+        mesh = cls.__new__(cls)
+        mesh._init_arrays(name, vertex_array, edge_array, face_array, face_sizes, derived)
+        return mesh
+
+    @cached_property
+    def vertices(self) -> tuple[Coordinate3, ...]:
+        return tuple(Coordinate3(x, y, z) for x, y, z in self.vertex_array.tolist())
+
+    @cached_property
+    def edges(self) -> tuple[tuple[int, int], ...]:
+        return tuple(map(tuple, self.edge_array.tolist()))
+
+    @cached_property
+    def faces(self) -> tuple[tuple[int, ...], ...]:
+        return tuple(tuple(face[:size]) for face, size in zip(self.face_array.tolist(), self.face_sizes.tolist()))
+
+    @cached_property
+    def face_edges(self) -> tuple[tuple[int, ...], ...]:
+        """ tuple of edge indices per face """
+        split = np.searchsorted(self.face_edge_pairs[:, 0], np.arange(1, len(self.face_array)))
+        return tuple(tuple(edges.tolist()) for edges in np.split(self.face_edge_pairs[:, 1], split))
+
+    @cached_property
+    def edge_faces(self) -> tuple[tuple[int, ...], ...]:
+        """ tuple of face indices per edge """
+        order = np.argsort(self.face_edge_pairs[:, 1], kind="stable")
+        split = np.searchsorted(self.face_edge_pairs[order, 1], np.arange(1, len(self.edge_array)))
+        return tuple(tuple(faces.tolist()) for faces in np.split(self.face_edge_pairs[order, 0], split))
+
+    @cached_property
+    def collider(self) -> "Mesh":
+        """
+        Mesh used for collision tests: the mesh itself, or its bounding box if it has more than
+        MAX_COLLIDER_EDGES edge directions (eg. meshes loaded by obj_loader)
+        """
+        if len(self.axis_edges) <= MAX_COLLIDER_EDGES:
+            return self
+        box = get_mesh(MeshType.CUBE)
+        vertex_array = np.where(box.vertex_array < 0, self.bounds_min, self.bounds_max)
+        collider = Mesh.from_arrays(vertex_array, box.edge_array, box.face_array, box.face_sizes, f"{self.name}#collider")
+        collider.lod_of = self.name
+        return collider
+
+    def edges_of_faces(self, face_ids: np.ndarray) -> np.ndarray:
+        """ Return sorted indices of all edges that belong to at least one of the given faces """
+        selected = np.zeros(len(self.face_array), dtype=bool)
+        selected[face_ids] = True
+        return np.flatnonzero(self.edge_mask_of_faces(selected))
+
+    def edge_mask_of_faces(self, face_mask: np.ndarray) -> np.ndarray:
+        """ Map boolean face mask (..., F) to edge mask (..., E), True if any adjacent face is selected """
+        face_mask = np.asarray(face_mask, dtype=bool)
+        edge_mask = np.zeros(face_mask.shape[:-1] + (len(self.edge_array),), dtype=bool)
+        hits = face_mask[..., self.face_edge_pairs[:, 0]] # (..., P)
+        *batch, pair = np.nonzero(hits)
+        edge_mask[(*batch, self.face_edge_pairs[pair, 1])] = True
+        return edge_mask
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    def _init_arrays(self, name: str, vertex_array: np.ndarray, edge_array: np.ndarray, face_array: np.ndarray,
+                     face_sizes: np.ndarray, derived: dict[str, np.ndarray] | None = None) -> None:
+        self.name = name
+        self.vertex_array = _read_only(np.asarray(vertex_array, dtype=np.float64).reshape(-1, 3))
+        self.edge_array = _read_only(np.asarray(edge_array, dtype=np.intp).reshape(-1, 2))
+        self.face_array = _read_only(np.asarray(face_array, dtype=np.intp))
+        self.face_sizes = _read_only(np.asarray(face_sizes, dtype=np.intp))
+        self.lods: tuple[Mesh, ...] = () # simplified versions, finest first (see simplify.build_lods)
+        self.lod_of: str | None = None # name of the full mesh if this is one of its lods or its collider
+        if derived is not None:
+            for key in self.DERIVED:
+                setattr(self, key, _read_only(np.asarray(derived[key])) if key != "bounding_radius" else float(derived[key]))
+            return
+
+        # derived data, computed once per mesh
+        p0, p1, p2 = (self.vertex_array[self.face_array[:, k]] for k in range(3))
+        normals = np.cross(p1 - p0, p2 - p0)
+        mag = np.linalg.norm(normals, axis=1, keepdims=True)
+        self.face_normals = _read_only(np.divide(normals, mag, out=np.zeros_like(normals), where=mag != 0.0))
+        self.bounds_min = _read_only(self.vertex_array.min(axis=0))
+        self.bounds_max = _read_only(self.vertex_array.max(axis=0))
+        self.bounding_radius = float(np.linalg.norm(self.vertex_array, axis=1).max()) # around local origin
+        self.face_edge_pairs = _read_only(_face_edge_pairs(self.edge_array, self.face_array, self.face_sizes))
+
+        # faces and edges with distinct directions, the candidate separating axes of a convex mesh.
+        # Parallel directions stay parallel under any model matrix, so this is valid in world space
+        self.axis_faces = _read_only(_unique_directions(self.face_normals))
+        edge_vectors = self.vertex_array[self.edge_array[:, 1]] - self.vertex_array[self.edge_array[:, 0]]
+        self.axis_edges = _read_only(_unique_directions(edge_vectors))
+
+"""
+registry of all built meshes, keyed by name (MeshType.value for the built-in meshes)
+"""
+_mesh_registry: dict[str, Mesh] = {}
+
+def register_mesh(name: str, mesh: Mesh) -> Mesh:
+    """
+    Store mesh under name, so every later get_mesh(name) shares it. The name has to be the mesh's own,
+    scenes group and cache objects by Mesh.name
+    """
+    if name in _mesh_registry:
+        raise KeyError(f"mesh '{name}' is already registered")
+    if mesh.name != name:
+        raise ValueError(f"mesh '{mesh.name}' cannot be registered as '{name}'")
+    _mesh_registry[name] = mesh
+    return mesh
+
+def registered_mesh(name: str) -> Mesh | None:
+    """ Return the mesh registered under name, None if there is none """
+    return _mesh_registry.get(name)
+
+def get_mesh(key: MeshType | str) -> Mesh:
+    """ Return the shared Mesh for a MeshType or registered name, building built-in meshes on first use """
+    name = key.value if isinstance(key, MeshType) else key
+    mesh = _mesh_registry.get(name)
+    if mesh is None:
+        if name not in mesh_table:
+            raise KeyError(f"unknown mesh '{name}'")
+        data = mesh_table[name]
+        mesh = register_mesh(name, Mesh(data["vertices"], data["edges"], data["faces"], name))
+    return mesh
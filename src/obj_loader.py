@@ -0,0 +1,137 @@
+"""
+Wavefront OBJ import with a memory-mapped binary mesh cache
+
+The first load of an OBJ file parses the text, simplifies it into its lod levels and
+writes <file>.meshcache next to it, holding all Mesh arrays (vertices, edges, faces and
+the derived normals, bounds and adjacency) of the mesh and every lod. Later loads map
+that file into memory instead of parsing and simplifying, as long as size and
+modification time of the OBJ file still match the ones stored in the cache.
+
+The cache is a column file (see column_file) with one column per array, named
+"<level>/<array>", level 0 is the full mesh and 1, 2, ... its lods.
+"""
+
+import os
+import struct
+import numpy as np
+from column_file import map_columns, read_header, write_columns
+from mesh import Mesh, edges_from_faces, mesh_table, register_mesh, registered_mesh
+from simplify import build_lods
+
+MAGIC = b"GFXMESH\0"
+CACHE_VERSION = 3
+CACHE_SUFFIX = ".meshcache"
+MESH_ARRAYS = ("vertex_array", "edge_array", "face_array", "face_sizes")
+
+"""
+file every mesh registered by load_obj was loaded from, keyed by mesh name
+"""
+_sources: dict[str, str] = {}
+
+def load_obj(path: str, name: str | None = None, use_cache: bool = True, cache_path: str | None = None,
+             lod_levels: int = 3, lod_ratio: float = 0.25) -> Mesh:
+    """
+    Load an OBJ file as Mesh and register it under name (default: file name without extension).
+    Up to lod_levels simplified meshes, each with about lod_ratio times the faces of the one before,
+    are built into mesh.lods (and cached with it). If that file was loaded under that name already,
+    the registered mesh is returned without touching the file. A name taken by another file or by a
+    built-in mesh raises ValueError, pass a different name. Meshes with many edge directions collide
+    as their bounding box, see Mesh.collider
+    """
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    real_path = os.path.realpath(path)
+    mesh = registered_mesh(name)
+    if mesh is not None or name in mesh_table:
+        if _sources.get(name) != real_path:
+            loaded_from = _sources.get(name, "a built-in or generated mesh")
+            raise ValueError(f"mesh name '{name}' of {path} is taken by {loaded_from}, load it with another name")
+        return mesh
+
+    cache_path = cache_path or path + CACHE_SUFFIX
+    source = os.stat(path)
+    lod_params = (lod_levels, lod_ratio)
+    mesh = read_mesh_cache(cache_path, source, name, lod_params) if use_cache else None
+    if mesh is None:
+        vertices, face_array, face_sizes = read_obj(path)
+        mesh = Mesh.from_arrays(vertices, edges_from_faces(face_array, face_sizes), face_array, face_sizes, name)
+        build_lods(mesh, lod_levels, lod_ratio)
+        if use_cache:
+            try:
+                write_mesh_cache(cache_path, mesh, source, lod_params)
+            except OSError:
+                pass # the cache only speeds up the next load, a read-only asset folder is fine
+    register_mesh(name, mesh)
+    _sources[name] = real_path
+    return mesh
+
+def read_obj(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse vertices and faces of an OBJ file. Returns (N, 3) vertices, (F, K) faces padded with
+    their first index and the face sizes (F,). Texture coordinates, normals, groups and materials
+    are ignored, faces with less than 3 vertices are skipped
+    """
+    vertices: list[tuple[float, float, float]] = []
+    faces: list[list[int]] = []
+    with open(path) as file:
+        for line in file:
+            if line.startswith("v "):
+                values = line.split()
+                vertices.append((float(values[1]), float(values[2]), float(values[3])))
+            elif line.startswith("f "):
+                face = []
+                for token in line.split()[1:]:
+                    index = int(token.split("/", 1)[0])
+                    face.append(index - 1 if index > 0 else len(vertices) + index) # negative indices count back from the last vertex
+                if len(face) >= 3:
+                    faces.append(face)
+
+    vertex_array = np.array(vertices, dtype=np.float64).reshape(-1, 3)
+    if not faces:
+        raise ValueError(f"{path} contains no faces")
+    face_sizes = np.array([len(face) for face in faces], dtype=np.intp)
+    face_array = np.array([face + face[:1] * (face_sizes.max() - len(face)) for face in faces], dtype=np.intp)
+    if face_array.min() < 0 or face_array.max() >= len(vertex_array):
+        raise ValueError(f"{path} has face indices outside of its {len(vertex_array)} vertices")
+    return vertex_array, face_array, face_sizes
+
+def write_mesh_cache(path: str, mesh: Mesh, source: os.stat_result, lod_params: tuple = ()) -> None:
+    """
+    Write all arrays of mesh and its lods to a cache file that is valid for the source file with stat result source
+    and the lod parameters lod_params
+    """
+    levels = (mesh,) + mesh.lods
+    keys = MESH_ARRAYS + tuple(key for key in Mesh.DERIVED if key != "bounding_radius")
+    write_columns(path, MAGIC, {
+        "version": CACHE_VERSION,
+        "source_size": source.st_size,
+        "source_mtime_ns": source.st_mtime_ns,
+        "lod_params": list(lod_params),
+        "bounding_radii": [level_mesh.bounding_radius for level_mesh in levels],
+    }, {f"{level}/{key}": getattr(level_mesh, key) for level, level_mesh in enumerate(levels) for key in keys})
+
+def read_mesh_cache(path: str, source: os.stat_result, name: str, lod_params: tuple = ()) -> Mesh | None:
+    """
+    Map a cache file into a Mesh (with lods), None if it is missing, damaged, older than the source file
+    or written with other lod parameters
+    """
+    try:
+        header, data_start = read_header(path, MAGIC)
+        if (header["version"] != CACHE_VERSION or header["source_size"] != source.st_size
+                or header["source_mtime_ns"] != source.st_mtime_ns or header["lod_params"] != list(lod_params)):
+            return None
+
+        _, columns = map_columns(path, header, data_start, mode="r")
+        meshes = []
+        for level, bounding_radius in enumerate(header["bounding_radii"]):
+            prefix = f"{level}/"
+            arrays = {key[len(prefix):]: column for key, column in columns.items() if key.startswith(prefix)}
+            arrays["bounding_radius"] = bounding_radius
+            meshes.append(Mesh.from_arrays(*(arrays.pop(key) for key in MESH_ARRAYS), name if level == 0 else f"{name}#lod{level}", derived=arrays))
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None
+
+    mesh = meshes[0]
+    for lod in meshes[1:]:
+        lod.lod_of = name
+    mesh.lods = tuple(meshes[1:])
+    return mesh
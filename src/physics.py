@@ -1,15 +1,389 @@
-from engine_types import Vector3, Coordinate3, MeshType
-from mesh import Mesh
+import numpy as np
+from engine_types import Vector3, Coordinate3, MeshType, Vec3Array
+from mesh import Mesh, get_mesh
+from profiler import profiler
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scene import Scene
+    from game_object import GameObject
+
+SAT_BUDGET = 1 << 22 # axis x vertex projections per narrow phase batch, bounds its memory use
+
+BODY_STATE = ("masses", "inverse_masses", "velocities", "is_body", "is_static", "sleeping", "rest_steps") # see body_state()
+
+def _expand_ranges(start: np.ndarray, end: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ For ranges [start[k], end[k]) return flat arrays (k, position) of all their elements """
+    counts = np.maximum(end - start, 0)
+    owner = np.repeat(np.arange(len(start)), counts)
+    position = np.repeat(start, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, position
+
+def _sweep_axis(*mins: np.ndarray, maxs: tuple[np.ndarray, ...]) -> int:
+    """ axis with the largest spread of box centers """
+    centers = np.concatenate([lo + hi for lo, hi in zip(mins, maxs)])
+    return int(np.argmax(np.var(centers, axis=0)))
+
+def sweep_and_prune(mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    """
+    Broad-phase: return (P, 2) index pairs (i < j) of all overlapping AABBs given as (N, 3) min/max arrays
+
+    Boxes are sorted along the axis with the largest spread, every box is paired with the following
+    boxes whose start lies before its own end, then the remaining two axes are checked.
+    """
+    n = len(mins)
+    if n < 2:
+        return np.empty((0, 2), dtype=np.intp)
+
+    axis = _sweep_axis(mins, maxs=(maxs,))
+    order = np.argsort(mins[:, axis], kind="stable")
+    sorted_min = mins[order, axis]
+    sorted_max = maxs[order, axis]
+
+    # for sorted box k, all boxes k+1 .. end[k]-1 overlap it on the sweep axis
+    end = np.searchsorted(sorted_min, sorted_max, side="right")
+    first, second = _expand_ranges(np.arange(n) + 1, end)
+
+    a, b = order[first], order[second]
+    overlap = np.all((mins[a] <= maxs[b]) & (mins[b] <= maxs[a]), axis=1)
+    pairs = np.stack((np.minimum(a, b), np.maximum(a, b)), axis=1)[overlap]
+    return pairs
+
+def sweep_and_prune_between(mins_a: np.ndarray, maxs_a: np.ndarray, mins_b: np.ndarray, maxs_b: np.ndarray) -> np.ndarray:
+    """
+    Broad-phase between two sets: return (P, 2) pairs (index in a, index in b) of overlapping AABBs.
+    Boxes inside the same set are not tested against each other.
+    """
+    if not len(mins_a) or not len(mins_b):
+        return np.empty((0, 2), dtype=np.intp)
+
+    axis = _sweep_axis(mins_a, mins_b, maxs=(maxs_a, maxs_b))
+    order_a = np.argsort(mins_a[:, axis], kind="stable")
+    order_b = np.argsort(mins_b[:, axis], kind="stable")
+    sorted_a = mins_a[order_a, axis]
+    sorted_b = mins_b[order_b, axis]
+
+    # 1. boxes of b that start inside a box of a: a.min <= b.min <= a.max
+    owner, position = _expand_ranges(
+        np.searchsorted(sorted_b, mins_a[:, axis], side="left"), np.searchsorted(sorted_b, maxs_a[:, axis], side="right")
+    )
+    a1, b1 = owner, order_b[position]
+    # 2. boxes of a that start inside a box of b: b.min < a.min <= b.max
+    owner, position = _expand_ranges(
+        np.searchsorted(sorted_a, mins_b[:, axis], side="right"), np.searchsorted(sorted_a, maxs_b[:, axis], side="right")
+    )
+    a2, b2 = order_a[position], owner
+
+    a, b = np.concatenate((a1, a2)), np.concatenate((b1, b2))
+    overlap = np.all((mins_a[a] <= maxs_b[b]) & (mins_b[b] <= maxs_a[a]), axis=1)
+    return np.stack((a, b), axis=1)[overlap]
+
+def sat_contacts(vertices_a: np.ndarray, mesh_a: Mesh, vertices_b: np.ndarray, mesh_b: Mesh, direction: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Narrow-phase separating axis test for P pairs of convex meshes
+
+    parameters:
+        vertices_a: (P, Na, 3) world vertices of the first mesh of every pair
+        vertices_b: (P, Nb, 3) world vertices of the second mesh of every pair
+        direction: (P, 3) vector from a to b used to orient the normals, defaults to center(b) - center(a)
+
+    returns:
+        colliding: (P,) True if the pair intersects
+        depth: (P,) penetration depth along normal (negative = separation distance on best axis)
+        normal: (P, 3) unit contact normal pointing from a to b
+    """
+    def face_axes(vertices: np.ndarray, mesh: Mesh) -> np.ndarray:
+        faces = mesh.face_array[mesh.axis_faces]
+        p0, p1, p2 = (vertices[:, faces[:, k]] for k in range(3))
+        return np.cross(p1 - p0, p2 - p0) # (P, Fa, 3)
+
+    def edge_vectors(vertices: np.ndarray, mesh: Mesh) -> np.ndarray:
+        edges = mesh.edge_array[mesh.axis_edges]
+        return vertices[:, edges[:, 1]] - vertices[:, edges[:, 0]] # (P, Ea, 3)
+
+    edges_a, edges_b = edge_vectors(vertices_a, mesh_a), edge_vectors(vertices_b, mesh_b)
+    edge_axes = np.cross(edges_a[:, :, np.newaxis], edges_b[:, np.newaxis, :]).reshape(len(vertices_a), -1, 3)
+    axes = np.concatenate((face_axes(vertices_a, mesh_a), face_axes(vertices_b, mesh_b), edge_axes), axis=1)
+
+    # normalize, parallel edge pairs give (near) zero axes that cannot separate anything
+    mag = np.linalg.norm(axes, axis=2, keepdims=True)
+    valid = mag[..., 0] > 1e-9 * max(1.0, float(mag.max(initial=0.0)))
+    axes = np.divide(axes, mag, out=np.zeros_like(axes), where=valid[..., np.newaxis])
+
+    # project both meshes onto every axis: (P, A, N)
+    projection_a = np.einsum("pak,pnk->pan", axes, vertices_a)
+    projection_b = np.einsum("pak,pnk->pan", axes, vertices_b)
+    overlap = np.minimum(projection_a.max(axis=2), projection_b.max(axis=2)) - np.maximum(projection_a.min(axis=2), projection_b.min(axis=2))
+    overlap[~valid] = np.inf
+
+    best = np.argmin(overlap, axis=1)
+    rows = np.arange(len(best))
+    depth = overlap[rows, best]
+    normal = axes[rows, best]
+
+    # orient normal from a to b
+    if direction is None:
+        direction = vertices_b.mean(axis=1) - vertices_a.mean(axis=1)
+    normal[Vec3Array(normal).dot(direction) < 0] *= -1
+    return depth >= 0, depth, normal
 
 class PhysicsEngine:
-    def __init__(self):
-        self.mass = 1
-        self.velocity = Vector3(x=0, y=0, z=0)
-        self.acceleration = Vector3(x=0, y=0, z=0)
+    """
+    Collision detection and rigid-body simulation for the objects of a scene
+
+    Body state is stored as structure-of-arrays indexed by object id, so step()
+    integrates every body at once and writes the new positions straight into
+    the scene's TransformStore. Scene objects without a body take part in
+    collisions as immovable colliders.
+
+    Only active bodies are integrated and swept in the broad phase. Static
+    bodies never move, so their world vertices stay cached in the scene. Bodies that stay
+    slower than sleep_velocity for sleep_steps steps fall asleep until a
+    contact, a force or an external move of their Transform wakes them up.
+
+    Bodies of objects that were removed from the scene are dropped on the next
+    step, also if a new object reused their id in the meantime.
+
+    Attributes:
+        gravity
+        restitution
+        bounce_velocity
+        sleep_velocity
+        sleep_steps
+        masses
+        inverse_masses
+        velocities
+        forces
+        is_body
+        is_static
+        sleeping
+    """
+    def __init__(
+            self,
+            gravity: Vector3 = Vector3(x=0, y=-9.81, z=0),
+            restitution: float = 0.2,
+            bounce_velocity: float = 1.0,
+            sleep_velocity: float = 0.05,
+            sleep_steps: int = 30
+        ) -> None:
+        self.gravity = np.array((gravity.x, gravity.y, gravity.z))
+        self.restitution = restitution
+        self.bounce_velocity = bounce_velocity # slower contacts are resolved without restitution
+        self.sleep_velocity = sleep_velocity
+        self.sleep_steps = sleep_steps
+        self.masses = np.zeros(0)
+        self.inverse_masses = np.zeros(0) # 0 for immovable objects
+        self.velocities = np.zeros((0, 3))
+        self.forces = np.zeros((0, 3)) # accumulated until the next step
+        self.is_body = np.zeros(0, dtype=bool)
+        self.is_static = np.zeros(0, dtype=bool)
+        self.sleeping = np.zeros(0, dtype=bool)
+        self._rest_steps = np.zeros(0, dtype=np.int64) # consecutive steps below sleep_velocity
+        self._sleep_versions = np.zeros(0, dtype=np.int64) # transform version when the body fell asleep
+        self._generations = np.zeros(0, dtype=np.int64) # transform slot generation when the body was added
+
+    ##################################################################################
+    ################################## rigid bodies ##################################
+    ##################################################################################
+
+    def add_body(self, game_object: "GameObject", mass: float = 1.0, velocity: Vector3 = Vector3(x=0, y=0, z=0), static: bool = False) -> None:
+        """
+        Simulate game_object as rigid body. The object has to be part of the scene passed to step().
+        Static bodies are never moved, mass and velocity are ignored for them.
+        """
+        if mass <= 0 and not static:
+            raise ValueError("mass of a rigid body must be positive")
+        i = game_object.id
+        self._ensure_capacity(i + 1)
+        self.masses[i] = 0.0 if static else mass
+        self.inverse_masses[i] = 0.0 if static else 1.0 / mass
+        self.velocities[i] = (0, 0, 0) if static else (velocity.x, velocity.y, velocity.z)
+        self.forces[i] = 0.0
+        self.is_body[i] = True
+        self.is_static[i] = static
+        self._generations[i] = game_object.transform.store.generations[i]
+        self._wake(i)
+
+    def remove_body(self, game_object: "GameObject") -> None:
+        """ Stop simulating game_object, it stays in the scene as immovable collider """
+        self._clear(game_object.id)
+
+    def apply_force(self, game_object: "GameObject", force: Vector3) -> None:
+        """ Add force to the body, it acts during the next step only """
+        self.forces[game_object.id] += (force.x, force.y, force.z)
+        self._wake(game_object.id)
+
+    def apply_impulse(self, game_object: "GameObject", impulse: Vector3) -> None:
+        """ Instantly change the body's velocity by impulse / mass """
+        i = game_object.id
+        self.velocities[i] += np.array((impulse.x, impulse.y, impulse.z)) * self.inverse_masses[i]
+        self._wake(i)
+
+    def get_velocity(self, game_object: "GameObject") -> Vector3:
+        x, y, z = self.velocities[game_object.id].tolist()
+        return Vector3(x, y, z)
+
+    def get_velocities(self, ids: np.ndarray | None = None) -> Vec3Array:
+        """ Copy of the velocities of ids (default: all bodies) """
+        return Vec3Array(self.velocities[self.body_ids if ids is None else ids])
+
+    def body_state(self, count: int) -> dict[str, np.ndarray]:
+        """ Copies of the per-object body arrays (BODY_STATE) for ids < count, objects without body data are zero """
+        self._ensure_capacity(count)
+        state = {key: getattr(self, key)[:count].copy() for key in BODY_STATE if key != "rest_steps"}
+        state["rest_steps"] = self._rest_steps[:count].copy()
+        return state
+
+    def set_body_state(self, scene: "Scene", state: dict[str, np.ndarray]) -> None:
+        """ Replace the body arrays of ids < len(state["masses"]) with state (see body_state), sleeping bodies stay asleep """
+        count = len(state["masses"])
+        self._ensure_capacity(count)
+        for key in BODY_STATE:
+            target = self._rest_steps if key == "rest_steps" else getattr(self, key)
+            target[:count] = state[key]
+        self.forces[:count] = 0.0
+        self._sleep_versions[:count] = scene.transforms.versions[:count]
+        self._generations[:count] = scene.transforms.generations[:count]
+        self._drop_removed(scene) # body data stored for ids that hold no object
+
+    @property
+    def body_ids(self) -> np.ndarray:
+        return np.flatnonzero(self.is_body)
+
+    @property
+    def active_ids(self) -> np.ndarray:
+        """ ids of bodies that are neither static nor sleeping """
+        return np.flatnonzero(self.is_body & ~self.is_static & ~self.sleeping)
+
+    def step(self, scene: "Scene", dt: float) -> None:
+        """
+        Advance all active bodies by dt seconds (semi-implicit euler), then detect and resolve collisions
+        """
+        self._ensure_capacity(scene.transforms.count)
+        self._drop_removed(scene)
+        self._wake_moved(scene)
+        ids = self.active_ids
+        if not len(ids):
+            return
+
+        # semi-implicit euler: velocity first, then position with the new velocity
+        with profiler.stage("integrate"):
+            acceleration = self.gravity + self.forces[ids] * self.inverse_masses[ids, np.newaxis]
+            self.velocities[ids] += acceleration * dt
+            scene.transforms.positions[ids] += self.velocities[ids] * dt
+            scene.transforms.mark_dirty(ids)
+            self.forces[ids] = 0.0
+        profiler.count("active_bodies", len(ids))
+
+        self.resolve_collisions(scene, ids, dt)
+        self._update_sleep(scene, ids)
+
+    def resolve_collisions(self, scene: "Scene", active_ids: np.ndarray | None = None, dt: float = 0.0, slop: float = 0.001, correction: float = 0.8) -> None:
+        """
+        Push apart colliding bodies and remove their approaching velocity, all contacts at once.
+        Only contacts involving active_ids (default: all active bodies) are considered, dt is the
+        length of the step that moved them.
+        slop is the penetration that is tolerated, correction the share of the rest that is removed per call
+        """
+        self._ensure_capacity(scene.transforms.count)
+        self._drop_removed(scene)
+        with profiler.stage("broad_phase"):
+            pairs = self.find_candidate_pairs(scene, self.active_ids if active_ids is None else active_ids)
+        profiler.count("pairs_tested", len(pairs))
+        with profiler.stage("narrow_phase"):
+            pairs, depths, normals = self.narrow_phase(scene, pairs, self.velocities * dt)
+        profiler.count("contacts", len(pairs))
+
+        # a sleeping body is only woken by a partner that did not rest in the previous step,
+        # resting neighbours would otherwise keep waking each other up
+        moving = (self._rest_steps[pairs] == 0) & ~self.sleeping[pairs]
+        self._wake(pairs[self.sleeping[pairs] & moving[:, ::-1]])
+
+        a, b = pairs[:, 0], pairs[:, 1]
+        # sleeping bodies behave like static ones until they are woken
+        inverse_mass_a = self.inverse_masses[a] * ~self.sleeping[a]
+        inverse_mass_b = self.inverse_masses[b] * ~self.sleeping[b]
+        total = inverse_mass_a + inverse_mass_b
+        active = total > 0
+        a, b, normals, depths = a[active], b[active], normals[active], depths[active]
+        inverse_mass_a, inverse_mass_b, total = inverse_mass_a[active], inverse_mass_b[active], total[active]
+        if not len(a):
+            return
+
+        # positional correction, split by inverse mass. add.at sums contacts of the same body
+        push = (np.maximum(depths - slop, 0.0) * correction / total)[:, np.newaxis] * normals
+        positions = scene.transforms.positions
+        np.add.at(positions, a, -push * inverse_mass_a[:, np.newaxis])
+        np.add.at(positions, b, push * inverse_mass_b[:, np.newaxis])
+        moved = np.unique(np.concatenate((a[inverse_mass_a > 0], b[inverse_mass_b > 0])))
+        scene.transforms.mark_dirty(moved) # static and sleeping objects keep their version
+
+        # impulse along the normal for pairs that move towards each other. Slow contacts do not
+        # bounce, otherwise resting bodies keep jittering and never fall asleep
+        approach = Vec3Array(self.velocities[b] - self.velocities[a]).dot(normals)
+        restitution = np.where(approach < -self.bounce_velocity, self.restitution, 0.0)
+        impulse = (np.where(approach < 0, -(1 + restitution) * approach, 0.0) / total)[:, np.newaxis] * normals
+        np.add.at(self.velocities, a, -impulse * inverse_mass_a[:, np.newaxis])
+        np.add.at(self.velocities, b, impulse * inverse_mass_b[:, np.newaxis])
+
+    def _clear(self, ids: int | np.ndarray) -> None:
+        """ turn ids back into objects without body """
+        self.is_body[ids] = self.is_static[ids] = False
+        self.masses[ids] = self.inverse_masses[ids] = 0.0
+        self.velocities[ids] = self.forces[ids] = 0.0
+        self._wake(ids)
+
+    def _drop_removed(self, scene: "Scene") -> None:
+        """ clear bodies whose object was removed from the scene, including ids that were reused by a new object since """
+        ids = np.flatnonzero(self.is_body[:scene.transforms.count])
+        store = scene.transforms
+        self._clear(ids[~store.alive[ids] | (store.generations[ids] != self._generations[ids])])
+
+    def _wake(self, ids: int | np.ndarray) -> None:
+        self.sleeping[ids] = False
+        self._rest_steps[ids] = 0
+
+    def _wake_moved(self, scene: "Scene") -> None:
+        """ wake sleeping bodies whose Transform was changed from outside the physics engine """
+        ids = np.flatnonzero(self.sleeping)
+        self._wake(ids[scene.transforms.versions[ids] != self._sleep_versions[ids]])
+
+    def _update_sleep(self, scene: "Scene", ids: np.ndarray) -> None:
+        """ count resting steps of the integrated bodies and put long resting ones to sleep """
+        resting = Vec3Array(self.velocities[ids]).lengths() < self.sleep_velocity
+        self._rest_steps[ids] = np.where(resting, self._rest_steps[ids] + 1, 0)
+        tired = ids[self._rest_steps[ids] >= self.sleep_steps]
+        self.sleeping[tired] = True
+        self.velocities[tired] = 0.0
+        self._sleep_versions[tired] = scene.transforms.versions[tired]
+
+    def _ensure_capacity(self, count: int) -> None:
+        """ grow body arrays so that ids < count are valid """
+        extra = count - len(self.masses)
+        if extra <= 0:
+            return
+        extra = max(extra, len(self.masses)) # grow at least by factor 2
+        self.masses = np.concatenate((self.masses, np.zeros(extra)))
+        self.inverse_masses = np.concatenate((self.inverse_masses, np.zeros(extra)))
+        self.velocities = np.concatenate((self.velocities, np.zeros((extra, 3))))
+        self.forces = np.concatenate((self.forces, np.zeros((extra, 3))))
+        self.is_body = np.concatenate((self.is_body, np.zeros(extra, dtype=bool)))
+        self.is_static = np.concatenate((self.is_static, np.zeros(extra, dtype=bool)))
+        self.sleeping = np.concatenate((self.sleeping, np.zeros(extra, dtype=bool)))
+        self._rest_steps = np.concatenate((self._rest_steps, np.zeros(extra, dtype=np.int64)))
+        self._sleep_versions = np.concatenate((self._sleep_versions, np.zeros(extra, dtype=np.int64)))
+        self._generations = np.concatenate((self._generations, np.zeros(extra, dtype=np.int64)))
+
+    ##################################################################################
+    ############################## collision detection ###############################
+    ##################################################################################
 
     @staticmethod
-    def vertex_intersects_mesh(p: Coordinate3, mesh: Mesh) -> bool:
-        x_min, x_max, y_min, y_max, z_min, z_max = 0, 0, 0, 0, 0, 0
+    def mesh_bounds(mesh: list[Coordinate3]) -> tuple[float, float, float, float, float, float]:
+        """ Return (x_min, x_max, y_min, y_max, z_min, z_max) of world-space vertices """
+        # start from the first vertex, so bounds that do not contain the origin stay correct
+        first = mesh[0]
+        x_min, x_max, y_min, y_max, z_min, z_max = first.x, first.x, first.y, first.y, first.z, first.z
 
         # Get min and max values of x, y, z axis
         for v in mesh:
@@ -28,6 +402,11 @@ class PhysicsEngine:
                 z_min = v.z
             elif v.z > z_max:
                 z_max = v.z
+        return x_min, x_max, y_min, y_max, z_min, z_max
+
+    @staticmethod
+    def vertex_intersects_bounds(p: Coordinate3, bounds: tuple[float, float, float, float, float, float]) -> bool:
+        x_min, x_max, y_min, y_max, z_min, z_max = bounds
 
         # Check if point p is within min/max constrains
         x_valid = True if x_min <= p.x and p.x <= x_max else False
@@ -35,19 +414,109 @@ class PhysicsEngine:
         z_valid = True if z_min <= p.z and p.z <= z_max else False
 
         return not (x_valid and y_valid and z_valid)
-    
+
+    @staticmethod
+    def vertex_intersects_mesh(p: Coordinate3, mesh: Mesh) -> bool:
+        return PhysicsEngine.vertex_intersects_bounds(p, PhysicsEngine.mesh_bounds(mesh))
+
     def mesh_intersects_mesh(self, mesh1: list[Coordinate3], mesh2: list[Coordinate3]) -> bool:
         """ Return True if mesh1 intersects mesh2 (or vice versa)"""
+        bounds = self.mesh_bounds(mesh2) # computed once, not per vertex of mesh1
         for v in mesh1:
-            if self.vertex_intersects_mesh(v, mesh2):
+            if self.vertex_intersects_bounds(v, bounds):
                 return True
         return False
 
+    @staticmethod
+    def compute_world_aabbs(scene: "Scene") -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Return ids (N,) and world AABBs (N, 3) min/max of all live objects in the scene """
+        scene.update_bounds() # only objects with changed transforms are recomputed
+        ids = scene.ids
+        return ids, scene.aabb_mins[ids], scene.aabb_maxs[ids]
+
+    @staticmethod
+    def query_aabb(scene: "Scene", box_min: Vector3, box_max: Vector3) -> list[int]:
+        """ Return ids of all objects whose world AABB overlaps the given box """
+        scene.update_bounds()
+        return scene.bvh.query((box_min.x, box_min.y, box_min.z), (box_max.x, box_max.y, box_max.z))
+
+    @staticmethod
+    def ray_cast(scene: "Scene", origin: Coordinate3, direction: Vector3, max_distance: float = float("inf")) -> list[tuple[float, int]]:
+        """ Return (distance, id) of all objects whose world AABB is hit by the ray, nearest first """
+        scene.update_bounds()
+        return scene.bvh.ray_cast((origin.x, origin.y, origin.z), (direction.x, direction.y, direction.z), max_distance)
+
+    def find_candidate_pairs(self, scene: "Scene", active_ids: np.ndarray | None = None) -> np.ndarray:
+        """
+        Broad-phase: return (P, 2) object id pairs whose world AABBs overlap.
+        If active_ids is given, only pairs with at least one of these objects are returned.
+        """
+        ids, mins, maxs = self.compute_world_aabbs(scene)
+        if active_ids is None:
+            return ids[sweep_and_prune(mins, maxs)]
+
+        # active objects against each other, then against the cached boxes of everything else
+        active_ids = np.asarray(active_ids, dtype=np.intp)
+        others = ids[~np.isin(ids, active_ids)]
+        active_min, active_max = scene.aabb_mins[active_ids], scene.aabb_maxs[active_ids]
+        within = active_ids[sweep_and_prune(active_min, active_max)]
+        between = sweep_and_prune_between(active_min, active_max, scene.aabb_mins[others], scene.aabb_maxs[others])
+        return np.concatenate((within, np.stack((active_ids[between[:, 0]], others[between[:, 1]]), axis=1)))
+
+    def narrow_phase(self, scene: "Scene", pairs: np.ndarray, displacements: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Run the separating axis test for (P, 2) object id pairs, batched per combination of meshes.
+        Every object is tested as its mesh's collider (Mesh.collider), batches hold at most SAT_BUDGET projections.
+        displacements (indexed by object id) is the movement of this step, normals are then oriented
+        by the positions before that movement, so fast objects are not pushed through thin ones.
+
+        returns colliding pairs (C, 2), their penetration depths (C,) and contact normals (C, 3)
+        """
+        pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+        colliding = np.zeros(len(pairs), dtype=bool)
+        depths = np.zeros(len(pairs))
+        normals = np.zeros((len(pairs), 3))
+        if not len(pairs):
+            return pairs, depths, normals
+
+        scene.update_model_matrices()
+        groups = list(scene.mesh_groups().values())
+        mesh_of = np.full(scene.transforms.count, -1, dtype=np.intp) # object id -> group index
+        for k, (_, ids) in enumerate(groups):
+            mesh_of[ids] = k
+
+        combination = mesh_of[pairs[:, 0]] * len(groups) + mesh_of[pairs[:, 1]]
+        for key in np.unique(combination).tolist():
+            selected = np.flatnonzero(combination == key)
+            mesh_a, mesh_b = groups[key // len(groups)][0].collider, groups[key % len(groups)][0].collider
+            axes = len(mesh_a.axis_faces) + len(mesh_b.axis_faces) + len(mesh_a.axis_edges) * len(mesh_b.axis_edges)
+            batch = max(SAT_BUDGET // (axes * max(len(mesh_a.vertex_array), len(mesh_b.vertex_array))), 1)
+            for start in range(0, len(selected), batch):
+                chunk = selected[start:start + batch]
+                vertices_a = scene.world_vertices(mesh_a, pairs[chunk, 0])
+                vertices_b = scene.world_vertices(mesh_b, pairs[chunk, 1])
+                direction = None
+                if displacements is not None:
+                    direction = vertices_b.mean(axis=1) - vertices_a.mean(axis=1)
+                    direction -= displacements[pairs[chunk, 1]] - displacements[pairs[chunk, 0]]
+                colliding[chunk], depths[chunk], normals[chunk] = sat_contacts(vertices_a, mesh_a, vertices_b, mesh_b, direction)
+
+        return pairs[colliding], depths[colliding], normals[colliding]
+
+    def detect_collisions(self, scene: "Scene") -> list[tuple[int, int]]:
+        """ Return object id pairs that collide. Only broad-phase candidates reach the exact test """
+        with profiler.stage("broad_phase"):
+            pairs = self.find_candidate_pairs(scene)
+        profiler.count("pairs_tested", len(pairs))
+        with profiler.stage("narrow_phase"):
+            pairs, _, _ = self.narrow_phase(scene, pairs)
+        return [tuple(pair) for pair in pairs.tolist()]
+
 if __name__ == "__main__":
     phyEng = PhysicsEngine()
 
     p = Coordinate3(x=2, y=3, z=5)
-    mockMesh = Mesh(MeshType.CUBE).vertices
-    mockMesh2 = Mesh(MeshType.CUBE).vertices
+    mockMesh = get_mesh(MeshType.CUBE).vertices
+    mockMesh2 = get_mesh(MeshType.CUBE).vertices
 
     print(phyEng.mesh_intersects_mesh(mockMesh, mockMesh2))
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Frame profiler: named stage timers, per-frame counters and rolling frame time statistics
+"""
+
+import csv
+import io
+import json
+import threading
+import time
+from collections import deque
+import numpy as np
+
+class _NullStage:
+    """ context manager used while profiling is disabled, does nothing """
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    """ adds the time spent inside the with block to its profiler's current frame """
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler, self.name, self.start = profiler, name, 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        if threading.get_ident() != profiler._frame_thread:
+            with profiler._lock:
+                profiler._pending[self.name] = profiler._pending.get(self.name, 0.0) + elapsed
+            return
+        stages = profiler._stages
+        stages[self.name] = stages.get(self.name, 0.0) + elapsed
+
+class Profiler:
+    """
+    Collects stage times (seconds) and counters per frame, keeps the last `history` frames
+
+    Usage:
+        profiler.begin_frame()
+        with profiler.stage("physics"):
+            ...
+        profiler.count("pairs", len(pairs))
+        profiler.end_frame()
+
+    Stages may be nested, every stage reports its inclusive time. While disabled, stage()
+    returns a shared no-op context manager and count() returns at once.
+
+    Frames belong to the thread that calls begin_frame(). Stages and counters of other
+    threads (eg. the render worker) are collected under a lock and added to the frame
+    during which they ended.
+
+    Attributes:
+        enabled
+        frames
+    """
+    def __init__(self, enabled: bool = False, history: int = 600) -> None:
+        self.enabled = enabled
+        self.frames: deque[dict] = deque(maxlen=history) # {"frame": ms, "stages": {name: ms}, "counters": {name: value}}
+        self._stage_cache: dict[str, _Stage] = {}
+        self._stages: dict[str, float] = {}
+        self._counters: dict[str, float] = {}
+        self._frame_start: float | None = None
+        self._frame_thread = threading.get_ident() # thread calling begin_frame()
+        self._lock = threading.Lock()
+        self._pending: dict[str, float] = {} # stage times of other threads, added by end_frame()
+        self._pending_counters: dict[str, float] = {}
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    def stage(self, name: str) -> _Stage | _NullStage:
+        """ Context manager timing the enclosed block as stage name """
+        if not self.enabled:
+            return _NULL_STAGE
+        if threading.get_ident() != self._frame_thread:
+            return _Stage(self, name) # cached stages are not shared between threads, they hold their start time
+        stage = self._stage_cache.get(name)
+        if stage is None:
+            stage = self._stage_cache[name] = _Stage(self, name)
+        return stage
+
+    def count(self, name: str, value: float = 1) -> None:
+        """ Add value to counter name of the current frame """
+        if not self.enabled:
+            return
+        if threading.get_ident() != self._frame_thread:
+            with self._lock:
+                self._pending_counters[name] = self._pending_counters.get(name, 0) + value
+            return
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            return
+        self._stages, self._counters = {}, {}
+        self._frame_thread = threading.get_ident()
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        """ Store the current frame in the history """
+        if not self.enabled or self._frame_start is None:
+            return
+        frame_time = time.perf_counter() - self._frame_start
+        with self._lock:
+            for name, seconds in self._pending.items():
+                self._stages[name] = self._stages.get(name, 0.0) + seconds
+            for name, value in self._pending_counters.items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            self._pending, self._pending_counters = {}, {}
+        self.frames.append({
+            "frame": frame_time * 1000,
+            "stages": {name: seconds * 1000 for name, seconds in self._stages.items()},
+            "counters": dict(self._counters),
+        })
+        self._frame_start = None
+
+    def reset(self) -> None:
+        self.frames.clear()
+        self._stages, self._counters = {}, {}
+        with self._lock:
+            self._pending, self._pending_counters = {}, {}
+        self._frame_start = None
+
+    def stage_times(self, name: str = "frame") -> np.ndarray:
+        """ Times (ms) of stage name over the history, "frame" for whole frames. Frames without the stage count as 0 """
+        if name == "frame":
+            return np.array([frame["frame"] for frame in self.frames])
+        return np.array([frame["stages"].get(name, 0.0) for frame in self.frames])
+
+    def percentiles(self, name: str = "frame", q: tuple[float, ...] = (50, 90, 99)) -> dict[float, float]:
+        """ Rolling percentiles (ms) of stage name over the history """
+        times = self.stage_times(name)
+        if not len(times):
+            return {p: 0.0 for p in q}
+        return dict(zip(q, np.percentile(times, q).tolist()))
+
+    def summary(self) -> dict:
+        """ Statistics over the history: mean/p50/p90/p99/max ms per stage and mean/max per counter """
+        stages = ["frame"] + sorted({name for frame in self.frames for name in frame["stages"]})
+        counters = sorted({name for frame in self.frames for name in frame["counters"]})
+        result = {"frames": len(self.frames), "stages": {}, "counters": {}}
+        for name in stages:
+            times = self.stage_times(name)
+            if not len(times):
+                continue
+            p50, p90, p99 = np.percentile(times, (50, 90, 99)).tolist()
+            result["stages"][name] = {"mean": float(times.mean()), "p50": p50, "p90": p90, "p99": p99, "max": float(times.max())}
+        for name in counters:
+            values = np.array([frame["counters"].get(name, 0) for frame in self.frames], dtype=float)
+            result["counters"][name] = {"mean": float(values.mean()), "max": float(values.max())}
+        return result
+
+    def to_json(self, path: str | None = None, frames: bool = False) -> str:
+        """ Export summary (and every frame if frames is True) as JSON, written to path if given """
+        report = {"summary": self.summary()}
+        if frames:
+            report["frames"] = list(self.frames)
+        text = json.dumps(report, indent=2)
+        if path is not None:
+            with open(path, "w") as file:
+                file.write(text)
+        return text
+
+    def to_csv(self, path: str | None = None) -> str:
+        """ Export one row per frame (frame ms, stage ms, counters) as CSV, written to path if given """
+        stages = sorted({name for frame in self.frames for name in frame["stages"]})
+        counters = sorted({name for frame in self.frames for name in frame["counters"]})
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["frame", "frame_ms"] + [f"{name}_ms" for name in stages] + counters)
+        for index, frame in enumerate(self.frames):
+            writer.writerow([index, frame["frame"]] + [frame["stages"].get(name, 0.0) for name in stages]
+                            + [frame["counters"].get(name, 0) for name in counters])
+        text = buffer.getvalue()
+        if path is not None:
+            with open(path, "w", newline="") as file:
+                file.write(text)
+        return text
+
+profiler = Profiler() # shared by all engine modules, disabled until Engine(profile=True) or profiler.enabled = True
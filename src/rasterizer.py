@@ -0,0 +1,171 @@
+"""
+Headless software rasterizer: draws triangles with a depth test into NumPy color and depth buffers
+"""
+
+import numpy as np
+import pygame
+from scene import Scene
+from mesh import Mesh, triangulate_faces
+from camera import Camera
+from lod import LodSelector
+from profiler import profiler
+from renderer import cull_backfaces_clip, compute_face_normals, project_points, clip_polygons_near, visible_instances, instances_to_clip
+
+MAX_FRAGMENTS = 1 << 22 # candidate pixels tested per batch, bounds memory use
+
+class Framebuffer:
+    """
+    Color buffer (height, width, 3) uint8 and depth buffer (height, width) float32 holding
+    the view space z of the nearest fragment (inf where nothing was drawn)
+
+    Attributes:
+        width
+        height
+        color
+        depth
+    """
+    def __init__(self, width: int, height: int, background: tuple[int, int, int] = (0, 0, 0)) -> None:
+        self.width, self.height = width, height
+        self.background = np.array(background, dtype=np.uint8)
+        self.color = np.empty((height, width, 3), dtype=np.uint8)
+        self.depth = np.empty((height, width), dtype=np.float32)
+        self.clear()
+
+    def clear(self) -> None:
+        self.color[:] = self.background
+        self.depth[:] = np.inf
+
+    def to_surface(self) -> pygame.Surface:
+        """ Copy color buffer into a pygame Surface (works without a display) """
+        return pygame.surfarray.make_surface(self.color.swapaxes(0, 1))
+
+    def save_ppm(self, path: str) -> None:
+        """ Write color buffer as binary PPM image """
+        with open(path, "wb") as file:
+            file.write(f"P6 {self.width} {self.height} 255\n".encode())
+            file.write(np.ascontiguousarray(self.color).tobytes())
+
+def _edge(ax: np.ndarray, ay: np.ndarray, bx: np.ndarray, by: np.ndarray, px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """ edge function: > 0 if p lies left of a -> b """
+    return (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+
+def rasterize_triangles(framebuffer: Framebuffer, screen_points: np.ndarray, depths: np.ndarray, colors: np.ndarray) -> int:
+    """
+    Depth-tested rasterization of T triangles, returns the number of written pixels
+
+    parameters:
+        screen_points: (T, 3, 2) pixel coordinates of the corners
+        depths: (T, 3) view space z of the corners (> 0)
+        colors: (T, 3) uint8 flat color of each triangle
+    """
+    width, height = framebuffer.width, framebuffer.height
+    x, y = screen_points[..., 0], screen_points[..., 1]
+    area = _edge(x[:, 0], y[:, 0], x[:, 1], y[:, 1], x[:, 2], y[:, 2])
+
+    # pixel bounding boxes clipped to the screen, pixel centers are sampled
+    x0 = np.clip(np.floor(x.min(axis=1) - 0.5), 0, width).astype(np.int64)
+    x1 = np.clip(np.ceil(x.max(axis=1) - 0.5) + 1, 0, width).astype(np.int64)
+    y0 = np.clip(np.floor(y.min(axis=1) - 0.5), 0, height).astype(np.int64)
+    y1 = np.clip(np.ceil(y.max(axis=1) - 0.5) + 1, 0, height).astype(np.int64)
+    box_width, box_height = x1 - x0, y1 - y0
+    keep = np.flatnonzero((area != 0) & (box_width > 0) & (box_height > 0) & np.isfinite(area))
+    if not len(keep):
+        return 0
+
+    counts = box_width[keep] * box_height[keep]
+    ends = np.cumsum(counts)
+    written = 0
+    start = 0
+    while start < len(keep):
+        # take as many triangles as fit into one batch of candidate pixels (at least one)
+        offset = ends[start - 1] if start else 0
+        stop = max(int(np.searchsorted(ends, offset + MAX_FRAGMENTS, side="right")), start + 1)
+        written += _rasterize_batch(framebuffer, keep[start:stop], counts[start:stop], x0, y0, box_width, x, y, area, depths, colors)
+        start = stop
+    return written
+
+def _rasterize_batch(framebuffer: Framebuffer, tris: np.ndarray, counts: np.ndarray, x0: np.ndarray, y0: np.ndarray, box_width: np.ndarray,
+                     x: np.ndarray, y: np.ndarray, area: np.ndarray, depths: np.ndarray, colors: np.ndarray) -> int:
+    """ test every pixel of the bounding boxes of tris at once, resolve depth and write the nearest fragments """
+    tri = np.repeat(tris, counts) # triangle of every candidate pixel
+    local = np.arange(len(tri)) - np.repeat(np.cumsum(counts) - counts, counts) # index inside its box
+    px = x0[tri] + local % box_width[tri]
+    py = y0[tri] + local // box_width[tri]
+    cx, cy = px + 0.5, py + 0.5
+
+    # barycentric weights from the edge functions, sign of area handles both windings
+    tx, ty = x[tri], y[tri]
+    w0 = _edge(tx[:, 1], ty[:, 1], tx[:, 2], ty[:, 2], cx, cy) / area[tri]
+    w1 = _edge(tx[:, 2], ty[:, 2], tx[:, 0], ty[:, 0], cx, cy) / area[tri]
+    w2 = 1.0 - w0 - w1
+    inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+    if not inside.any():
+        return 0
+    tri, px, py = tri[inside], px[inside], py[inside]
+    weights = np.stack((w0[inside], w1[inside], w2[inside]), axis=1)
+
+    # 1/z is linear in screen space
+    z = 1.0 / (weights * (1.0 / depths[tri])).sum(axis=1)
+
+    # nearest fragment per pixel, then test against the depth buffer
+    pixel = py * framebuffer.width + px
+    order = np.lexsort((z, pixel))
+    pixel, z, tri = pixel[order], z[order], tri[order]
+    first = np.ones(len(pixel), dtype=bool)
+    first[1:] = pixel[1:] != pixel[:-1]
+    pixel, z, tri = pixel[first], z[first], tri[first]
+
+    depth, color = framebuffer.depth.reshape(-1), framebuffer.color.reshape(-1, 3)
+    passed = z < depth[pixel]
+    pixel = pixel[passed]
+    depth[pixel] = z[passed]
+    color[pixel] = colors[tri[passed]]
+    return len(pixel)
+
+def rasterize_instances(framebuffer: Framebuffer, mesh: Mesh, clip: np.ndarray, camera: Camera, color: tuple[int, int, int] = (255, 0, 0)) -> int:
+    """
+    Cull, clip, triangulate, project and rasterize (I, N, 4) clip space vertices of I instances sharing one mesh.
+    Faces are flat shaded by the angle between their normal and the view direction.
+    """
+    with profiler.stage("cull"):
+        visible = cull_backfaces_clip(clip, mesh.face_array) # (I, F)
+    with profiler.stage("project"):
+        instance_ids, face_ids = np.nonzero(visible)
+        polygons, sizes = clip_polygons_near(clip[instance_ids[:, np.newaxis], mesh.face_array[face_ids]], mesh.face_sizes[face_ids], camera.near)
+
+        # fan triangulation of the clipped polygons, which all share one padded layout
+        layout = np.broadcast_to(np.arange(polygons.shape[1]), polygons.shape[:2])
+        triangles, polygon_ids = triangulate_faces(layout, sizes)
+        corners = polygons[polygon_ids[:, np.newaxis], triangles] # (T, 3, 4)
+        screen_points = project_points(corners, framebuffer.width, framebuffer.height)
+    if profiler.enabled:
+        profiler.count("faces_drawn", np.count_nonzero(sizes >= 3)) # faces behind the near plane have size 0
+
+    with profiler.stage("rasterize"):
+        # shading in view space, where the camera sits at the origin
+        view = (clip @ np.linalg.inv(camera.projection_matrix()).T)[..., :3]
+        normals = compute_face_normals(view, mesh.face_array)[instance_ids[polygon_ids], face_ids[polygon_ids]] # (T, 3)
+        directions = view[instance_ids[polygon_ids, np.newaxis], mesh.face_array[face_ids[polygon_ids], :3]].mean(axis=1)
+        directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        intensity = 0.2 + 0.8 * np.abs(np.einsum("ti,ti->t", normals, directions))
+        colors = (np.array(color, dtype=float) * intensity[:, np.newaxis]).astype(np.uint8)
+        return rasterize_triangles(framebuffer, screen_points, corners[..., 3], colors)
+
+def rasterize_scene(framebuffer: Framebuffer, scene: Scene, camera: Camera | None = None, color: tuple[int, int, int] = (255, 0, 0),
+                    model_matrices: np.ndarray | None = None, lod: LodSelector | None = None) -> int:
+    """
+    Rasterize all GameObjects of a scene seen from camera (default: Camera()) into framebuffer (which is not cleared),
+    batched per shared mesh. model_matrices (indexed by object id) replaces the scene's matrices, lod selects simplified meshes.
+    Returns the number of written pixels.
+    """
+    camera = camera or Camera()
+    written = 0
+    with profiler.stage("cull"):
+        groups = list(visible_instances(scene, camera, model_matrices, lod=lod))
+    for mesh, ids in groups:
+        with profiler.stage("transform"):
+            clip = instances_to_clip(scene, mesh, ids, camera, model_matrices) # (I, N, 4)
+        profiler.count("objects_drawn", len(ids))
+        written += rasterize_instances(framebuffer, mesh, clip, camera, color)
+    profiler.count("pixels_written", written)
+    return written
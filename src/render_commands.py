@@ -0,0 +1,184 @@
+"""
+Draw command buffer: the output of the renderer's geometry stage, submitted to pygame in a separate stage
+"""
+
+import threading
+import queue
+import numpy as np
+import pygame
+from profiler import profiler
+
+def _rgb(color: str | tuple[int, int, int]) -> np.ndarray:
+    return np.array(pygame.Color(color)[:3], dtype=np.uint8)
+
+class CommandBuffer:
+    """
+    Polygons, lines and points of one frame in flat arrays
+
+    The buffer owns all its data, so it can be built on one thread and submitted on
+    another while the scene is already changing. Submission draws all polygons, then
+    all lines, then all points.
+
+    Attributes:
+        width
+        height
+        clear_color
+        polygons
+        polygon_sizes
+        polygon_colors
+        lines
+        line_colors
+        points
+        point_colors
+        point_radii
+    """
+    def __init__(self, width: int, height: int, clear_color: str | None = "black") -> None:
+        self.width, self.height = width, height
+        self.clear_color = clear_color # filled before drawing, None draws over the target
+        self.polygons = np.zeros((0, 3, 2)) # (V, K, 2) padded with the first vertex
+        self.polygon_sizes = np.zeros(0, dtype=np.intp)
+        self.polygon_colors = np.zeros((0, 3), dtype=np.uint8)
+        self.lines = np.zeros((0, 2, 2))
+        self.line_colors = np.zeros((0, 3), dtype=np.uint8)
+        self.points = np.zeros((0, 2))
+        self.point_colors = np.zeros((0, 3), dtype=np.uint8)
+        self.point_radii = np.zeros(0, dtype=np.intp)
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    def add_polygons(self, polygons: np.ndarray, sizes: np.ndarray, color: str | tuple[int, int, int]) -> None:
+        """ Append (V, K, 2) padded polygons with their real sizes (V,) """
+        k = max(self.polygons.shape[1], polygons.shape[1])
+        self.polygons = np.concatenate((self._pad(self.polygons, k), self._pad(polygons, k)))
+        self.polygon_sizes = np.concatenate((self.polygon_sizes, sizes))
+        self.polygon_colors = np.concatenate((self.polygon_colors, np.broadcast_to(_rgb(color), (len(polygons), 3))))
+
+    def add_lines(self, lines: np.ndarray, color: str | tuple[int, int, int]) -> None:
+        """ Append (L, 2, 2) line segments """
+        self.lines = np.concatenate((self.lines, lines))
+        self.line_colors = np.concatenate((self.line_colors, np.broadcast_to(_rgb(color), (len(lines), 3))))
+
+    def add_points(self, points: np.ndarray, color: str | tuple[int, int, int], radius: int) -> None:
+        """ Append (P, 2) points drawn as circles """
+        self.points = np.concatenate((self.points, points))
+        self.point_colors = np.concatenate((self.point_colors, np.broadcast_to(_rgb(color), (len(points), 3))))
+        self.point_radii = np.concatenate((self.point_radii, np.full(len(points), radius, dtype=np.intp)))
+
+    def submit(self, surface: pygame.Surface) -> None:
+        """ Draw all commands to surface """
+        with profiler.stage("draw"):
+            if self.clear_color is not None:
+                surface.fill(self.clear_color)
+            for polygon, size, color in zip(self.polygons.tolist(), self.polygon_sizes.tolist(), self.polygon_colors.tolist()):
+                pygame.draw.polygon(surface, color, polygon[:size])
+            for (start, end), color in zip(self.lines.tolist(), self.line_colors.tolist()):
+                pygame.draw.line(surface, color, start, end)
+            for point, color, radius in zip(self.points.tolist(), self.point_colors.tolist(), self.point_radii.tolist()):
+                pygame.draw.circle(surface, color, point, radius)
+
+    def __len__(self) -> int:
+        return len(self.polygons) + len(self.lines) + len(self.points)
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    @staticmethod
+    def _pad(polygons: np.ndarray, k: int) -> np.ndarray:
+        """ pad (V, K', 2) polygons to K vertices by repeating their first vertex """
+        if polygons.shape[1] == k:
+            return polygons
+        padding = np.repeat(polygons[:, :1], k - polygons.shape[1], axis=1)
+        return np.concatenate((polygons, padding), axis=1)
+
+class RenderThread:
+    """
+    Draws command buffers into offscreen surfaces on a worker thread
+
+    submit() hands over the next frame and returns at once unless the worker is still
+    drawing the frame before that (the queue holds one frame), so building frame N + 1
+    overlaps with drawing frame N. pygame releases the GIL only inside some of its calls,
+    so the overlap is partial. Errors of the worker are raised by the next submit() or stop().
+
+    The worker only draws into its back buffer and swaps it with the front buffer when a
+    frame is done. present() copies the front buffer to the screen and updates the display,
+    it has to run on the main thread: SDL video and event calls are not thread safe, and
+    some platforms (macOS) only allow them on the main thread.
+
+    Attributes:
+        size
+        frames_drawn
+    """
+    def __init__(self, size: tuple[int, int]) -> None:
+        self.size = size
+        self.frames_drawn = 0
+        self._front = pygame.Surface(size) # last finished frame, read by present()
+        self._back = pygame.Surface(size) # drawn by the worker
+        self._fresh = False # front buffer holds a frame that was not presented yet
+        self._swap_lock = threading.Lock()
+        self._queue: queue.Queue[CommandBuffer | None] = queue.Queue(maxsize=1)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="render", daemon=True)
+        self._thread.start()
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    def submit(self, commands: CommandBuffer) -> None:
+        """ Queue a frame, blocks while the previous one is still waiting to be drawn """
+        self._raise_error()
+        self._queue.put(commands)
+
+    def present(self, screen: pygame.Surface, flip: bool = True) -> bool:
+        """ Copy the newest finished frame to screen and update the display (main thread only), returns False if there was none """
+        self._raise_error()
+        with self._swap_lock:
+            if not self._fresh:
+                return False
+            screen.blit(self._front, (0, 0))
+            self._fresh = False
+        if flip:
+            with profiler.stage("flip"):
+                pygame.display.flip()
+        return True
+
+    def wait(self) -> None:
+        """ Block until all submitted frames were drawn """
+        self._queue.join()
+        self._raise_error()
+
+    def stop(self) -> None:
+        """ Draw the remaining frames and end the worker """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    def _run(self) -> None:
+        while True:
+            commands = self._queue.get()
+            try:
+                if commands is None:
+                    return
+                if self._error is None:
+                    commands.submit(self._back)
+                    with self._swap_lock:
+                        self._front, self._back = self._back, self._front
+                        self._fresh = True
+                    self.frames_drawn += 1
+            except Exception as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
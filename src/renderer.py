@@ -1,43 +1,38 @@
 import pygame
+import numpy as np
 from game_object import GameObject
-from engine_types import Vector3, Coordinate3, Face3
-import math
+from scene import Scene
+from mesh import Mesh
+from transform import world_aabbs
+from camera import Camera
+from lod import LodSelector
+from render_commands import CommandBuffer
+from profiler import profiler
+from engine_types import Vector3, Coordinate3, Face3, Vec3Array
 
-camera_pos = Coordinate3(0, 0, 0) # static camera for now - NOTE: will be refactored into seperate class later
+ORIGIN = Coordinate3(0, 0, 0)
 
 def normalize_vector3(v: Vector3) -> Vector3:
     """ Normalize Vector3 """
-    mag = math.sqrt((v.x**2) + (v.y**2) + (v.z**2)) # Get magnitude of vector
-
-    if mag == 0.0:
-        return Vector3(x=0, y=0, z=0) # since we cannot divide by zero
-
-    inv_mag = 1.0 / mag
-
-    return Vector3(
-        x = v.x * inv_mag,
-        y = v.y * inv_mag,
-        z = v.z * inv_mag
-    )
+    return v.normalized() # the zero vector stays zero, since we cannot divide by zero
 
 def compute_face_center(f: Face3) -> Coordinate3:
     """ Compute and return center Coordinate3 of face. Face needs at least 3 vertices """
     length = len(f)
     if length < 3:
         raise ValueError("Face needs at least 3 vertices")
-    center = Coordinate3(x=0, y=0, z=0)
-    # Sum up all vertices v in face:
+    # Sum up all vertices v in face as floats, instead of allocating a Coordinate3 per vertex:
+    x = y = z = 0.0
     for v in f:
-        center += v
-    return center * (1 / length) # finally multiply by 1 / length
+        x += v.x
+        y += v.y
+        z += v.z
+    inv_length = 1 / length
+    return Coordinate3(x * inv_length, y * inv_length, z * inv_length)
 
 def cross_vector3(a: Vector3, b: Vector3) -> Vector3:
     """ Compute cross product of Vector3's a and b """
-    return Vector3 (
-        x = a.y * b.z - a.z * b.y,
-        y = a.z * b.x - a.x * b.z,
-        z = a.x * b.y - a.y * b.x
-    )
+    return Vector3.cross(a, b)
 
 def dot_vector3(a: Vector3, b: Vector3) -> float:
     """ Compute dot product of Vector3's a and b"""
@@ -52,10 +47,10 @@ def compute_face_normal(f: Face3) -> Vector3:
     e2 = Vector3(p2.x - p0.x, p2.y - p0.y, p2.z - p0.z)
     return normalize_vector3(cross_vector3(e1, e2))
 
-def is_backface(face: Face3) -> bool:
+def is_backface(face: Face3, camera_position: Coordinate3 = ORIGIN) -> bool:
     c = compute_face_center(face)
     N = compute_face_normal(face)
-    V = Vector3(camera_pos.x - c.x, camera_pos.y - c.y, camera_pos.z - c.z)
+    V = Vector3(camera_position.x - c.x, camera_position.y - c.y, camera_position.z - c.z)
     return dot_vector3(N, V) <= 0.0
 
 
@@ -94,56 +89,295 @@ def scale(coordinate : list | tuple, SCREEN_WIDTH: int, SCREEN_HEIGHT: int) -> t
 
     return (x, y)
 
-def render_object(screen: pygame.Surface, game_object: GameObject, color: str = "red", radius: int = 1) -> None:
+##################################################################################
+############################## batched render path ###############################
+##################################################################################
+# The functions below work on arrays of vertices with shape (..., N, 3), so they
+# process all faces of one object, or of a stack of objects, in one call.
+
+def compute_face_centers(vertices: np.ndarray, face_array: np.ndarray, face_sizes: np.ndarray) -> np.ndarray:
+    """ Compute centers (..., F, 3) of all faces. face_array is padded, face_sizes holds real lengths """
+    valid = np.arange(face_array.shape[1]) < face_sizes[:, np.newaxis] # (F, K) mask of real indices
+    face_vertices = vertices[..., face_array, :] # (..., F, K, 3)
+    return (face_vertices * valid[..., np.newaxis]).sum(axis=-2) / face_sizes[:, np.newaxis]
+
+def compute_face_normals(vertices: np.ndarray, face_array: np.ndarray) -> np.ndarray:
+    """ Compute normalized normals (..., F, 3) of all faces from their first 3 vertices """
+    p0 = vertices[..., face_array[:, 0], :]
+    p1 = vertices[..., face_array[:, 1], :]
+    p2 = vertices[..., face_array[:, 2], :]
+    # degenerate faces get a zero normal, same as normalize_vector3
+    return Vec3Array(p1 - p0).cross(p2 - p0).normalized().data
+
+def cull_backfaces(vertices: np.ndarray, face_array: np.ndarray, face_sizes: np.ndarray, camera_position: Coordinate3 = ORIGIN) -> np.ndarray:
+    """ Return boolean mask (..., F) that is True for world space faces pointing towards the camera """
+    centers = Vec3Array(compute_face_centers(vertices, face_array, face_sizes))
+    normals = Vec3Array(compute_face_normals(vertices, face_array))
+    return normals.dot(camera_position - centers) > 0.0 # negation of is_backface
+
+def transform_to_clip(vertices: np.ndarray, model_view_projections: np.ndarray) -> np.ndarray:
+    """ Transform one (N, 3) vertex array by (I, 4, 4) model -> clip matrices, returns (I, N, 4) clip coordinates """
+    return np.einsum("nj,ikj->ink", vertices, model_view_projections[:, :, :3]) + model_view_projections[:, np.newaxis, :, 3]
+
+def world_to_clip(world: np.ndarray, view_projection: np.ndarray) -> np.ndarray:
+    """ Transform (..., N, 3) world vertices by the 4x4 view-projection into (..., N, 4) clip coordinates """
+    return world @ view_projection[:, :3].T + view_projection[:, 3]
+
+def cull_backfaces_clip(clip: np.ndarray, face_array: np.ndarray) -> np.ndarray:
     """
-    Render GameObject to pygame screen
+    Return boolean mask (..., F) that is True for faces pointing towards the camera, from (..., N, 4) clip coordinates.
+    The determinant of the (x, y, w) rows of the first 3 face vertices is the view space
+    dot(p0, normal) scaled by a positive factor, so its sign is the same test as cull_backfaces
+    and it is valid for vertices behind the camera too
+    """
+    xyw = clip[..., [0, 1, 3]]
+    p0, p1, p2 = xyw[..., face_array[:, 0], :], xyw[..., face_array[:, 1], :], xyw[..., face_array[:, 2], :]
+    return np.einsum("...i,...i->...", p0, np.cross(p1, p2)) < 0.0
+
+def project_points(points: np.ndarray, SCREEN_WIDTH: int, SCREEN_HEIGHT: int) -> np.ndarray:
+    """
+    Batched project + scale: map (..., N, 3) view space points or (..., N, 4) clip space points
+    to (..., N, 2) screen coordinates, dividing x and y by the last coordinate (z or w).
+    Points with z == 0 come out as inf/nan, callers have to check before drawing.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ndc = points[..., :2] / points[..., -1:] # perspective divide
+    screen_points = np.empty_like(ndc)
+    screen_points[..., 0] = (ndc[..., 0] + 1) / 2 * SCREEN_WIDTH
+    screen_points[..., 1] = (1 - ndc[..., 1]) / 2 * SCREEN_HEIGHT # y inverted for pygame
+    return screen_points
+
+def cull_aabbs(box_mins: np.ndarray, box_maxs: np.ndarray, planes: np.ndarray) -> np.ndarray:
+    """
+    Return boolean mask (I,) that is True for (I, 3) boxes that are at least partly inside the frustum planes (Camera.frustum_planes).
+    Conservative: boxes near a frustum corner may pass although they are outside
+    """
+    # corner of every box furthest along each plane normal
+    corners = np.where(planes[:, :3] >= 0, box_maxs[:, np.newaxis, :], box_mins[:, np.newaxis, :]) # (I, P, 3)
+    return (np.einsum("ipj,pj->ip", corners, planes[:, :3]) + planes[:, 3] >= 0).all(axis=1)
+
+def clip_polygons_near(polygons: np.ndarray, sizes: np.ndarray, near: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Clip (V, K, D) convex polygons (padded, sizes holds real lengths) against the plane where their
+    last coordinate (view space z, or clip space w) equals near.
+    Returns (V, K + 1, D) polygons padded with their first vertex and their new sizes,
+    polygons entirely behind the plane get size 0
+    """
+    count, k, dimensions = polygons.shape
+    index = np.arange(k)
+    valid = index < sizes[:, np.newaxis] # (V, K)
+    following = np.take_along_axis(polygons, np.where(index + 1 < sizes[:, np.newaxis], index + 1, 0)[..., np.newaxis], axis=1)
+    d0, d1 = polygons[..., -1] - near, following[..., -1] - near
+    inside = d0 >= 0
+
+    # sutherland-hodgman for one plane: every edge emits its start if inside, and the crossing point if it crosses
+    crossing = valid & (inside != (d1 >= 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(crossing, d0 / (d0 - d1), 0.0)
+    hits = polygons + t[..., np.newaxis] * (following - polygons)
+    hits[..., -1] = np.where(crossing, near, hits[..., -1])
+    points = np.stack((polygons, hits), axis=2).reshape(count, 2 * k, dimensions)
+    keep = np.stack((valid & inside, crossing), axis=2).reshape(count, 2 * k)
+
+    new_sizes = keep.sum(axis=1)
+    order = np.argsort(~keep, axis=1, kind="stable")[:, :k + 1] # kept points first, in polygon order
+    clipped = np.take_along_axis(points, order[..., np.newaxis], axis=1)
+    padding = np.arange(k + 1) >= new_sizes[:, np.newaxis]
+    clipped[padding] = np.broadcast_to(clipped[:, :1], clipped.shape)[padding]
+    return clipped, new_sizes
+
+def clip_segments_near(segments: np.ndarray, near: float) -> tuple[np.ndarray, np.ndarray]:
+    """ Clip (L, 2, D) segments against the plane where their last coordinate equals near, returns clipped segments and mask of the ones left """
+    d = segments[..., -1] - near # (L, 2)
+    inside = d >= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.clip(d[:, :1] / (d[:, :1] - d[:, 1:]), 0.0, 1.0) # (L, 1), crossing point from start
+    crossing = segments[:, 0] + t * (segments[:, 1] - segments[:, 0])
+    crossing[:, -1] = near
+    clipped = segments.copy()
+    clipped[:, 0] = np.where(inside[:, :1], segments[:, 0], crossing)
+    clipped[:, 1] = np.where(inside[:, 1:], segments[:, 1], crossing)
+    return clipped, inside.any(axis=1)
+
+def project_faces(clip: np.ndarray, screen_points: np.ndarray, face_array: np.ndarray, face_sizes: np.ndarray,
+                  instance_ids: np.ndarray, face_ids: np.ndarray, SCREEN_WIDTH: int, SCREEN_HEIGHT: int, near: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Screen polygons (V, K + 1, 2) and sizes (V,) of faces face_ids of instances instance_ids.
+    clip (I, N, 4) are the clip space vertices and screen_points (I, N, 2) their projections. Faces entirely
+    in front of the near plane reuse screen_points, faces crossing it are clipped and projected again,
+    faces behind it get size 0
+    """
+    indices = face_array[face_ids] # (V, K)
+    in_front = clip[instance_ids[:, np.newaxis], indices, 3] >= near # (V, K), padding repeats the first vertex
+    polygons = screen_points[instance_ids[:, np.newaxis], indices]
+    polygons = np.concatenate((polygons, polygons[:, :1]), axis=1)
+    sizes = np.where(in_front.any(axis=1), face_sizes[face_ids], 0)
+
+    partial = np.flatnonzero(in_front.any(axis=1) & ~in_front.all(axis=1))
+    if len(partial):
+        clipped, sizes[partial] = clip_polygons_near(clip[instance_ids[partial, np.newaxis], indices[partial]], face_sizes[face_ids[partial]], near)
+        polygons[partial] = project_points(clipped, SCREEN_WIDTH, SCREEN_HEIGHT)
+    return polygons, sizes
+
+def build_visible_polygons(vertices: np.ndarray, face_array: np.ndarray, face_sizes: np.ndarray, SCREEN_WIDTH: int, SCREEN_HEIGHT: int, camera: Camera | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Cull and project all faces of (N, 3) world vertices at once, seen from camera (default: Camera()).
+    Faces crossing the near plane are clipped, faces behind it are dropped.
+
+    returns:
+        polygons: (V, K + 1, 2) screen coordinates of the visible faces (padded with their first vertex)
+        sizes: (V,) real vertex count of each polygon
+        face_ids: (V,) index of each visible face in face_array
     """
-    screen_width, screen_height = screen.get_width(), screen.get_height()
+    camera = camera or Camera()
+    clip = transform_to_clip(vertices, camera.view_projection()[np.newaxis]) # (1, N, 4)
+    face_ids = np.flatnonzero(cull_backfaces_clip(clip[0], face_array))
+    screen_points = project_points(clip, SCREEN_WIDTH, SCREEN_HEIGHT)
+    instance_ids = np.zeros(len(face_ids), dtype=np.intp)
+    polygons, sizes = project_faces(clip, screen_points, face_array, face_sizes, instance_ids, face_ids, SCREEN_WIDTH, SCREEN_HEIGHT, camera.near)
+    drawn = sizes >= 3
+    return polygons[drawn], sizes[drawn], face_ids[drawn]
+
+def _emit_instances(commands: CommandBuffer, mesh: Mesh, clip: np.ndarray, radius: int, near: float) -> None:
+    """
+    Cull and project (I, N, 4) clip space vertices of I instances sharing one mesh, append their draw commands
+    """
+    screen_width, screen_height = commands.width, commands.height
+
+    with profiler.stage("cull"):
+        visible = cull_backfaces_clip(clip, mesh.face_array) # (I, F)
+    with profiler.stage("project"):
+        screen_points = project_points(clip, screen_width, screen_height) # every vertex is projected once
+        instance_ids, face_ids = np.nonzero(visible)
+        polygons, sizes = project_faces(clip, screen_points, mesh.face_array, mesh.face_sizes, instance_ids, face_ids, screen_width, screen_height, near)
+        drawn = sizes >= 3 # faces behind the near plane have size 0
+    if profiler.enabled:
+        profiler.count("faces_culled", visible.size - np.count_nonzero(drawn))
+        profiler.count("faces_drawn", np.count_nonzero(drawn))
 
-    coordinates = game_object.transform_game_object()
+    commands.add_polygons(polygons[drawn], sizes[drawn], "red")
 
-    for face in game_object.mesh.faces:
-        world_face = tuple(coordinates[index] for index in face)
+    # DEBUG: render lines included in visible faces, to check if backface culling is working
+    # if it works, no hidden lines should be rendered. Every edge is drawn once, from the
+    # already projected vertices
+    instance_ids, edge_ids = np.nonzero(mesh.edge_mask_of_faces(visible))
+    endpoints = mesh.edge_array[edge_ids] # (L, 2)
+    lines = screen_points[instance_ids[:, np.newaxis], endpoints] # (L, 2, 2)
+    in_front = clip[instance_ids[:, np.newaxis], endpoints, 3] >= near
+    partial = np.flatnonzero(in_front.any(axis=1) & ~in_front.all(axis=1))
+    if len(partial):
+        segments, _ = clip_segments_near(clip[instance_ids[partial, np.newaxis], endpoints[partial]], near)
+        lines[partial] = project_points(segments, screen_width, screen_height)
+    commands.add_lines(lines[in_front.any(axis=1)], "blue")
 
-        if is_backface(world_face):
+    # also draw vertices at the end
+    vertex_mask = np.zeros(clip.shape[:2], dtype=bool)
+    vertex_mask[instance_ids[:, np.newaxis], endpoints] = True
+    vertex_mask &= clip[..., 3] >= near
+    commands.add_points(screen_points[vertex_mask], "green", radius)
+
+def visible_instances(scene: Scene, camera: Camera, model_matrices: np.ndarray | None = None, mask: np.ndarray | None = None,
+                      lod: LodSelector | None = None):
+    """
+    Yield (mesh, ids) per mesh group for the objects whose world AABB touches the camera's frustum.
+    Objects outside are rejected from their bounds alone, before any per-vertex work.
+    mask (indexed by object id) restricts the result to the selected objects. Objects whose matrix in
+    model_matrices equals their scene matrix use the scene's cached bounds.
+    With lod, groups of meshes with simplified levels are split further, yielding the level mesh each object uses
+    """
+    scene.update_bounds() # cached boxes of the scene's own matrices
+    planes = camera.frustum_planes()
+    for mesh, ids in scene.mesh_groups().values():
+        if mask is not None:
+            ids = ids[mask[ids]]
+        mins, maxs = scene.aabb_mins[ids], scene.aabb_maxs[ids]
+        if model_matrices is not None:
+            moved = (model_matrices[ids] != scene.model_matrices[ids]).any(axis=(1, 2))
+            if moved.any():
+                mins, maxs = mins.copy(), maxs.copy()
+                mins[moved], maxs[moved] = world_aabbs(mesh.bounds_min, mesh.bounds_max, model_matrices[ids[moved]])
+        inside = cull_aabbs(mins, maxs, planes)
+        if profiler.enabled:
+            profiler.count("objects_culled", len(ids) - np.count_nonzero(inside))
+        ids = ids[inside]
+        if not len(ids):
+            continue
+        if lod is None or not mesh.lods:
+            yield mesh, ids
             continue
-        else:
-            projected_face = tuple(scale(project(p), screen_width, screen_height) for p in world_face)
-            pygame.draw.polygon(screen, "red", projected_face)
-
-            world_face = tuple(coordinates[index] for index in face)
-
-            # DEBUG: render lines included in that face, to check if backface culling is working
-            # if it works, no hidden lines should be rendered
-            for edge in game_object.mesh.edges:
-                idx1, idx2 = edge
-                if idx1 in face and idx2 in face:
-                    #print(f"Success! edge: {edge} in face: {face}")
-                    start_idx = edge[0]
-                    end_idx = edge[1]
-                    start = scale(project(coordinates[start_idx]), screen_width, screen_height)
-                    end = scale(project(coordinates[end_idx]), screen_width, screen_height)
-                    pygame.draw.line(screen, "blue", start, end)
-
-                    # also draw vertices at the end
-                    pygame.draw.circle(screen, "green", start, radius)
-                    pygame.draw.circle(screen, "green", end, radius)
-                    #print(f"edge: {edge} not in face: {face}")
-
-
-
-
-    # for face in obj.mesh.faces:
-    #     polygons = [scale(project(coordinates[idx]), screen_width, screen_height) for idx in face]
-    #     pygame.draw.polygon(screen, "red", polygons)
-
-    # for edge in obj.mesh.edges:
-    #     start_idx = edge[0]
-    #     end_idx = edge[1]
-    #     start = scale(project(coordinates[start_idx]), screen_width, screen_height)
-    #     end = scale(project(coordinates[end_idx]), screen_width, screen_height)
-    #     pygame.draw.line(screen, "blue", start, end)
-
-    # for coor in coordinates:
-    #     coor = scale(project(coor), screen_width, screen_height)
-    #     pygame.draw.circle(screen, "green", coor, 1)
\ No newline at end of file
+        for level_mesh, level_ids in lod.split(mesh, ids, scene.model_matrices if model_matrices is None else model_matrices, camera):
+            if profiler.enabled and level_mesh is not mesh:
+                profiler.count("objects_simplified", len(level_ids))
+            yield level_mesh, level_ids
+
+def instances_to_clip(scene: Scene, mesh: Mesh, ids: np.ndarray, camera: Camera, model_matrices: np.ndarray | None = None) -> np.ndarray:
+    """
+    Clip coordinates (I, N, 4) of objects ids sharing mesh. Objects drawn at their scene transform
+    reuse the scene's cached world vertices, objects whose matrix in model_matrices differs
+    (e.g. interpolated) are taken from model to clip space in one multiply
+    """
+    if model_matrices is None:
+        return world_to_clip(scene.world_vertices(mesh, ids), camera.view_projection())
+    moved = (model_matrices[ids] != scene.model_matrices[ids]).any(axis=(1, 2))
+    clip = np.empty((len(ids), len(mesh.vertex_array), 4))
+    clip[~moved] = world_to_clip(scene.world_vertices(mesh, ids[~moved]), camera.view_projection())
+    clip[moved] = transform_to_clip(mesh.vertex_array, camera.model_view_projections(model_matrices[ids[moved]]))
+    return clip
+
+def render_object(screen: pygame.Surface, game_object: GameObject, color: str = "red", radius: int = 1, camera: Camera | None = None) -> None:
+    """
+    Render GameObject to pygame screen
+    """
+    camera = camera or Camera()
+    clip = world_to_clip(game_object.transform_vertices()[np.newaxis], camera.view_projection())
+    commands = CommandBuffer(screen.get_width(), screen.get_height(), clear_color=None)
+    _emit_instances(commands, game_object.mesh, clip, radius, camera.near)
+    commands.submit(screen)
+
+def screen_bounds(clip: np.ndarray, SCREEN_WIDTH: int, SCREEN_HEIGHT: int, near: float, padding: int = 0) -> np.ndarray:
+    """
+    Pixel rectangles (I, 4) as (x, y, width, height) covering everything drawn from (I, N, 4) clip space instances.
+    Instances crossing the near plane get the whole screen
+    """
+    screen_points = project_points(clip, SCREEN_WIDTH, SCREEN_HEIGHT)
+    in_front = (clip[..., 3] >= near).all(axis=1)
+    low = np.floor(screen_points.min(axis=1)) - padding
+    high = np.ceil(screen_points.max(axis=1)) + padding + 1
+    low[~in_front], high[~in_front] = 0, (SCREEN_WIDTH, SCREEN_HEIGHT)
+    low = np.clip(low, 0, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    high = np.clip(high, 0, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    return np.concatenate((low, high - low), axis=1).astype(int)
+
+def build_commands(scene: Scene, SCREEN_WIDTH: int, SCREEN_HEIGHT: int, radius: int = 1, model_matrices: np.ndarray | None = None,
+                   camera: Camera | None = None, mask: np.ndarray | None = None, clear_color: str | None = None,
+                   lod: LodSelector | None = None) -> tuple[CommandBuffer, list[pygame.Rect]]:
+    """
+    Geometry stage of render_instanced: cull, transform and project the scene into a CommandBuffer without drawing.
+    Returns the buffer and one screen rectangle per emitted object, covering its pixels
+    """
+    camera = camera or Camera()
+    commands = CommandBuffer(SCREEN_WIDTH, SCREEN_HEIGHT, clear_color)
+    rects = []
+    with profiler.stage("cull"):
+        groups = list(visible_instances(scene, camera, model_matrices, mask, lod))
+    for mesh, ids in groups:
+        with profiler.stage("transform"):
+            clip = instances_to_clip(scene, mesh, ids, camera, model_matrices) # (I, N, 4)
+        profiler.count("objects_drawn", len(ids))
+        _emit_instances(commands, mesh, clip, radius, camera.near)
+        bounds = screen_bounds(clip, SCREEN_WIDTH, SCREEN_HEIGHT, camera.near, radius + 1)
+        rects.extend(pygame.Rect(bound) for bound in bounds.tolist())
+    return commands, rects
+
+def render_instanced(screen: pygame.Surface, scene: Scene, color: str = "red", radius: int = 1, model_matrices: np.ndarray | None = None,
+                     camera: Camera | None = None, mask: np.ndarray | None = None, lod: LodSelector | None = None) -> list[pygame.Rect]:
+    """
+    Render all GameObjects of a scene seen from camera (default: Camera()). Objects are grouped by their shared mesh,
+    and every group is taken to clip space, culled and projected in one batched operation.
+    model_matrices (indexed by object id) replaces the scene's matrices, e.g. for interpolated states,
+    mask (indexed by object id) selects the objects to draw, lod picks simplified meshes for small or distant objects.
+    Returns one screen rectangle per drawn object, covering its pixels
+    """
+    commands, rects = build_commands(scene, screen.get_width(), screen.get_height(), radius, model_matrices, camera, mask, lod=lod)
+    commands.submit(screen)
+    return rects
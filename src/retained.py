@@ -0,0 +1,107 @@
+"""
+Retained rendering: static objects are drawn once into a cached background, moving objects are redrawn through dirty rectangles
+"""
+
+import numpy as np
+import pygame
+from scene import Scene
+from camera import Camera
+from lod import LodSelector
+import renderer
+from profiler import profiler
+
+class RetainedRenderer:
+    """
+    Splits the scene into a static layer and dynamic objects
+
+    An object is dynamic from the frame its Transform (or its drawn matrix) changes
+    until it stayed unchanged for settle_frames frames. All other objects are drawn
+    into the background surface, which is only rebuilt if the camera, the set of
+    objects or the split changes. Other frames restore the background under the
+    previous positions of the dynamic objects, draw them again and update only
+    these rectangles of the display.
+
+    Dynamic objects are always drawn on top of the static layer.
+
+    Attributes:
+        settle_frames
+        background
+    """
+    def __init__(self, background_color: str = "black", settle_frames: int = 30) -> None:
+        self.background_color = background_color
+        self.settle_frames = settle_frames
+        self.background: pygame.Surface | None = None
+        self._camera_version = -1
+        self._mesh_groups = None # scene.mesh_groups() the background was built from
+        self._versions = np.zeros(0, dtype=np.int64) # transform versions seen in the last frame
+        self._dynamic = np.zeros(0, dtype=bool)
+        self._quiet_frames = np.zeros(0, dtype=np.int64) # frames since the last change, per object
+        self._rects: list[pygame.Rect] = [] # screen areas of the dynamic objects in the last frame
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    def invalidate(self) -> None:
+        """ Force a full redraw on the next frame """
+        self.background = None
+
+    def render(self, screen: pygame.Surface, scene: Scene, camera: Camera, model_matrices: np.ndarray | None = None,
+               color: str = "green", radius: int = 1, lod: LodSelector | None = None) -> list[pygame.Rect]:
+        """
+        Draw the frame and update the display, returns the updated rectangles (the whole screen after a rebuild)
+        """
+        scene.update_model_matrices()
+        changed = self._track_changes(scene, model_matrices)
+        newly_dynamic = changed & ~self._dynamic
+        settled = self._dynamic & (self._quiet_frames >= self.settle_frames)
+        self._dynamic = (self._dynamic | changed) & ~settled
+        groups = scene.mesh_groups()
+        dynamic = self._dynamic & scene.transforms.alive[:len(self._dynamic)]
+
+        rebuild = (self.background is None or self.background.get_size() != screen.get_size() or camera.version != self._camera_version
+                   or groups is not self._mesh_groups or newly_dynamic.any() or settled.any())
+        if rebuild:
+            self.background = pygame.Surface(screen.get_size())
+            self.background.fill(self.background_color)
+            renderer.render_instanced(self.background, scene, color, radius, model_matrices, camera, ~dynamic, lod)
+            self._camera_version, self._mesh_groups = camera.version, groups
+            screen.blit(self.background, (0, 0))
+            self._rects = renderer.render_instanced(screen, scene, color, radius, model_matrices, camera, dynamic, lod)
+            with profiler.stage("flip"):
+                pygame.display.update()
+            return [screen.get_rect()]
+
+        for rect in self._rects:
+            screen.blit(self.background, rect, rect) # erase dynamic objects at their old place
+        rects = renderer.render_instanced(screen, scene, color, radius, model_matrices, camera, dynamic, lod)
+        dirty = self._rects + rects
+        self._rects = rects
+        with profiler.stage("flip"):
+            pygame.display.update(dirty)
+        profiler.count("dirty_rects", len(dirty))
+        return dirty
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    def _track_changes(self, scene: Scene, model_matrices: np.ndarray | None) -> np.ndarray:
+        """ mask of objects that changed since the last frame, updates the quiet frame counters """
+        count = scene.transforms.count
+        extra = count - len(self._versions)
+        if extra > 0:
+            self._versions = np.concatenate((self._versions, np.full(extra, -1, dtype=np.int64)))
+            self._dynamic = np.concatenate((self._dynamic, np.zeros(extra, dtype=bool)))
+            self._quiet_frames = np.concatenate((self._quiet_frames, np.zeros(extra, dtype=np.int64)))
+
+        versions = scene.transforms.versions[:count]
+        changed = np.zeros(len(self._versions), dtype=bool)
+        changed[:count] = (versions != self._versions[:count]) & (self._versions[:count] >= 0) # new objects start static
+        if model_matrices is not None:
+            # interpolated matrices differ from the scene's while an object is still moving
+            changed[:count] |= (model_matrices[:count] != scene.model_matrices[:count]).any(axis=(1, 2))
+        self._versions[:count] = versions
+        self._quiet_frames[changed] = 0
+        self._quiet_frames[~changed] += 1
+        return changed
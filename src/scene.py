@@ -0,0 +1,228 @@
+"""
+Scene container storing all GameObjects of a world as structure-of-arrays
+"""
+
+from typing import Iterator, Sequence
+import numpy as np
+from engine_types import Vector3, MeshType
+from transform import Transform, TransformStore, world_aabbs, apply_model_matrices
+from game_object import GameObject
+from mesh import Mesh
+from bvh import DynamicBVH
+
+class Scene:
+    """
+    Owns every GameObject of a scene
+
+    Positions, rotations, scales and model matrices of all objects live in
+    contiguous arrays of one TransformStore, indexed by object id
+    (GameObject.id). GameObjects are thin handles into these arrays, so
+    whole-scene work can be written as array operations.
+
+    World AABBs are cached per object and only recomputed after the object's
+    Transform changed. All of them are kept in a dynamic BVH for spatial queries,
+    which is only brought up to date when it is accessed.
+
+    World space vertices are cached the same way, one buffer per mesh group, so
+    physics and rendering transform every object at most once per change.
+
+    Attributes:
+        transforms
+        objects
+        aabb_mins
+        aabb_maxs
+        bvh
+    """
+    def __init__(self, capacity: int = 64, bvh_margin: float = 0.1) -> None:
+        self.transforms = TransformStore(capacity)
+        self.aabb_mins = np.zeros((self.transforms.capacity, 3))
+        self.aabb_maxs = np.zeros((self.transforms.capacity, 3))
+        self._aabb_versions = np.full(self.transforms.capacity, -1, dtype=np.int64) # transform version of cached AABB
+        self._bvh = DynamicBVH(margin=bvh_margin)
+        self._bvh_stale = np.zeros(self.transforms.capacity, dtype=bool) # AABB changed since last bvh sync
+        self._objects: list[GameObject | None] = [] # indexed by object id
+        self._mesh_groups: dict[str, tuple[Mesh, np.ndarray]] | None = None # cached by mesh_groups()
+        self._group_rows = np.zeros(0, dtype=np.intp) # object id -> row inside its mesh group
+        self._vertex_cache: dict[str, tuple[np.ndarray, np.ndarray]] = {} # mesh name -> (world vertices, transform versions) per group row
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    def spawn(self, name: str, type: MeshType | str, position: Vector3, rotation: Vector3, scale: Vector3) -> GameObject:
+        """ Create a GameObject inside this scene and return its handle """
+        return GameObject(name, type, position, rotation, scale, scene=self)
+
+    def spawn_many(self, names: Sequence[str], types: Sequence[MeshType | str], positions: np.ndarray, rotations: np.ndarray,
+                   scales: np.ndarray, alive: np.ndarray | None = None) -> list[GameObject]:
+        """
+        Create GameObjects for all rows of the (M, 3) component arrays in one batch, their ids are consecutive.
+        Rows where alive is False only reserve their id (as if the object was removed). Returns the created handles
+        """
+        ids = self.transforms.allocate_many(positions, rotations, scales, alive)
+        live = np.arange(len(ids)) if alive is None else np.flatnonzero(alive)
+        created = [GameObject.attach(names[row], types[row], Transform.attach(self.transforms, index), self)
+                   for row, index in zip(live.tolist(), ids[live].tolist())]
+        self._objects.extend([None] * (self.transforms.count - len(self._objects)))
+        for game_object in created:
+            self._objects[game_object.id] = game_object
+        self._mesh_groups = None
+        self._ensure_capacity()
+        self._aabb_versions[ids] = -1
+        return created
+
+    def add(self, game_object: GameObject) -> None:
+        """ Register a GameObject whose Transform lives in this scene's store """
+        if game_object.transform.store is not self.transforms:
+            raise ValueError("GameObject was not created in this scene")
+        missing = game_object.id + 1 - len(self._objects)
+        if missing > 0:
+            self._objects.extend([None] * missing)
+        self._objects[game_object.id] = game_object
+        self._mesh_groups = None
+        self._ensure_capacity()
+        self._aabb_versions[game_object.id] = -1 # computed (and added to the bvh) on next update_bounds()
+
+    def remove(self, game_object: GameObject) -> None:
+        """ Remove GameObject from scene. Its id may be reused by the next spawned object """
+        if self._objects[game_object.id] is not game_object:
+            raise ValueError(f"GameObject {game_object.name} is not part of this scene")
+        self._objects[game_object.id] = None
+        self.transforms.release(game_object.id)
+        self._mesh_groups = None
+        self._bvh_stale[game_object.id] = False
+        if game_object.id in self._bvh:
+            self._bvh.remove(game_object.id)
+
+    def get(self, object_id: int) -> GameObject | None:
+        """ Return GameObject handle of id or None if the slot is empty """
+        if object_id < len(self._objects):
+            return self._objects[object_id]
+        return None
+
+    def update_model_matrices(self) -> np.ndarray:
+        """ Rebuild model matrices of all changed objects in one batch, return their ids """
+        return self.transforms.update_model_matrices()
+
+    def update_bounds(self) -> np.ndarray:
+        """ Recompute world AABBs of objects whose Transform changed since the last call, return their ids """
+        self.update_model_matrices()
+        count = self.transforms.count
+        versions = self.transforms.versions[:count]
+        stale = self.transforms.alive[:count] & (versions != self._aabb_versions[:count])
+        changed = np.flatnonzero(stale)
+        if not len(changed):
+            return changed
+
+        for mesh, ids in self.mesh_groups().values():
+            ids = ids[stale[ids]]
+            if len(ids):
+                self.aabb_mins[ids], self.aabb_maxs[ids] = world_aabbs(mesh.bounds_min, mesh.bounds_max, self.model_matrices[ids])
+        self._aabb_versions[changed] = versions[changed]
+        self._bvh_stale[changed] = True
+        return changed
+
+    @property
+    def bvh(self) -> DynamicBVH:
+        """ Dynamic BVH over all world AABBs, synchronized with the cached boxes on access """
+        self.update_bounds()
+        stale = np.flatnonzero(self._bvh_stale)
+        for object_id, box_min, box_max in zip(stale.tolist(), self.aabb_mins[stale].tolist(), self.aabb_maxs[stale].tolist()):
+            self._bvh.update(object_id, box_min, box_max)
+        self._bvh_stale[stale] = False
+        return self._bvh
+
+    def world_vertices(self, mesh: Mesh, ids: np.ndarray) -> np.ndarray:
+        """
+        Return world vertices (len(ids), N, 3) of objects ids, which all use mesh (or one of its lods or its collider).
+        Only objects whose Transform changed since the last call are transformed
+        """
+        ids = np.asarray(ids, dtype=np.intp)
+        groups = self.mesh_groups()
+        entry = self._vertex_cache.get(mesh.name)
+        if entry is None:
+            group_size = len(groups[mesh.lod_of or mesh.name][1]) # lods and colliders share the rows of their full mesh's group
+            entry = (np.empty((group_size, len(mesh.vertex_array), 3)), np.full(group_size, -1, dtype=np.int64))
+            self._vertex_cache[mesh.name] = entry
+        vertices, versions = entry
+
+        rows = self._group_rows[ids]
+        stale = versions[rows] != self.transforms.versions[ids]
+        if stale.any():
+            self.update_model_matrices()
+            stale_ids = np.unique(ids[stale])
+            stale_rows = self._group_rows[stale_ids]
+            vertices[stale_rows] = apply_model_matrices(mesh.vertex_array, self.model_matrices[stale_ids])
+            versions[stale_rows] = self.transforms.versions[stale_ids]
+        return vertices[rows]
+
+    def world_aabb(self, object_id: int) -> tuple[np.ndarray, np.ndarray]:
+        """ Return cached world AABB (min, max) of one object, refreshing it if its Transform changed """
+        transform = self._objects[object_id].transform
+        if transform.has_changed_since(self._aabb_versions[object_id]):
+            mesh = self._objects[object_id].mesh
+            box_min, box_max = world_aabbs(mesh.bounds_min, mesh.bounds_max, transform.model_matrix()[np.newaxis])
+            self.aabb_mins[object_id], self.aabb_maxs[object_id] = box_min[0], box_max[0]
+            self._aabb_versions[object_id] = transform.version
+            self._bvh_stale[object_id] = True
+        return self.aabb_mins[object_id], self.aabb_maxs[object_id]
+
+    def mesh_groups(self) -> dict[str, tuple[Mesh, np.ndarray]]:
+        """ Return live object ids grouped by shared mesh: {mesh name: (mesh, ids)} """
+        if self._mesh_groups is None:
+            groups: dict[str, tuple[Mesh, list[int]]] = {}
+            for obj in self:
+                groups.setdefault(obj.mesh.name, (obj.mesh, []))[1].append(obj.id)
+            self._mesh_groups = {name: (mesh, np.array(ids, dtype=np.intp)) for name, (mesh, ids) in groups.items()}
+            self._group_rows = np.zeros(self.transforms.capacity, dtype=np.intp)
+            for _, ids in self._mesh_groups.values():
+                self._group_rows[ids] = np.arange(len(ids))
+            self._vertex_cache = {} # rows changed, cached vertices are rebuilt on demand
+        return self._mesh_groups
+
+    @property
+    def objects(self) -> list[GameObject]:
+        """ All live GameObjects, ordered by id """
+        return [obj for obj in self._objects if obj is not None]
+
+    @property
+    def ids(self) -> np.ndarray:
+        """ ids of all live GameObjects """
+        return np.flatnonzero(self.transforms.alive[:self.transforms.count])
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.transforms.positions
+
+    @property
+    def rotations(self) -> np.ndarray:
+        return self.transforms.rotations
+
+    @property
+    def scales(self) -> np.ndarray:
+        return self.transforms.scales
+
+    @property
+    def model_matrices(self) -> np.ndarray:
+        return self.transforms.model_matrices
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    def _ensure_capacity(self) -> None:
+        """ keep per-object arrays as large as the transform store """
+        extra = self.transforms.capacity - len(self.aabb_mins)
+        if extra > 0:
+            self.aabb_mins = np.concatenate((self.aabb_mins, np.zeros((extra, 3))))
+            self.aabb_maxs = np.concatenate((self.aabb_maxs, np.zeros((extra, 3))))
+            self._aabb_versions = np.concatenate((self._aabb_versions, np.full(extra, -1, dtype=np.int64)))
+            self._bvh_stale = np.concatenate((self._bvh_stale, np.zeros(extra, dtype=bool)))
+
+    def __iter__(self) -> Iterator[GameObject]:
+        for obj in self._objects:
+            if obj is not None:
+                yield obj
+
+    def __len__(self) -> int:
+        return len(self._objects) - self._objects.count(None)
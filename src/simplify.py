@@ -0,0 +1,178 @@
+"""
+Mesh simplification by quadric error edge collapse, used to build level-of-detail chains
+"""
+
+import numpy as np
+from mesh import Mesh, edges_from_faces, triangulate_faces
+
+MIN_NORMAL_COS = 0.2 # a triangle may face at most ~78 degrees away from its previous normal and from the original surface
+MIN_AREA_RATIO = 0.05 # a collapse may not shrink a triangle below this share of its area
+
+def simplify(mesh: Mesh, target_faces: int, name: str) -> Mesh:
+    """
+    Return a triangle mesh with at most about target_faces faces approximating mesh
+
+    Every vertex carries the summed error quadric of the planes of its triangles
+    (Garland & Heckbert). Each pass collapses a set of cheapest edges that share no
+    vertex, all at once, moving the kept vertex to the position of least error.
+    Every vertex also carries the summed normals of the original triangles it
+    absorbed. Collapses are skipped if a triangle would turn further than
+    MIN_NORMAL_COS allows from its previous normal or from the original surface
+    around its corners (so small turns cannot add up to a flip over several
+    passes), or shrink below MIN_AREA_RATIO of its area. Stops early if no edge
+    can be collapsed anymore.
+    """
+    vertices = mesh.vertex_array.copy()
+    triangles, _ = triangulate_faces(mesh.face_array, mesh.face_sizes)
+    triangles = triangles[~_degenerate(triangles)]
+    quadrics = _vertex_quadrics(vertices, triangles)
+    orientations = _vertex_normals(vertices, triangles)
+
+    while len(triangles) > target_faces:
+        edges = edges_from_faces(triangles, np.full(len(triangles), 3, dtype=np.intp))
+        positions, costs = _collapse_targets(vertices, quadrics, edges)
+        order = np.argsort(costs, kind="stable")
+        # a collapse removes about 2 triangles, a pass takes at most a quarter of the edges to keep the cheap ones first
+        limit = max(min((len(triangles) - target_faces + 1) // 2, len(edges) // 4), 1)
+        chosen = order[_independent_edges(edges[order], limit)]
+
+        while len(chosen):
+            new_vertices, new_triangles, flipped = _collapse(vertices, triangles, orientations, edges[chosen], positions[chosen])
+            if not flipped.any():
+                break
+            chosen = chosen[~np.isin(edges[chosen, 0], flipped)]
+        if not len(chosen):
+            break
+        quadrics[edges[chosen, 0]] += quadrics[edges[chosen, 1]]
+        orientations[edges[chosen, 0]] += orientations[edges[chosen, 1]]
+        vertices, triangles = new_vertices, new_triangles
+
+    # drop vertices no triangle uses anymore
+    used, triangles = np.unique(triangles, return_inverse=True)
+    triangles = triangles.reshape(-1, 3)
+    return Mesh.from_arrays(vertices[used], edges_from_faces(triangles, np.full(len(triangles), 3, dtype=np.intp)),
+                            triangles, np.full(len(triangles), 3, dtype=np.intp), name)
+
+def build_lods(mesh: Mesh, levels: int = 3, ratio: float = 0.25, min_faces: int = 32) -> tuple[Mesh, ...]:
+    """
+    Attach up to levels simplified meshes to mesh.lods, each with about ratio times the faces of the level before.
+    Levels below min_faces faces, or that do not get simpler, are not built. Returns mesh.lods
+    """
+    lods: list[Mesh] = []
+    current = mesh
+    for level in range(1, levels + 1):
+        target = int(len(current.face_array) * ratio)
+        if target < min_faces:
+            break
+        lod = simplify(current, target, f"{mesh.name}#lod{level}")
+        if len(lod.face_array) >= len(current.face_array):
+            break
+        lod.lod_of = mesh.name
+        lods.append(lod)
+        current = lod
+    mesh.lods = tuple(lods)
+    return mesh.lods
+
+##################################################################################
+############################### internal helpers #################################
+##################################################################################
+
+def _degenerate(triangles: np.ndarray) -> np.ndarray:
+    return (triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2]) | (triangles[:, 0] == triangles[:, 2])
+
+def _triangle_normals(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """ unnormalized normals (T, 3), their length is twice the triangle area """
+    p0, p1, p2 = (vertices[triangles[:, k]] for k in range(3))
+    return np.cross(p1 - p0, p2 - p0)
+
+def _vertex_normals(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """ (N, 3) sum of the area weighted normals of the triangles around every vertex """
+    normals = _triangle_normals(vertices, triangles)
+    vertex_normals = np.zeros_like(vertices)
+    for k in range(3):
+        np.add.at(vertex_normals, triangles[:, k], normals)
+    return vertex_normals
+
+def _vertex_quadrics(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """ (N, 4, 4) sum of the area weighted plane quadrics of the triangles around every vertex """
+    normals = _triangle_normals(vertices, triangles)
+    double_areas = np.linalg.norm(normals, axis=1)
+    units = np.divide(normals, double_areas[:, np.newaxis], out=np.zeros_like(normals), where=double_areas[:, np.newaxis] > 0)
+    planes = np.concatenate((units, -np.einsum("tk,tk->t", units, vertices[triangles[:, 0]])[:, np.newaxis]), axis=1)
+    face_quadrics = 0.5 * double_areas[:, np.newaxis, np.newaxis] * planes[:, :, np.newaxis] * planes[:, np.newaxis, :]
+    quadrics = np.zeros((len(vertices), 4, 4))
+    for k in range(3):
+        np.add.at(quadrics, triangles[:, k], face_quadrics)
+    return quadrics
+
+def _collapse_targets(vertices: np.ndarray, quadrics: np.ndarray, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ position (E, 3) and error (E,) of collapsing every edge, the best of its optimal point, end points and midpoint """
+    q = quadrics[edges[:, 0]] + quadrics[edges[:, 1]]
+    a, b = vertices[edges[:, 0]], vertices[edges[:, 1]]
+    candidates = [a, b, (a + b) / 2]
+
+    # optimal point solves the gradient of v^T Q v = 0, only where the 3x3 part is well conditioned
+    solvable = np.abs(np.linalg.det(q[:, :3, :3])) > 1e-12
+    optimal = (a + b) / 2
+    if solvable.any():
+        optimal[solvable] = np.linalg.solve(q[solvable, :3, :3], -q[solvable, :3, 3:])[..., 0]
+    candidates.append(optimal)
+
+    points = np.stack(candidates, axis=1) # (E, 4, 3)
+    homogeneous = np.concatenate((points, np.ones(points.shape[:2] + (1,))), axis=2)
+    errors = np.einsum("eci,eij,ecj->ec", homogeneous, q, homogeneous)
+    best = np.argmin(errors, axis=1)
+    rows = np.arange(len(edges))
+    return points[rows, best], np.maximum(errors[rows, best], 0.0)
+
+def _independent_edges(edges: np.ndarray, limit: int) -> list[int]:
+    """ greedily pick up to limit edges in the given order that share no vertex with an earlier pick """
+    used: set[int] = set()
+    picked = []
+    for index, (a, b) in enumerate(edges.tolist()):
+        if a in used or b in used:
+            continue
+        used.update((a, b))
+        picked.append(index)
+        if len(picked) >= limit:
+            break
+    return picked
+
+def _collapse(vertices: np.ndarray, triangles: np.ndarray, orientations: np.ndarray, edges: np.ndarray,
+              positions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    merge the second vertex of every edge into the first one, placed at positions.
+    returns new vertices, remaining triangles and the kept vertices of collapses that flip or squash a triangle,
+    judged by its previous normal and by the carried surface normals (orientations) of its corners
+    """
+    keep, drop = edges[:, 0], edges[:, 1]
+    remap = np.arange(len(vertices))
+    remap[drop] = keep
+    new_vertices = vertices.copy()
+    new_vertices[keep] = positions
+    new_triangles = remap[triangles]
+    alive = ~_degenerate(new_triangles)
+
+    moved = np.zeros(len(vertices), dtype=bool)
+    moved[keep] = True
+    touched = np.flatnonzero(alive & moved[new_triangles].any(axis=1))
+    before = _triangle_normals(vertices, triangles[touched])
+    after = _triangle_normals(new_vertices, new_triangles[touched])
+    merged = orientations.copy()
+    merged[keep] += orientations[drop]
+    surface = merged[new_triangles[touched]].sum(axis=1)
+
+    after_area = np.linalg.norm(after, axis=1)
+    before_area = np.linalg.norm(before, axis=1)
+    flips = after_area < MIN_AREA_RATIO * before_area
+    for reference in (before, surface):
+        length = np.linalg.norm(reference, axis=1)
+        cos = np.einsum("tk,tk->t", reference, after) / np.maximum(length * after_area, np.finfo(float).tiny)
+        flips |= (cos < MIN_NORMAL_COS) & (length > 0) & (after_area > 0) # zero area triangles have no side to face
+    flipped = np.unique(new_triangles[touched[flips]])
+    flipped = flipped[moved[flipped]]
+
+    new_triangles = new_triangles[alive]
+    # two collapses around a thin spot can leave the same triangle twice
+    _, first = np.unique(np.sort(new_triangles, axis=1), axis=0, return_index=True)
+    return new_vertices, new_triangles[np.sort(first)], flipped
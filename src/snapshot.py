@@ -0,0 +1,167 @@
+"""
+Binary scene snapshots: all objects of a scene (and their rigid body state) as columnar arrays in one file
+
+Every column holds one value per object id, including ids of removed objects (alive is
+False for them), so ids survive a save/load round trip and physics arrays stay aligned.
+Loading maps the file into memory and copies whole columns into the scene's arrays, the
+only per-object work left is creating the GameObject handles.
+
+A snapshot is a column file (see column_file), its header holds the row count and the
+mesh names.
+"""
+
+import numpy as np
+from column_file import map_columns, read_header, write_columns
+from scene import Scene
+from physics import PhysicsEngine, BODY_STATE
+from engine_types import MeshType
+
+MAGIC = b"GFXSCENE"
+SNAPSHOT_VERSION = 1
+TRANSFORM_COLUMNS = ("positions", "rotations", "scales", "versions")
+
+class SceneSnapshot:
+    """
+    A snapshot file, written from or loaded into one scene
+
+    write() stores the whole scene, update() only rewrites the rows of objects whose
+    Transform version or body state differs from the file, in place. update() falls
+    back to a full write if objects were added or removed, changed their mesh, or if
+    the scene is not the one the snapshot belongs to. Renaming an object alone is not
+    detected, write() stores names again.
+
+    The file is mapped read-only, so snapshots of read-only files load. Full writes go to
+    a temporary file that replaces the old one, update() opens the file for writing and
+    changes it in place, so a crash during update() can leave a mix of old and new rows.
+
+    Attributes:
+        path
+        rows
+        meshes
+        columns
+        scene
+    """
+    def __init__(self, path: str) -> None:
+        """ Map an existing snapshot file """
+        self.path = path
+        try:
+            self._header, self._data_start = read_header(path, MAGIC)
+        except ValueError:
+            raise ValueError(f"{path} is not a scene snapshot") from None
+        if self._header["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} has snapshot version {self._header['version']}, expected {SNAPSHOT_VERSION}")
+        self.rows: int = self._header["rows"]
+        self.meshes: list[str] = self._header["meshes"] # mesh names, indexed by the mesh_ids column
+        self.scene: Scene | None = None
+        self._buffer, self.columns = map_columns(path, self._header, self._data_start, mode="r")
+
+    ##################################################################################
+    ################################ public interface ################################
+    ##################################################################################
+
+    @classmethod
+    def write(cls, path: str, scene: Scene, physics: PhysicsEngine | None = None) -> "SceneSnapshot":
+        """ Store every object of scene (with its body state if physics is given) and return the mapped snapshot """
+        rows = scene.transforms.count
+        meshes = sorted(scene.mesh_groups())
+        names = [""] * rows
+        for game_object in scene:
+            names[game_object.id] = game_object.name
+        encoded = [name.encode() for name in names]
+
+        columns = {
+            "alive": scene.transforms.alive[:rows],
+            "mesh_ids": _mesh_ids(scene, meshes, rows),
+            "name_offsets": np.concatenate(([0], np.cumsum([len(name) for name in encoded], dtype=np.int64))),
+            "names": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        }
+        columns.update({key: getattr(scene.transforms, key)[:rows] for key in TRANSFORM_COLUMNS})
+        if physics is not None:
+            columns.update(physics.body_state(rows))
+
+        write_columns(path, MAGIC, {"version": SNAPSHOT_VERSION, "rows": rows, "meshes": meshes}, columns)
+
+        snapshot = cls(path)
+        snapshot.scene = scene
+        return snapshot
+
+    def load(self, physics: PhysicsEngine | None = None) -> Scene:
+        """
+        Create a new scene holding all objects of the snapshot with their ids, and restore body state
+        into physics if given. Meshes loaded from files (obj_loader) have to be registered before
+        """
+        columns = self.columns
+        builtin = {mesh_type.value: mesh_type for mesh_type in MeshType}
+        types = [builtin.get(name, name) for name in self.meshes]
+        row_types = [types[mesh_id] if mesh_id >= 0 else None for mesh_id in columns["mesh_ids"].tolist()] # -1: removed object
+
+        scene = Scene(capacity=self.rows)
+        scene.spawn_many(self._names(), row_types, columns["positions"], columns["rotations"], columns["scales"], columns["alive"])
+        scene.transforms.versions[:self.rows] = columns["versions"] # keeps update() from rewriting unchanged rows
+        if physics is not None and "masses" in columns:
+            physics.set_body_state(scene, {key: columns[key] for key in BODY_STATE})
+        self.scene = scene
+        return scene
+
+    def update(self, scene: Scene, physics: PhysicsEngine | None = None) -> int:
+        """ Write the objects of scene that changed since the last write/update/load, returns the number of rewritten rows """
+        rows = scene.transforms.count
+        if (scene is not self.scene or rows != self.rows or (physics is not None) != ("masses" in self.columns)
+                or not np.array_equal(scene.transforms.alive[:rows], self.columns["alive"])
+                or not np.array_equal(_mesh_ids(scene, self.meshes, rows), self.columns["mesh_ids"])):
+            self._reopen(SceneSnapshot.write(self.path, scene, physics))
+            return rows
+
+        changed = scene.transforms.versions[:rows] != self.columns["versions"]
+        ids = np.flatnonzero(changed)
+        rewrites = [(key, ids, getattr(scene.transforms, key)[ids]) for key in TRANSFORM_COLUMNS]
+        if physics is not None:
+            state = physics.body_state(rows)
+            for key in BODY_STATE:
+                differs = (state[key] != self.columns[key]).reshape(rows, -1).any(axis=1)
+                rewrites.append((key, differs, state[key][differs]))
+                changed |= differs
+        if not changed.any():
+            return 0
+
+        # a second, writable mapping of the same file, the read-only columns see its writes
+        buffer, columns = map_columns(self.path, self._header, self._data_start, mode="r+")
+        for key, rows_to_write, values in rewrites:
+            columns[key][rows_to_write] = values
+        buffer.flush()
+        return int(np.count_nonzero(changed))
+
+    ##################################################################################
+    ############################### internal helpers #################################
+    ##################################################################################
+
+    def _names(self) -> list[str]:
+        """ name per row, decoded from the names blob """
+        offsets = self.columns["name_offsets"].tolist()
+        blob = self.columns["names"].tobytes()
+        text = blob.decode()
+        if len(text) == len(blob): # ascii only, byte offsets are character offsets
+            return [text[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+        return [blob[start:end].decode() for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def _reopen(self, snapshot: "SceneSnapshot") -> None:
+        """ take over the mapping of a freshly written file """
+        self.rows, self.meshes, self.columns, self.scene = snapshot.rows, snapshot.meshes, snapshot.columns, snapshot.scene
+        self._header, self._data_start, self._buffer = snapshot._header, snapshot._data_start, snapshot._buffer
+
+def save_scene(path: str, scene: Scene, physics: PhysicsEngine | None = None) -> SceneSnapshot:
+    """ Write a full snapshot of scene (see SceneSnapshot.write) """
+    return SceneSnapshot.write(path, scene, physics)
+
+def load_scene(path: str, physics: PhysicsEngine | None = None) -> tuple[Scene, SceneSnapshot]:
+    """ Load a snapshot into a new scene, returns the scene and the snapshot for later update() calls """
+    snapshot = SceneSnapshot(path)
+    return snapshot.load(physics), snapshot
+
+def _mesh_ids(scene: Scene, meshes: list[str], rows: int) -> np.ndarray:
+    """ index into meshes per object id, -1 for removed objects """
+    mesh_ids = np.full(rows, -1, dtype=np.int32)
+    index = {name: i for i, name in enumerate(meshes)}
+    for name, (_, ids) in scene.mesh_groups().items():
+        mesh_ids[ids] = index.get(name, -1)
+    return mesh_ids
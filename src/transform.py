@@ -1,6 +1,160 @@
 import math
+import numpy as np
 from engine_types import Vector3, Coordinate3
 
+def rotation_matrices_xyz(rotations: np.ndarray) -> np.ndarray:
+    """
+    Batched version of Transform.rotation_matrix_xyz: (N, 3) euler angles -> (N, 3, 3) matrices
+    """
+    sin_x, sin_y, sin_z = np.sin(rotations).T
+    cos_x, cos_y, cos_z = np.cos(rotations).T
+
+    rot = np.empty((len(rotations), 3, 3))
+    # expanded form of rot_z @ rot_y @ rot_x
+    rot[:, 0, 0] = cos_z * cos_y
+    rot[:, 0, 1] = -sin_z * cos_x - cos_z * sin_y * sin_x
+    rot[:, 0, 2] = sin_z * sin_x - cos_z * sin_y * cos_x
+    rot[:, 1, 0] = sin_z * cos_y
+    rot[:, 1, 1] = cos_z * cos_x - sin_z * sin_y * sin_x
+    rot[:, 1, 2] = -cos_z * sin_x - sin_z * sin_y * cos_x
+    rot[:, 2, 0] = sin_y
+    rot[:, 2, 1] = cos_y * sin_x
+    rot[:, 2, 2] = cos_y * cos_x
+    return rot
+
+def compose_model_matrices(positions: np.ndarray, rotations: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """
+    Build (N, 4, 4) model matrices (translate * rotate * scale) from (N, 3) component arrays
+    """
+    m = np.zeros((len(positions), 4, 4))
+    m[:, :3, :3] = rotation_matrices_xyz(rotations) * scales[:, np.newaxis, :]
+    m[:, :3, 3] = positions
+    m[:, 3, 3] = 1.0
+    return m
+
+def apply_model_matrices(vertices: np.ndarray, matrices: np.ndarray) -> np.ndarray:
+    """
+    Transform one (N, 3) vertex array by a stack of (I, 4, 4) model matrices, returns (I, N, 3)
+    """
+    return np.einsum("nj,ikj->ink", vertices, matrices[:, :3, :3]) + matrices[:, np.newaxis, :3, 3]
+
+def world_aabbs(vertices_min: np.ndarray, vertices_max: np.ndarray, matrices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Transform local bounds (3,) by (I, 4, 4) model matrices into world AABBs (I, 3) min/max.
+    Uses the box center and the absolute matrix for the extents, no per-vertex work needed.
+    """
+    center = (vertices_min + vertices_max) / 2
+    extent = (vertices_max - vertices_min) / 2
+    world_center = matrices[:, :3, :3] @ center + matrices[:, :3, 3]
+    world_extent = np.abs(matrices[:, :3, :3]) @ extent
+    return world_center - world_extent, world_center + world_extent
+
+class TransformStore:
+    """
+    Structure-of-arrays storage for many Transforms
+
+    Each Transform owns one slot (row) in the arrays below. Slots of released
+    Transforms are reused. The arrays may be reallocated when the store grows,
+    so only hold on to slot indices, never to array views.
+
+    Attributes:
+        positions
+        rotations
+        scales
+        model_matrices
+        versions
+        generations
+        dirty
+        alive
+        count
+    """
+    def __init__(self, capacity: int = 64) -> None:
+        capacity = max(1, capacity)
+        self.positions = np.zeros((capacity, 3))
+        self.rotations = np.zeros((capacity, 3))
+        self.scales = np.ones((capacity, 3))
+        self.model_matrices = np.tile(np.identity(4), (capacity, 1, 1))
+        self.versions = np.zeros(capacity, dtype=np.int64)
+        self.generations = np.zeros(capacity, dtype=np.int64) # incremented on release, tells a reused slot from its previous owner
+        self.dirty = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.count = 0 # number of slots in use, including released ones (high-water mark)
+        self._free: list[int] = []
+
+    @property
+    def capacity(self) -> int:
+        return len(self.positions)
+
+    def allocate(self, position: Vector3, rotation: Vector3, scale: Vector3) -> int:
+        """ Reserve a slot, store the given components and return the slot index """
+        if self._free:
+            index = self._free.pop()
+        else:
+            if self.count == self.capacity:
+                self._grow(self.capacity * 2)
+            index = self.count
+            self.count += 1
+
+        self.positions[index] = (position.x, position.y, position.z)
+        self.rotations[index] = (rotation.x, rotation.y, rotation.z)
+        self.scales[index] = (scale.x, scale.y, scale.z)
+        self.alive[index] = True
+        self.mark_dirty(index)
+        return index
+
+    def allocate_many(self, positions: np.ndarray, rotations: np.ndarray, scales: np.ndarray, alive: np.ndarray | None = None) -> np.ndarray:
+        """
+        Reserve len(positions) slots after the last used one in one step, store the (M, 3) components and return the indices.
+        Slots where alive is False are reserved empty and free for reuse, like released ones
+        """
+        start, end = self.count, self.count + len(positions)
+        if end > self.capacity:
+            self._grow(max(end, self.capacity * 2))
+        self.positions[start:end] = positions
+        self.rotations[start:end] = rotations
+        self.scales[start:end] = scales
+        self.alive[start:end] = True if alive is None else alive
+        self.count = end
+        indices = np.arange(start, end)
+        self.mark_dirty(indices)
+        if alive is not None:
+            self._free.extend(indices[~np.asarray(alive, dtype=bool)].tolist())
+        return indices
+
+    def release(self, index: int) -> None:
+        """ Free slot for reuse. The version keeps counting so stale readers notice the change """
+        self.alive[index] = False
+        self.generations[index] += 1
+        self.mark_dirty(index)
+        self._free.append(index)
+
+    def mark_dirty(self, indices: int | np.ndarray) -> None:
+        """ Call after writing to positions/rotations/scales directly """
+        self.versions[indices] += 1
+        self.dirty[indices] = True
+
+    def update_model_matrices(self) -> np.ndarray:
+        """ Rebuild all dirty model matrices in one batch and return the updated slot indices """
+        indices = np.flatnonzero(self.dirty[:self.count])
+        if len(indices):
+            self.model_matrices[indices] = compose_model_matrices(
+                self.positions[indices], self.rotations[indices], self.scales[indices]
+            )
+            self.dirty[indices] = False
+        return indices
+
+    def _grow(self, capacity: int) -> None:
+        """ reallocate all arrays with a larger capacity """
+        extra = capacity - self.capacity
+        self.positions = np.concatenate((self.positions, np.zeros((extra, 3))))
+        self.rotations = np.concatenate((self.rotations, np.zeros((extra, 3))))
+        self.scales = np.concatenate((self.scales, np.ones((extra, 3))))
+        self.model_matrices = np.concatenate((self.model_matrices, np.tile(np.identity(4), (extra, 1, 1))))
+        self.versions = np.concatenate((self.versions, np.zeros(extra, dtype=np.int64)))
+        self.generations = np.concatenate((self.generations, np.zeros(extra, dtype=np.int64)))
+        self.dirty = np.concatenate((self.dirty, np.zeros(extra, dtype=bool)))
+        self.alive = np.concatenate((self.alive, np.zeros(extra, dtype=bool)))
+
 class Transform:
     """
     Represents a 3D Transform in a computer-graphics enviroment
@@ -8,21 +162,75 @@ class Transform:
     A 3D Transform encapsulates position, rotation and scale in 3D space
     and provides an interface for manipulating these properties.
 
+    The data lives in a slot of a TransformStore (a private one-slot store
+    if none is given), so scenes can process all Transforms as arrays.
+    The composite model matrix is cached and only rebuilt after position,
+    rotation or scale changed. Every change increments `version`.
+
     Attributes:
         position
         rotation
         scale
+        version
+        store
+        index
     """
     def __init__(
             self,
             position: Vector3 = Vector3(x=0, y=0, z=0),
             rotation: Vector3 = Vector3(x=0, y=0, z=0),
-            scale: Vector3 = Vector3(x=1, y=1, z=1)
+            scale: Vector3 = Vector3(x=1, y=1, z=1),
+            store: TransformStore | None = None
         ) -> None:
 
-        self.position = position
-        self.rotation = rotation
-        self.scale = scale
+        self.store = store if store is not None else TransformStore(capacity=1)
+        self.index = self.store.allocate(position, rotation, scale)
+
+    @classmethod
+    def attach(cls, store: TransformStore, index: int) -> "Transform":
+        """ Handle for slot index of store, which was allocated already (e.g. by TransformStore.allocate_many) """
+        transform = cls.__new__(cls)
+        transform.store, transform.index = store, index
+        return transform
+
+    @property
+    def position(self) -> Vector3:
+        x, y, z = self.store.positions[self.index].tolist()
+        return Vector3(x, y, z)
+
+    @position.setter
+    def position(self, value: Vector3) -> None:
+        self.store.positions[self.index] = (value.x, value.y, value.z)
+        self.store.mark_dirty(self.index)
+
+    @property
+    def rotation(self) -> Vector3:
+        x, y, z = self.store.rotations[self.index].tolist()
+        return Vector3(x, y, z)
+
+    @rotation.setter
+    def rotation(self, value: Vector3) -> None:
+        self.store.rotations[self.index] = (value.x, value.y, value.z)
+        self.store.mark_dirty(self.index)
+
+    @property
+    def scale(self) -> Vector3:
+        x, y, z = self.store.scales[self.index].tolist()
+        return Vector3(x, y, z)
+
+    @scale.setter
+    def scale(self, value: Vector3) -> None:
+        self.store.scales[self.index] = (value.x, value.y, value.z)
+        self.store.mark_dirty(self.index)
+
+    @property
+    def version(self) -> int:
+        """ Counter that is incremented on every change of position, rotation or scale """
+        return int(self.store.versions[self.index])
+
+    def has_changed_since(self, version: int) -> bool:
+        """ Return True if this Transform was modified after the given version """
+        return self.store.versions[self.index] != version
 
     def rotate_by(self, delta: Vector3) -> None:
         """ update rotation """
@@ -86,21 +294,46 @@ class Transform:
         """
         Calculate and return transformed 3D world-space coordinate of vertex v
         """
-        # 1. scale
-        v = Coordinate3(
-            x = v.x * self.scale.x,
-            y = v.y * self.scale.y,
-            z = v.z * self.scale.z
-        )
+        # scale, rotate and translate are all baked into the cached model matrix
+        m = self.model_matrix()
+        x, y, z = (m[:3, :3] @ (v.x, v.y, v.z) + m[:3, 3]).tolist()
+        return Coordinate3(x, y, z)
+
+    @staticmethod
+    def rotation_matrix_xyz(rotation: Vector3) -> np.ndarray:
+        """
+        Build 3x3 rotation matrix equal to rotate_vertex_xyz (x, then y, then z axis)
+        """
+        sin_x, cos_x = math.sin(rotation.x), math.cos(rotation.x)
+        sin_y, cos_y = math.sin(rotation.y), math.cos(rotation.y)
+        sin_z, cos_z = math.sin(rotation.z), math.cos(rotation.z)
 
-        # 2. rotate
-        v = self.rotate_vertex_xyz(v, self.rotation)
+        rot_x = np.array(((1, 0, 0), (0, cos_x, -sin_x), (0, sin_x, cos_x)))
+        rot_y = np.array(((cos_y, 0, -sin_y), (0, 1, 0), (sin_y, 0, cos_y)))
+        rot_z = np.array(((cos_z, -sin_z, 0), (sin_z, cos_z, 0), (0, 0, 1)))
 
-        # 3. translate
-        v = Coordinate3(
-            x = v.x + self.position.x,
-            y = v.y + self.position.y,
-            z = v.z + self.position.z
-        )
-        
-        return v
+        # applied right to left: x axis first, z axis last
+        return rot_z @ rot_y @ rot_x
+
+    def model_matrix(self) -> np.ndarray:
+        """
+        Return 4x4 model matrix (translate * rotate * scale) of this Transform.
+        The matrix is cached and must not be modified by the caller.
+        """
+        store, i = self.store, self.index
+        if store.dirty[i]:
+            m = store.model_matrices[i]
+            m[:3, :3] = self.rotation_matrix_xyz(self.rotation) * store.scales[i]
+            m[:3, 3] = store.positions[i]
+            store.dirty[i] = False
+        m = store.model_matrices[i]
+        m.setflags(write=False) # read-only view into the store
+        return m
+
+    def apply_to_vertices(self, vertices: np.ndarray) -> np.ndarray:
+        """
+        Calculate and return transformed world-space coordinates of an (N, 3) vertex array
+        """
+        m = self.model_matrix()
+        # row vectors: v' = v * M^T, so the whole mesh is a single matrix multiply
+        return vertices @ m[:3, :3].T + m[:3, 3]
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# engine modules import each other by their flat names from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
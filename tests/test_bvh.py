@@ -0,0 +1,95 @@
+import math
+import random
+from bvh import DynamicBVH
+
+def _random_box(rng: random.Random, extent: float = 50.0) -> tuple[list[float], list[float]]:
+    center = [rng.uniform(-extent, extent) for _ in range(3)]
+    size = [rng.uniform(0.1, 4.0) for _ in range(3)]
+    return [c - s for c, s in zip(center, size)], [c + s for c, s in zip(center, size)]
+
+def _overlapping(boxes: dict, box_min, box_max) -> list[int]:
+    return sorted(item for item, (lo, hi) in boxes.items()
+                  if all(a <= d for a, d in zip(lo, box_max)) and all(c <= b for b, c in zip(hi, box_min)))
+
+def _ray_hits(boxes: dict, origin, direction, max_distance: float = math.inf) -> list[int]:
+    """ slab test per box, brute force """
+    hits = []
+    for item, (lo, hi) in boxes.items():
+        near, far = 0.0, max_distance
+        for o, d, a, b in zip(origin, direction, lo, hi):
+            if d == 0:
+                if not a <= o <= b:
+                    break
+                continue
+            t1, t2 = (a - o) / d, (b - o) / d
+            near, far = max(near, min(t1, t2)), min(far, max(t1, t2))
+        else:
+            if near <= far:
+                hits.append(item)
+    return sorted(hits)
+
+def test_query_matches_brute_force_while_items_move():
+    rng = random.Random(7)
+    tree, boxes = DynamicBVH(margin=0.5), {}
+    for item in range(300):
+        boxes[item] = _random_box(rng)
+        tree.insert(item, *boxes[item])
+
+    for frame in range(20):
+        for item in rng.sample(sorted(boxes), 40): # small moves stay inside the fat box, large ones restructure
+            lo, hi = boxes[item]
+            step = [rng.uniform(-3, 3) if frame % 2 else rng.uniform(-0.2, 0.2) for _ in range(3)]
+            boxes[item] = [a + s for a, s in zip(lo, step)], [b + s for b, s in zip(hi, step)]
+            tree.update(item, *boxes[item])
+        for item in rng.sample(sorted(boxes), 5):
+            tree.remove(item)
+            del boxes[item]
+        for _ in range(5):
+            item = max(boxes) + 1
+            boxes[item] = _random_box(rng)
+            tree.insert(item, *boxes[item])
+
+        assert len(tree) == len(boxes)
+        for _ in range(10):
+            query_min, query_max = _random_box(rng)
+            query_max = [v + 10 for v in query_max]
+            assert sorted(tree.query(query_min, query_max)) == _overlapping(boxes, query_min, query_max)
+
+    assert tree.height <= 4 * math.log2(len(boxes)) # rotations keep the tree balanced
+
+def test_refit_keeps_queries_exact():
+    rng = random.Random(3)
+    tree, boxes = DynamicBVH(), {}
+    for item in range(100):
+        boxes[item] = _random_box(rng)
+        tree.insert(item, *boxes[item])
+    for item in range(0, 100, 3):
+        lo, hi = boxes[item]
+        boxes[item] = [a + 20 for a in lo], [b + 20 for b in hi]
+        tree.refit(item, *boxes[item])
+    for _ in range(20):
+        query_min, query_max = _random_box(rng, extent=70.0)
+        assert sorted(tree.query(query_min, query_max)) == _overlapping(boxes, query_min, query_max)
+
+def test_ray_cast_matches_brute_force_and_sorts_by_distance():
+    rng = random.Random(11)
+    tree, boxes = DynamicBVH(), {}
+    for item in range(200):
+        boxes[item] = _random_box(rng, extent=20.0)
+        tree.insert(item, *boxes[item])
+    for _ in range(30):
+        origin = [rng.uniform(-30, 30) for _ in range(3)]
+        direction = [rng.uniform(-1, 1) for _ in range(3)]
+        direction[rng.randrange(3)] = 0.0 # axis parallel rays take the special case
+        hits = tree.ray_cast(origin, direction, max_distance=40.0)
+        assert sorted(item for _, item in hits) == _ray_hits(boxes, origin, direction, 40.0)
+        distances = [distance for distance, _ in hits]
+        assert distances == sorted(distances)
+
+def test_empty_tree():
+    tree = DynamicBVH()
+    assert tree.query((0, 0, 0), (1, 1, 1)) == []
+    assert tree.ray_cast((0, 0, 0), (1, 0, 0)) == []
+    tree.insert(1, (0, 0, 0), (1, 1, 1))
+    tree.remove(1)
+    assert len(tree) == 0 and tree.height == 0
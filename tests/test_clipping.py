@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from renderer import clip_polygons_near, clip_segments_near, project_faces, project_points
+
+NEAR = 1.0
+
+def _clip(*polygon) -> tuple[np.ndarray, int]:
+    clipped, sizes = clip_polygons_near(np.array([polygon], dtype=float), np.array([len(polygon)]), NEAR)
+    return clipped[0], int(sizes[0])
+
+def test_polygon_in_front_is_unchanged():
+    triangle = [(0, 0, 2), (2, 0, 3), (0, 2, 1)] # the last vertex lies on the plane, which counts as in front
+    clipped, size = _clip(*triangle)
+    assert size == 3
+    assert clipped.tolist() == [list(vertex) for vertex in triangle + [triangle[0]]]
+
+def test_polygon_behind_is_dropped():
+    _, size = _clip((0, 0, 0.5), (2, 0, -1), (0, 2, 0))
+    assert size == 0
+
+def test_one_vertex_behind_gives_a_quad():
+    clipped, size = _clip((0, 0, 2), (2, 0, 0), (0, 2, 2))
+    assert size == 4
+    assert clipped == pytest.approx(np.array([[0, 0, 2], [1, 0, 1], [1, 1, 1], [0, 2, 2]]))
+
+def test_two_vertices_behind_give_a_smaller_triangle():
+    clipped, size = _clip((0, 0, 2), (2, 0, 0), (0, 2, 0))
+    assert size == 3
+    assert clipped == pytest.approx(np.array([[0, 0, 2], [1, 0, 1], [0, 1, 1], [0, 0, 2]])) # padded with the first vertex
+
+def test_padded_polygons_of_different_sizes_in_one_batch():
+    triangle = [(0, 0, 2), (2, 0, 0), (0, 2, 0)]
+    quad = [(0, 0, 0), (4, 0, 0), (4, 0, 4), (0, 0, 4)] # the first two vertices are behind
+    polygons = np.array([triangle + [triangle[0]], quad], dtype=float)
+    clipped, sizes = clip_polygons_near(polygons, np.array([3, 4]), NEAR)
+    assert sizes.tolist() == [3, 4]
+    assert clipped[0, :3] == pytest.approx(np.array([[0, 0, 2], [1, 0, 1], [0, 1, 1]])) # the padding vertex added nothing
+    assert clipped[1, :4] == pytest.approx(np.array([[4, 0, 1], [4, 0, 4], [0, 0, 4], [0, 0, 1]]))
+    assert (clipped[:, :, 2][np.arange(5) < sizes[:, np.newaxis]] >= NEAR).all()
+
+def test_segments():
+    segments = np.array([[(0, 0, 3), (2, 0, -1)], [(0, 0, -1), (0, 4, 3)], [(0, 0, 0), (1, 1, 0.5)], [(1, 1, 2), (1, 1, 5)]], dtype=float)
+    clipped, visible = clip_segments_near(segments, NEAR)
+    assert visible.tolist() == [True, True, False, True]
+    assert clipped[0] == pytest.approx(np.array([[0, 0, 3], [1, 0, 1]]))
+    assert clipped[1] == pytest.approx(np.array([[0, 2, 1], [0, 4, 3]]))
+    assert clipped[3].tolist() == segments[3].tolist()
+
+def test_project_faces_clips_only_faces_crossing_the_plane():
+    # clip space points (x, y, z, w), one instance, faces: in front, crossing the plane, behind it
+    clip = np.array([[(0, 0, 0, 2), (1, 0, 0, 2), (0, 1, 0, 2), (2, 0, 0, 0), (0, 2, 0, 0), (1, 1, 0, -1)]], dtype=float)
+    face_array = np.array([[0, 1, 2], [0, 3, 4], [3, 4, 5]])
+    face_sizes = np.array([3, 3, 3])
+    screen_points = project_points(clip, 100, 100)
+    polygons, sizes = project_faces(clip, screen_points, face_array, face_sizes, np.zeros(3, dtype=np.intp), np.arange(3), 100, 100, NEAR)
+
+    assert sizes.tolist() == [3, 3, 0]
+    assert polygons[0, :3].tolist() == screen_points[0, :3].tolist()
+    crossing = clip_polygons_near(clip[0, face_array[1]][np.newaxis], face_sizes[1:2], NEAR)[0]
+    assert polygons[1, :3] == pytest.approx(project_points(crossing, 100, 100)[0, :3])
+    assert np.isfinite(polygons[:2]).all()
@@ -0,0 +1,10 @@
+from engine import Engine
+from profiler import profiler
+
+def test_profile_flag_switches_the_shared_profiler_both_ways():
+    try:
+        assert Engine(headless=True, profile=True).profiler.enabled
+        assert not Engine(headless=True).profiler.enabled
+        assert not profiler.enabled
+    finally:
+        profiler.enabled = False
@@ -0,0 +1,68 @@
+import math
+import random
+import numpy as np
+import pytest
+from engine_types import Coordinate2, Coordinate3, Vec3Array, Vector2, Vector3, _VecBase
+from renderer import cross_vector3, dot_vector3, normalize_vector3
+
+def _vectors(count: int, seed: int = 0) -> list[Vector3]:
+    rng = random.Random(seed)
+    vectors = [Vector3(rng.uniform(-5, 5), rng.uniform(-5, 5), rng.uniform(-5, 5)) for _ in range(count)]
+    return vectors + [Vector3(0, 0, 0)] # the zero vector has its own case in normalize
+
+def _assert_close(vectors: list[Vector3], expected: list[Vector3]) -> None:
+    assert len(vectors) == len(expected)
+    for v, e in zip(vectors, expected):
+        assert tuple(v) == pytest.approx(tuple(e), abs=1e-12)
+
+@pytest.mark.parametrize("cls, values", [(Vector3, (1.5, -2.0, 3.25)), (Coordinate3, (0.5, 4.0, -1.0)),
+                                         (Vector2, (1.5, -2.0)), (Coordinate2, (-0.25, 8.0))])
+def test_fast_paths_match_the_generic_base(cls, values):
+    a, b = cls(*values), cls(*(2 * value - 1 for value in values))
+    assert type(a + b) is cls and type(a * 2) is cls
+    assert tuple(a) == _VecBase._values(a) and len(a) == len(values)
+    assert a + b == _VecBase.__add__(a, b)
+    assert a - b == _VecBase.__sub__(a, b)
+    assert a * 2.5 == _VecBase.__mul__(a, 2.5)
+    assert 2.5 * a == a * 2.5
+    assert a.__add__(Vector3(1, 2, 3) if len(values) == 2 else Vector2(1, 2)) is NotImplemented
+    assert a.__mul__("2") is NotImplemented
+
+def test_vec3_array_matches_the_scalar_functions():
+    a, b = _vectors(50, 1), _vectors(50, 2)
+    batch_a, batch_b = Vec3Array.from_vectors(a), Vec3Array.from_vectors(b)
+
+    _assert_close(batch_a.cross(batch_b).to_vectors(), [cross_vector3(u, v) for u, v in zip(a, b)])
+    _assert_close(batch_a.normalized().to_vectors(), [normalize_vector3(u) for u in a])
+    assert batch_a.dot(batch_b) == pytest.approx([dot_vector3(u, v) for u, v in zip(a, b)], abs=1e-12)
+    assert batch_a.lengths() == pytest.approx([u.length() for u in a], abs=1e-12)
+    _assert_close((batch_a + batch_b).to_vectors(), [u + v for u, v in zip(a, b)])
+    _assert_close((batch_a - batch_b).to_vectors(), [u - v for u, v in zip(a, b)])
+    _assert_close((batch_a * 1.5).to_vectors(), [u * 1.5 for u in a])
+    _assert_close((-batch_a).to_vectors(), [u * -1 for u in a])
+
+def test_vec3_array_with_single_vectors_and_per_vector_factors():
+    a = _vectors(20, 3)
+    batch = Vec3Array.from_vectors(a)
+    v = Vector3(0.5, -1.0, 2.0)
+    point = Coordinate3(1.0, 2.0, 3.0)
+    factors = np.arange(len(a), dtype=float)
+
+    assert batch.dot(v) == pytest.approx([dot_vector3(u, v) for u in a], abs=1e-12)
+    _assert_close(batch.cross(v).to_vectors(), [cross_vector3(u, v) for u in a])
+    _assert_close((batch + point).to_vectors(), [Vector3(u.x + point.x, u.y + point.y, u.z + point.z) for u in a])
+    _assert_close((point - batch).to_vectors(), [Vector3(point.x - u.x, point.y - u.y, point.z - u.z) for u in a])
+    _assert_close((batch * factors).to_vectors(), [u * f for u, f in zip(a, factors.tolist())])
+    _assert_close((np.ones(3) - batch).to_vectors(), [Vector3(1 - u.x, 1 - u.y, 1 - u.z) for u in a])
+
+def test_vec3_array_reductions_and_indexing():
+    a = _vectors(10, 4)
+    batch = Vec3Array.from_vectors(a)
+    total = Vector3(sum(u.x for u in a), sum(u.y for u in a), sum(u.z for u in a))
+    _assert_close([batch.sum(), batch.mean()], [total, total * (1 / len(a))])
+    assert batch[3] == a[3] and type(batch[3]) is Vector3
+    assert isinstance(batch[2:5], Vec3Array) and batch[2:5].to_vectors() == a[2:5]
+    assert list(batch) == a and len(batch) == len(a)
+    assert math.isclose(batch.normalized()[0].length(), 1.0)
+    with pytest.raises(ValueError):
+        Vec3Array(np.zeros((4, 2)))
@@ -0,0 +1,125 @@
+import math
+import os
+import numpy as np
+import pytest
+from engine_types import MeshType
+from mesh import Mesh, get_mesh
+from obj_loader import CACHE_SUFFIX, load_obj, read_mesh_cache, write_mesh_cache
+
+def _write_sphere(path, stacks: int = 12, slices: int = 16) -> None:
+    """ UV sphere with quads between the rings and triangle fans at the poles """
+    lines = ["v 0 1 0"]
+    for i in range(1, stacks):
+        theta = math.pi * i / stacks
+        for j in range(slices):
+            phi = 2 * math.pi * j / slices
+            lines.append(f"v {math.sin(theta) * math.cos(phi)} {math.cos(theta)} {math.sin(theta) * math.sin(phi)}")
+    lines.append("v 0 -1 0")
+    ring = lambda i, j: 2 + (i - 1) * slices + j % slices # 1-based OBJ index
+    bottom = 2 + (stacks - 1) * slices
+    lines += [f"f 1 {ring(1, j + 1)} {ring(1, j)}" for j in range(slices)]
+    lines += [f"f {ring(i, j)} {ring(i, j + 1)}/1 {ring(i + 1, j + 1)}//1 {ring(i + 1, j)}" for i in range(1, stacks - 1) for j in range(slices)]
+    lines += [f"f {bottom} {ring(stacks - 1, j)} {ring(stacks - 1, j + 1)}" for j in range(slices)]
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+def _is_mapped(array: np.ndarray) -> bool:
+    """ True if array is a view into a memory-mapped file """
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+def _assert_same_mesh(a: Mesh, b: Mesh) -> None:
+    for key in ("vertex_array", "edge_array", "face_array", "face_sizes") + Mesh.DERIVED:
+        assert np.array_equal(getattr(a, key), getattr(b, key)), key
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "sphere.obj")
+    _write_sphere(path)
+    mesh = load_obj(path, name="cache_round_trip", lod_levels=2, lod_ratio=0.5)
+    assert os.path.exists(path + CACHE_SUFFIX)
+    assert len(mesh.lods) == 2
+
+    cached = read_mesh_cache(path + CACHE_SUFFIX, os.stat(path), "cache_round_trip", (2, 0.5))
+    assert cached is not None
+    assert _is_mapped(cached.vertex_array)
+    _assert_same_mesh(cached, mesh)
+    assert len(cached.lods) == len(mesh.lods)
+    for cached_lod, lod in zip(cached.lods, mesh.lods):
+        _assert_same_mesh(cached_lod, lod)
+        assert cached_lod.lod_of == "cache_round_trip"
+
+def test_second_load_uses_cache(tmp_path):
+    path = str(tmp_path / "sphere.obj")
+    _write_sphere(path)
+    first = load_obj(path, name="cache_first")
+    second = load_obj(path, name="cache_second")
+    assert not _is_mapped(first.vertex_array)
+    assert _is_mapped(second.vertex_array)
+    _assert_same_mesh(first, second)
+
+def test_cache_is_invalidated(tmp_path):
+    path = str(tmp_path / "sphere.obj")
+    cache = path + CACHE_SUFFIX
+    _write_sphere(path)
+    mesh = load_obj(path, name="cache_invalidated", use_cache=False)
+    write_mesh_cache(cache, mesh, os.stat(path), (3, 0.25))
+    assert read_mesh_cache(cache, os.stat(path), "x", (3, 0.25)) is not None
+
+    # other lod parameters
+    assert read_mesh_cache(cache, os.stat(path), "x", (2, 0.25)) is None
+
+    # source changed: new size and modification time
+    _write_sphere(path, stacks=10)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+    assert read_mesh_cache(cache, os.stat(path), "x", (3, 0.25)) is None
+
+    # damaged file
+    write_mesh_cache(cache, mesh, os.stat(path), (3, 0.25))
+    with open(cache, "r+b") as file:
+        file.write(b"NOTACACHE")
+    assert read_mesh_cache(cache, os.stat(path), "x", (3, 0.25)) is None
+    with open(cache, "wb") as file:
+        file.write(b"")
+    assert read_mesh_cache(cache, os.stat(path), "x", (3, 0.25)) is None
+
+    # missing file
+    os.remove(cache)
+    assert read_mesh_cache(cache, os.stat(path), "x", (3, 0.25)) is None
+
+def test_imported_mesh_collides_as_its_bounding_box(tmp_path):
+    from engine_types import Vector3
+    from physics import PhysicsEngine
+    from scene import Scene
+    path = str(tmp_path / "sphere.obj")
+    _write_sphere(path, stacks=40, slices=60)
+    mesh = load_obj(path, name="cache_collider", use_cache=False, lod_levels=0)
+    assert len(mesh.collider.vertex_array) == 8
+    assert np.array_equal(mesh.collider.vertex_array.min(axis=0), mesh.bounds_min)
+
+    scene, physics = Scene(), PhysicsEngine()
+    scene.spawn("a", "cache_collider", Vector3(0, 0, 0), Vector3(0, 0, 0), Vector3(1, 1, 1))
+    b = scene.spawn("b", "cache_collider", Vector3(1.5, 0, 0), Vector3(0, 0, 0), Vector3(1, 1, 1))
+    physics.add_body(b)
+    assert physics.detect_collisions(scene) == [(0, 1)]
+    physics.step(scene, 1 / 60)
+    assert b.transform.position.x > 1.5 # pushed out of the static sphere
+
+def test_same_file_name_in_other_folders_does_not_share_a_mesh(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        _write_sphere(str(tmp_path / folder / "loader_rock.obj"))
+    rock = load_obj(str(tmp_path / "a" / "loader_rock.obj"))
+    assert load_obj(str(tmp_path / "a" / "loader_rock.obj")) is rock
+    with pytest.raises(ValueError):
+        load_obj(str(tmp_path / "b" / "loader_rock.obj"))
+    assert load_obj(str(tmp_path / "b" / "loader_rock.obj"), name="loader_rock_b") is not rock
+
+def test_built_in_names_are_not_taken_by_files(tmp_path):
+    path = str(tmp_path / "CUBE.obj")
+    _write_sphere(path)
+    with pytest.raises(ValueError):
+        load_obj(path)
+    assert load_obj(path, name="loader_cube_file") is not get_mesh(MeshType.CUBE)
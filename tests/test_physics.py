@@ -0,0 +1,169 @@
+import math
+import numpy as np
+import pytest
+from engine_types import MeshType, Vector3
+from mesh import get_mesh
+from physics import PhysicsEngine, sat_contacts
+from scene import Scene
+from transform import rotation_matrices_xyz
+
+ONE = Vector3(1, 1, 1)
+
+def _cube(offset=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0)) -> np.ndarray:
+    """ (1, 8, 3) world vertices of the 2x2x2 cube, rotated about its center (radians) and moved by offset """
+    matrix = rotation_matrices_xyz(np.array([rotation], dtype=float))[0]
+    return (get_mesh(MeshType.CUBE).vertex_array @ matrix.T + offset)[np.newaxis]
+
+def _sat(vertices_a: np.ndarray, vertices_b: np.ndarray, direction=None) -> tuple[bool, float, np.ndarray]:
+    cube = get_mesh(MeshType.CUBE)
+    colliding, depth, normal = sat_contacts(vertices_a, cube, vertices_b, cube, direction)
+    return bool(colliding[0]), float(depth[0]), normal[0]
+
+def test_face_contact_depth_and_normal():
+    colliding, depth, normal = _sat(_cube(), _cube((1.5, 0.2, -0.1)))
+    assert colliding
+    assert depth == pytest.approx(0.5)
+    assert normal == pytest.approx([1, 0, 0])
+
+def test_separated_pair_reports_the_gap():
+    colliding, depth, normal = _sat(_cube(), _cube((0.0, -3.0, 0.0)))
+    assert not colliding
+    assert depth == pytest.approx(-1.0)
+    assert normal == pytest.approx([0, -1, 0]) # still from a to b
+
+def test_edge_edge_contact():
+    # the outermost edge of a runs along z at x = sqrt(2), the one of b along y at x = sqrt(2) - 0.1.
+    # No face axis separates the cubes, only the cross product of these edges (the x axis) does
+    a = _cube(rotation=(0.0, 0.0, math.pi / 4))
+    touching = _cube((2 * math.sqrt(2) - 0.1, 0.0, 0.0), (0.0, math.pi / 4, 0.0))
+    colliding, depth, normal = _sat(a, touching)
+    assert colliding
+    assert depth == pytest.approx(0.1)
+    assert normal == pytest.approx([1, 0, 0])
+
+    apart = _cube((2 * math.sqrt(2) + 0.1, 0.0, 0.0), (0.0, math.pi / 4, 0.0))
+    colliding, depth, _ = _sat(a, apart)
+    assert not colliding
+    assert depth == pytest.approx(-0.1)
+
+def test_normal_follows_the_given_direction():
+    a, b = _cube(), _cube((0.0, 0.0, 1.8))
+    assert _sat(a, b)[2] == pytest.approx([0, 0, 1])
+    assert _sat(b, a)[2] == pytest.approx([0, 0, -1])
+    # b moved through the middle of a in this step, it came from the other side
+    assert _sat(a, b, np.array([[0.0, 0.0, -1.0]]))[2] == pytest.approx([0, 0, -1])
+
+def test_narrow_phase_keeps_only_colliding_pairs():
+    scene = Scene()
+    cubes = [scene.spawn(f"cube {i}", MeshType.CUBE, Vector3(x, 0, 0), Vector3(0, 0, 0), ONE).id for i, x in enumerate((0.0, 1.9, 5.0))]
+    tip = scene.spawn("tip", MeshType.PYRAMID, Vector3(0, 4, 0), Vector3(0, 0, 0), ONE).id
+    pairs = np.array([[cubes[0], cubes[1]], [cubes[1], cubes[2]], [cubes[0], tip]])
+    colliding, depths, normals = PhysicsEngine().narrow_phase(scene, pairs)
+    assert colliding.tolist() == [[cubes[0], cubes[1]]]
+    assert depths == pytest.approx([0.1])
+    assert normals[0] == pytest.approx([1, 0, 0])
+
+def _falling(count: int = 1, **physics_args) -> tuple[Scene, PhysicsEngine, list]:
+    """ count cubes far apart, each a body of mass 2 """
+    scene, physics = Scene(), PhysicsEngine(**physics_args)
+    objects = [scene.spawn(f"body {i}", MeshType.CUBE, Vector3(10.0 * i, 0, 0), Vector3(0, 0, 0), ONE) for i in range(count)]
+    for game_object in objects:
+        physics.add_body(game_object, mass=2.0)
+    return scene, physics, objects
+
+def test_semi_implicit_euler_step():
+    scene, physics, (body,) = _falling()
+    dt = 0.1
+    physics.step(scene, dt)
+    assert physics.velocities[body.id] == pytest.approx([0, -9.81 * dt, 0])
+    assert scene.transforms.positions[body.id] == pytest.approx([0, -9.81 * dt * dt, 0]) # moved with the new velocity
+    physics.step(scene, dt)
+    assert scene.transforms.positions[body.id] == pytest.approx([0, -9.81 * dt * dt * 3, 0])
+
+def test_forces_act_for_one_step_and_impulses_at_once():
+    scene, physics, (pushed, kicked) = _falling(2, gravity=Vector3(0, 0, 0))
+    physics.apply_force(pushed, Vector3(4, 0, 0))
+    physics.apply_impulse(kicked, Vector3(0, 0, 3))
+    assert physics.get_velocity(kicked) == Vector3(0, 0, 1.5)
+
+    physics.step(scene, 0.5)
+    assert physics.velocities[pushed.id] == pytest.approx([1, 0, 0]) # 4 / 2 * 0.5
+    assert scene.transforms.positions[kicked.id] == pytest.approx([10, 0, 0.75])
+    physics.step(scene, 0.5)
+    assert physics.velocities[pushed.id] == pytest.approx([1, 0, 0])
+    assert scene.transforms.positions[pushed.id] == pytest.approx([1, 0, 0])
+
+def test_static_bodies_and_plain_objects_do_not_move():
+    scene, physics, (body,) = _falling()
+    wall = scene.spawn("wall", MeshType.CUBE, Vector3(-10, 0, 0), Vector3(0, 0, 0), ONE)
+    plain = scene.spawn("plain", MeshType.CUBE, Vector3(20, 0, 0), Vector3(0, 0, 0), ONE)
+    physics.add_body(wall, static=True)
+    versions = scene.transforms.versions[[wall.id, plain.id]].copy()
+    physics.step(scene, 0.1)
+    assert scene.transforms.positions[wall.id] == pytest.approx([-10, 0, 0])
+    assert scene.transforms.positions[plain.id] == pytest.approx([20, 0, 0])
+    assert scene.transforms.versions[[wall.id, plain.id]].tolist() == versions.tolist()
+    assert physics.active_ids.tolist() == [body.id]
+    with pytest.raises(ValueError):
+        physics.add_body(plain, mass=0.0)
+
+def test_body_of_a_removed_object_does_not_move_its_successor():
+    scene, physics, (body,) = _falling()
+    scene.remove(body)
+    successor = scene.spawn("successor", MeshType.CUBE, Vector3(0, 0, 0), Vector3(0, 0, 0), ONE)
+    assert successor.id == body.id
+    physics.step(scene, 0.1)
+    assert not physics.is_body[successor.id]
+    assert scene.transforms.positions[successor.id] == pytest.approx([0, 0, 0])
+
+def _resting(sleep_steps: int = 5) -> tuple[Scene, PhysicsEngine, object]:
+    """ a cube body standing on a static ground box, asleep after sleep_steps steps """
+    scene, physics = Scene(), PhysicsEngine(sleep_steps=sleep_steps)
+    ground = scene.spawn("ground", MeshType.CUBE, Vector3(0, -2, 0), Vector3(0, 0, 0), Vector3(10, 1, 10))
+    body = scene.spawn("body", MeshType.CUBE, Vector3(0, 0, 0), Vector3(0, 0, 0), ONE)
+    physics.add_body(ground, static=True)
+    physics.add_body(body)
+    for _ in range(sleep_steps):
+        physics.step(scene, 1 / 60)
+    return scene, physics, body
+
+def test_resting_body_falls_asleep_and_stays_put():
+    scene, physics, body = _resting()
+    assert physics.sleeping[body.id]
+    assert physics.active_ids.size == 0
+    position, version = scene.transforms.positions[body.id].copy(), scene.transforms.versions[body.id]
+    for _ in range(20):
+        physics.step(scene, 1 / 60)
+    assert scene.transforms.positions[body.id].tolist() == position.tolist()
+    assert scene.transforms.versions[body.id] == version
+    assert physics.get_velocity(body) == Vector3(0, 0, 0)
+
+def test_body_is_not_asleep_before_sleep_steps():
+    scene, physics, body = _resting()
+    physics.apply_force(body, Vector3(0, 0, 0)) # wakes without moving it
+    for _ in range(physics.sleep_steps - 1):
+        physics.step(scene, 1 / 60)
+    assert not physics.sleeping[body.id]
+    physics.step(scene, 1 / 60)
+    assert physics.sleeping[body.id]
+
+def test_external_move_wakes_the_body():
+    scene, physics, body = _resting()
+    body.move_up(3.0)
+    physics.step(scene, 1 / 60)
+    assert not physics.sleeping[body.id]
+    assert physics.velocities[body.id][1] < 0 # falling again
+
+def test_impulse_wakes_the_body():
+    scene, physics, body = _resting()
+    physics.apply_impulse(body, Vector3(2, 0, 0))
+    physics.step(scene, 1 / 60)
+    assert not physics.sleeping[body.id]
+    assert scene.transforms.positions[body.id][0] > 0
+
+def test_falling_body_wakes_the_one_it_lands_on():
+    scene, physics, body = _resting()
+    falling = scene.spawn("falling", MeshType.CUBE, Vector3(0, 2.05, 0), Vector3(0, 0, 0), ONE)
+    physics.add_body(falling, velocity=Vector3(0, -5, 0))
+    physics.step(scene, 1 / 60)
+    assert not physics.sleeping[body.id]
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from engine_types import MeshType, Vector3
+from mesh import Mesh, get_mesh, register_mesh
+from scene import Scene
+
+def _copy(mesh: Mesh, name: str) -> Mesh:
+    return Mesh.from_arrays(mesh.vertex_array, mesh.edge_array, mesh.face_array, mesh.face_sizes, name)
+
+def test_register_mesh_rejects_a_different_name():
+    with pytest.raises(ValueError):
+        register_mesh("scene_test_mismatch", _copy(get_mesh(MeshType.CUBE), "other"))
+
+def test_registered_meshes_form_their_own_groups():
+    register_mesh("scene_test_box", _copy(get_mesh(MeshType.CUBE), "scene_test_box"))
+    register_mesh("scene_test_tip", _copy(get_mesh(MeshType.PYRAMID), "scene_test_tip"))
+    scene = Scene()
+    one = Vector3(1, 1, 1)
+    box = scene.spawn("box", "scene_test_box", Vector3(0, 0, 0), Vector3(0, 0, 0), one)
+    tip = scene.spawn("tip", "scene_test_tip", Vector3(5, 0, 0), Vector3(0, 0, 0), one)
+    groups = scene.mesh_groups()
+    assert set(groups) == {"scene_test_box", "scene_test_tip"}
+    assert groups["scene_test_box"][0] is box.mesh and groups["scene_test_box"][1].tolist() == [box.id]
+    assert groups["scene_test_tip"][0] is tip.mesh and groups["scene_test_tip"][1].tolist() == [tip.id]
+    assert len(scene.world_vertices(tip.mesh, [tip.id])[0]) == len(get_mesh(MeshType.PYRAMID).vertex_array)
@@ -0,0 +1,93 @@
+import math
+import numpy as np
+import pytest
+from mesh import Mesh, edges_from_faces, triangulate_faces
+from simplify import build_lods, simplify
+
+def _sphere(stacks: int, slices: int, welded: bool = True, quads: bool = False, noise: float = 0.0) -> Mesh:
+    """ UV sphere, unwelded spheres repeat the pole vertex per slice (zero area triangles at the poles) """
+    vertices = []
+    for i in range(stacks + 1):
+        theta = math.pi * i / stacks
+        count = 1 if welded and i in (0, stacks) else slices
+        vertices += [(math.sin(theta) * math.cos(2 * math.pi * j / slices), math.cos(theta), math.sin(theta) * math.sin(2 * math.pi * j / slices))
+                     for j in range(count)]
+    def index(i: int, j: int) -> int:
+        if welded:
+            return 0 if i == 0 else len(vertices) - 1 if i == stacks else 1 + (i - 1) * slices + j % slices
+        return i * slices + j % slices
+
+    faces = []
+    for i in range(stacks):
+        for j in range(slices):
+            a, b, c, d = index(i, j), index(i, j + 1), index(i + 1, j + 1), index(i + 1, j)
+            if a == b:
+                faces.append([a, c, d])
+            elif c == d:
+                faces.append([a, b, c])
+            elif quads:
+                faces.append([a, b, c, d])
+            else:
+                faces += [[a, b, c], [a, c, d]]
+    vertex_array = np.array(vertices)
+    if noise:
+        vertex_array *= 1 + noise * np.random.default_rng(5).standard_normal((len(vertex_array), 1))
+    face_sizes = np.array([len(face) for face in faces])
+    face_array = np.array([face + face[:1] * (face_sizes.max() - len(face)) for face in faces])
+    return Mesh.from_arrays(vertex_array, edges_from_faces(face_array, face_sizes), face_array, face_sizes, "sphere")
+
+def _facing(mesh: Mesh) -> np.ndarray:
+    """ cosine between the normal of every triangle with area and the direction from the sphere center to it """
+    triangles, _ = triangulate_faces(mesh.face_array, mesh.face_sizes)
+    p = mesh.vertex_array[triangles]
+    normals = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    centers = p.mean(axis=1)
+    lengths = np.linalg.norm(normals, axis=1) * np.linalg.norm(centers, axis=1)
+    return np.einsum("tk,tk->t", normals, centers)[lengths > 0] / lengths[lengths > 0]
+
+@pytest.mark.parametrize("stacks, slices, welded, quads", [
+    (40, 60, True, False),
+    (40, 60, False, False),
+    (30, 80, False, False), # produced inverted slivers before collapses were checked against the original surface
+    (60, 40, False, True),
+])
+def test_lods_keep_every_triangle_facing_outwards(stacks, slices, welded, quads):
+    mesh = _sphere(stacks, slices, welded, quads)
+    side = np.sign(np.median(_facing(mesh)))
+    assert (_facing(mesh) * side > 0).all()
+    lods = build_lods(mesh)
+    assert len(lods) == 3
+    for lod in lods:
+        assert (_facing(lod) * side > 0).all(), lod.name
+
+def test_noisy_surface_does_not_flip():
+    mesh = _sphere(40, 60, noise=0.005)
+    side = np.sign(np.median(_facing(mesh)))
+    for lod in build_lods(mesh):
+        assert (_facing(lod) * side > 0).all(), lod.name
+
+def test_face_counts_shrink_by_ratio():
+    mesh = _sphere(40, 60)
+    lods = build_lods(mesh, levels=3, ratio=0.25)
+    counts = [len(mesh.face_array)] + [len(lod.face_array) for lod in lods]
+    for before, after in zip(counts, counts[1:]):
+        assert after <= before * 0.25 * 1.1 # about the target, a pass may stop a few collapses short
+        assert after >= before * 0.25 * 0.9
+    assert [lod.name for lod in lods] == ["sphere#lod1", "sphere#lod2", "sphere#lod3"]
+    assert all(lod.lod_of == "sphere" for lod in lods)
+    assert mesh.lods == lods
+
+def test_simplified_mesh_is_closed_and_close_to_the_surface():
+    lod = simplify(_sphere(40, 60), 600, "sphere#simplified")
+    assert len(lod.face_array) <= 600
+    assert (lod.face_sizes == 3).all()
+    # every edge of a closed triangle mesh borders exactly two triangles
+    assert all(len(faces) == 2 for faces in lod.edge_faces)
+    radii = np.linalg.norm(lod.vertex_array, axis=1)
+    assert np.abs(radii - 1.0).max() < 0.05
+    assert len(np.unique(lod.face_array)) == len(lod.vertex_array) # no unused vertices
+
+def test_small_meshes_get_no_lods():
+    mesh = _sphere(4, 6)
+    assert build_lods(mesh, min_faces=32) == ()
+    assert mesh.lods == ()
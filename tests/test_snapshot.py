@@ -0,0 +1,96 @@
+import os
+import numpy as np
+from engine_types import Vector3, MeshType
+from physics import PhysicsEngine, BODY_STATE
+from scene import Scene
+from snapshot import SceneSnapshot, load_scene, save_scene
+
+def _scene(count: int = 12) -> tuple[Scene, PhysicsEngine]:
+    scene, physics = Scene(), PhysicsEngine()
+    types = list(MeshType)
+    for i in range(count):
+        game_object = scene.spawn(f"object {i}", types[i % len(types)], Vector3(i * 3.0, 5.0, 0.0), Vector3(0.1 * i, 0.0, 0.0), Vector3(1, 1, 1))
+        if i % 2:
+            physics.add_body(game_object, mass=1.0 + i)
+    return scene, physics
+
+def test_round_trip_keeps_ids_names_types_and_transforms(tmp_path):
+    scene, physics = _scene()
+    scene.remove(scene.get(4))
+    path = str(tmp_path / "scene.snap")
+    save_scene(path, scene, physics)
+
+    loaded_physics = PhysicsEngine()
+    loaded, _ = load_scene(path, loaded_physics)
+    count = scene.transforms.count
+    assert loaded.transforms.count == count
+    assert loaded.get(4) is None and loaded.transforms._free == [4]
+    assert [(o.id, o.name, o.type) for o in loaded] == [(o.id, o.name, o.type) for o in scene]
+    for key in ("positions", "rotations", "scales", "versions", "alive"):
+        assert np.array_equal(getattr(loaded.transforms, key)[:count], getattr(scene.transforms, key)[:count])
+    state, loaded_state = physics.body_state(count), loaded_physics.body_state(count)
+    for key in BODY_STATE:
+        assert np.array_equal(loaded_state[key], state[key])
+
+def test_scene_with_only_removed_objects(tmp_path):
+    scene, _ = _scene(3)
+    for game_object in list(scene):
+        scene.remove(game_object)
+    path = str(tmp_path / "empty.snap")
+    save_scene(path, scene)
+
+    loaded, _ = load_scene(path)
+    assert len(loaded) == 0
+    assert loaded.transforms.count == 3
+    assert sorted(loaded.transforms._free) == [0, 1, 2]
+
+def test_removed_rows_do_not_take_a_mesh(tmp_path):
+    scene = Scene()
+    scene.spawn("cube", MeshType.CUBE, Vector3(0, 0, 0), Vector3(0, 0, 0), Vector3(1, 1, 1))
+    pyramid = scene.spawn("pyramid", MeshType.PYRAMID, Vector3(3, 0, 0), Vector3(0, 0, 0), Vector3(1, 1, 1))
+    scene.remove(pyramid)
+    path = str(tmp_path / "scene.snap")
+    save_scene(path, scene)
+
+    loaded, _ = load_scene(path)
+    assert [o.type for o in loaded] == [MeshType.CUBE]
+    game_object = loaded.spawn("new", MeshType.OCTAHEDRON, Vector3(0, 0, 0), Vector3(0, 0, 0), Vector3(1, 1, 1))
+    assert game_object.id == 1 and game_object.type == MeshType.OCTAHEDRON
+
+def test_update_rewrites_only_changed_rows(tmp_path):
+    scene, physics = _scene()
+    path = str(tmp_path / "scene.snap")
+    save_scene(path, scene, physics)
+    loaded_physics = PhysicsEngine()
+    loaded, snapshot = load_scene(path, loaded_physics)
+    assert snapshot.update(loaded, loaded_physics) == 0
+
+    loaded.get(2).move_up(1.0) # no body, only its transform changes
+    loaded_physics.step(loaded, 1 / 60) # moves the six bodies
+    assert snapshot.update(loaded, loaded_physics) == 7
+    assert snapshot.update(loaded, loaded_physics) == 0
+
+    reloaded, _ = load_scene(path)
+    count = loaded.transforms.count
+    assert np.array_equal(reloaded.positions[:count], loaded.positions[:count])
+
+def test_update_falls_back_to_full_write_on_structural_change(tmp_path):
+    scene, physics = _scene()
+    path = str(tmp_path / "scene.snap")
+    snapshot = SceneSnapshot.write(path, scene, physics)
+    scene.remove(scene.get(3))
+    assert snapshot.update(scene, physics) == scene.transforms.count
+
+    reloaded, _ = load_scene(path)
+    assert reloaded.get(3) is None
+    assert len(reloaded) == len(scene)
+
+def test_read_only_snapshot_loads(tmp_path):
+    scene, physics = _scene()
+    path = str(tmp_path / "scene.snap")
+    save_scene(path, scene, physics)
+    os.chmod(path, 0o444)
+
+    loaded, snapshot = load_scene(path, PhysicsEngine())
+    assert len(loaded) == len(scene)
+    assert not snapshot.columns["positions"].flags.writeable